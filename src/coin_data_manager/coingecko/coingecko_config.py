@@ -11,9 +11,19 @@ class CoingeckoConfig(Config):
     Attributes:
         endpoint_query_params (dict): Default query parameters for API endpoints.
             - 'currency': The currency to use for pricing information (default: 'usd').
-            - 'toplist_len': The number of top cryptocurrencies to retrieve (default: 250).
+            - 'toplist_len': The number of top cryptocurrencies to retrieve per page, at most 250 (default: 250).
 
-        request_delay_time_seconds (int): The delay time in seconds between consecutive API requests (default: 7).
+        toplist_pages (int): The number of toplist pages fetched, i.e. the top toplist_pages * toplist_len coins are tracked.
+
+        extended_toplist_hourly_budget (int): The number of coins whose extended data is refreshed per hour, one request each.
+        extended_toplist_batch_size (int): The number of coins fetched concurrently and saved together.
+        extended_toplist_rank_change_weight (float): The weight of a coin's relative rank change in its refresh priority.
+
+        market_snapshot_retention_sec (int): The time in seconds raw market snapshots are kept.
+        market_history_levels (list[tuple[str, int, int]]): The rollup levels of the market history, finest first, as
+            (bucket, bucket length in seconds, retention in seconds). Each level aggregates the previous one, the first
+            aggregates the raw snapshots. Levels with a retention of 0 are kept forever.
+        market_history_max_points (int): The maximum number of rows a market history query returns before a coarser level is read.
 
         datapoints (dict): Defines the data points to retrieve for different API endpoints.
             - 'toplist': List of data points to retrieve for the top cryptocurrencies.
@@ -27,7 +37,19 @@ class CoingeckoConfig(Config):
         'toplist_len': 250,
     }
 
-    request_delay_time_seconds: int = 7
+    toplist_pages: int = 4
+
+    extended_toplist_hourly_budget: int = 400
+    extended_toplist_batch_size: int = 25
+    extended_toplist_rank_change_weight: float = 1.0
+
+    market_snapshot_retention_sec: int = 7 * 24 * 3600
+    market_history_levels: list[tuple[str, int, int]] = [
+        ('hour', 3600, 90 * 24 * 3600),
+        ('day', 24 * 3600, 2 * 365 * 24 * 3600),
+        ('week', 7 * 24 * 3600, 0),
+    ]
+    market_history_max_points: int = 500
 
     datapoints: dict[str, Union[list[str], dict[str, list[str]]]] = {
         'toplist': [
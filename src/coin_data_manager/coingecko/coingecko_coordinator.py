@@ -29,7 +29,6 @@ class CoingeckoCoordinator(ServiceCoordinator):
         routines: An instance of CoingeckoRoutinesFactory for creating and managing routines.
         fetch: A Callable function for fetching data.
         scrape: A Callable function for scraping data.
-        _routine_interval_sec:
         task: An asyncio.Task object representing the running routine task.
 
     Methods:
@@ -42,8 +41,8 @@ class CoingeckoCoordinator(ServiceCoordinator):
 
         Args:
             database: An instance of the Database class for database operations.
-            fetch_json: A Callable function for fetching JSON data from APIs.
-            scrape_url: A Callable function for scraping data from a URL.
+            fetch_json: A coroutine function for fetching JSON data from APIs.
+            scrape_url: A coroutine function for scraping data from a URL.
         """
         self.db = CoingeckoDBLayer(database)
 
@@ -60,8 +59,6 @@ class CoingeckoCoordinator(ServiceCoordinator):
         self.fetch = fetch_json
         self.scrape = scrape_url
 
-        self._routine_interval_sec = cfg.routine_intervals_hours['1 hour'] * 360
-
         self._task = None
 
         self.routines = coingecko_routines_factory(coingecko_instance=self)
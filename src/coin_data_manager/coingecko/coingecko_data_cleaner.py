@@ -79,7 +79,7 @@ class CoingeckoDataCleaner(DataCleaner):
         Returns:
             list[dict[str, Union[str, int, float]]]: A list of filtered top coin data dictionaries.
         """
-        stablecoin_ids: list[str] = [stablecoin.coin_id for stablecoin in stablecoins]
+        stablecoin_ids: set[str] = {stablecoin.coin_id for stablecoin in stablecoins}
 
         filtered_toplist = [coin for coin in toplist if coin["coin_id"] not in stablecoin_ids]
 
@@ -1,12 +1,11 @@
+from time import time
 from datetime import datetime, timedelta
-from typing import Any, Union
-from sqlalchemy.orm import Session
+from typing import Any, Optional, Union
+from sqlalchemy import bindparam, func, literal, or_, update
+from sqlalchemy.dialects.sqlite import insert
 
 from lib.base_classes.db_access_layer import DBAccessLayer
-
-from models.coin_base_data import CoinBaseData
-from models.coingecko_ratings import CoingeckoRatings
-from models.unprocessed_coingecko_links import UnprocessedCoingeckoLinks
+from coin_data_manager.coingecko.coingecko_config import CoingeckoConfig
 
 use_session = DBAccessLayer.use_session
 
@@ -21,8 +20,12 @@ class CoingeckoDBLayer(DBAccessLayer):
     Methods:
         save_stablecoins: Save stablecoin data to the database.
         save_base_data: Save base coin data to the database.
-        save_market_data: Save market data to the database.
+        save_market_data: Save market data to the database and append it to the market history.
+        rollup_market_history: Aggregate the complete buckets of a market history level.
+        prune_market_history: Delete market history past its retention.
+        get_market_history: Get the price and volume history of a coin at the coarsest level needed.
         save_extended_toplist_data: Save extended toplist data to the database.
+        get_refresh_candidates: Get the coins of the toplist with the age of their extended data and their rank change.
         save_coin_homepages: Save coin homepages to the database.
 
     Example Usage:
@@ -33,7 +36,7 @@ class CoingeckoDBLayer(DBAccessLayer):
     @use_session
     def save_stablecoins(self, stablecoins_data: list[dict[str, str]], session={}) -> None:
         """
-        Save stablecoin data to the database.
+        Save stablecoin data to the database, existing stablecoins are kept.
 
         Args:
             stablecoins_data (list[dict[str, str]]): A list of stablecoin data dictionaries.
@@ -42,17 +45,7 @@ class CoingeckoDBLayer(DBAccessLayer):
         Returns:
             None
         """
-        Stablecoin = self.models.Stablecoin
-
-        response = session.query(Stablecoin).all()
-
-        stablecoin_ids: list[str] = [stablecoin.coin_id for stablecoin in response]
-
-        for row_data in stablecoins_data:
-            if row_data["coin_id"] in stablecoin_ids:
-                continue
-
-            session.add(Stablecoin(**row_data))
+        self._bulk_upsert(session, self.models.Stablecoin, stablecoins_data, key='coin_id', update_columns=[])
 
     #
     #
@@ -72,171 +65,343 @@ class CoingeckoDBLayer(DBAccessLayer):
         """
         CoinBaseData = self.models.CoinBaseData
 
-        existing_data = self.get_full_table(CoinBaseData)
+        now = datetime.now()
 
-        existing_data_dict = {coin.coin_id: coin for coin in existing_data}
+        rows = [{**coin_row, 'date': now} for coin_row in coins_base_data]
 
-        for coin_row in coins_base_data:
-            coin_id = coin_row["coin_id"]
-            new_coin = coin_id not in existing_data_dict
+        self._bulk_upsert(session, CoinBaseData, rows, key='coin_id', where=CoinBaseData.date < now - timedelta(days=14))
 
-            if new_coin:
-                session.add(CoinBaseData(**coin_row))
+    #
+    #
+    #
 
-            else:
-                existing_coin = existing_data_dict[coin_id]
+    @use_session
+    def save_market_data(self, coins_market_data: list[dict[str, Union[str, int, float]]], session={}) -> None:
+        """
+        Save market data to the database, and append a snapshot of each coin to the market history.
 
-                current_date = datetime.now()
-                two_weeks = timedelta(days=14)
+        Market rows aren't fingerprinted, their prices and update time change on nearly every fetch.
 
-                update_after_2_weeks = current_date - existing_coin.date > two_weeks
+        Args:
+            coins_market_data (list[dict[str, Union[str, int, float]]]): A list of market data dictionaries.
+            session (Session, optional): An optional SQLAlchemy session. Defaults to an empty session, which is assigned by the decorator.
+
+        Returns:
+            None
+        """
+        m = self.models
 
-                if not update_after_2_weeks:
-                    continue
+        self._bulk_upsert(session, m.CoinMarketData, coins_market_data, key='coin_id')
 
-                for key, value in coin_row.items():
-                    setattr(existing_coin, key, value)
+        ts = int(time())
+
+        snapshots = [
+            {
+                'coin_id': coin_row['coin_id'],
+                'ts': ts,
+                'price': coin_row.get('current_price'),
+                'market_cap': coin_row.get('market_cap'),
+                'total_volume': coin_row.get('total_volume'),
+                'market_cap_rank': coin_row.get('market_cap_rank'),
+            }
+            for coin_row in coins_market_data
+        ]
+
+        if snapshots:
+            session.execute(insert(m.CoinMarketSnapshot.__table__), snapshots)
 
     #
     #
     #
 
     @use_session
-    def save_market_data(self, coins_market_data: list[dict[str, Union[str, int, float]]], session={}) -> None:
+    def rollup_market_history(self, bucket: str, bucket_sec: int, source: Optional[str] = None, now: Optional[int] = None, session={}) -> int:
         """
-        Save market data to the database.
+        Aggregate the complete buckets of a market history level which aren't rolled up yet.
+
+        Buckets are rolled up once they have ended, data arriving for a rolled up bucket is ignored. The rows are
+        streamed in (coin_id, ts) order, so memory grows with the buckets created rather than the rows read.
 
         Args:
-            coins_market_data (list[dict[str, Union[str, int, float]]]): A list of market data dictionaries.
+            bucket (str): The name of the level, e.g. 'day'.
+            bucket_sec (int): The length of a bucket in seconds, weeks start on Monday.
+            source (Optional[str]): The level aggregated, the raw snapshots if None.
+            now (Optional[int]): The current unix time, the current time if None.
             session (Session, optional): An optional SQLAlchemy session. Defaults to an empty session, which is assigned by the decorator.
 
         Returns:
-            None
+            int: The number of buckets created.
         """
-        CoinMarketData = self.models.CoinMarketData
+        m = self.models
+        Snapshot, Rollup = m.CoinMarketSnapshot, m.CoinMarketRollup
+
+        watermark = session.query(func.max(Rollup.ts)).filter(Rollup.bucket == bucket).scalar()
+
+        start = 0 if watermark is None else watermark + bucket_sec
+        end = self.__bucket_start(int(time()) if now is None else now, bucket_sec)
+
+        if start >= end:
+            return 0
+
+        if source is None:
+            columns = [Snapshot.coin_id, Snapshot.ts, Snapshot.price, Snapshot.price, Snapshot.price, Snapshot.price, Snapshot.total_volume, Snapshot.market_cap, literal(1)]
+            rows = session.query(*columns).filter(Snapshot.ts >= start, Snapshot.ts < end).order_by(Snapshot.coin_id, Snapshot.ts)
+
+        else:
+            columns = [Rollup.coin_id, Rollup.ts, Rollup.open, Rollup.high, Rollup.low, Rollup.close, Rollup.volume, Rollup.market_cap, Rollup.samples]
+            rows = session.query(*columns).filter(Rollup.bucket == source, Rollup.ts >= start, Rollup.ts < end).order_by(Rollup.coin_id, Rollup.ts)
+
+        rollups: list[dict[str, Any]] = []
+        current: Optional[dict[str, Any]] = None
+
+        for coin_id, ts, open_, high, low, close, volume, market_cap, samples in rows.yield_per(1000):
+            ts = self.__bucket_start(ts, bucket_sec)
+
+            if current is None or current['coin_id'] != coin_id or current['ts'] != ts:
+                if current is not None:
+                    rollups.append(self.__to_rollup(current))
+
+                current = {'coin_id': coin_id, 'bucket': bucket, 'ts': ts, 'open': None, 'high': None, 'low': None, 'close': None, 'volume_sum': 0.0, 'volume_samples': 0, 'market_cap': None, 'samples': 0}
+
+            if current['open'] is None:
+                current['open'] = open_
 
-        existing_data = session.query(CoinMarketData).all()
+            if high is not None:
+                current['high'] = high if current['high'] is None else max(current['high'], high)
 
-        existing_data_dict = {coin.coin_id: coin for coin in existing_data}
+            if low is not None:
+                current['low'] = low if current['low'] is None else min(current['low'], low)
 
-        for coin_row in coins_market_data:
-            coin_id = coin_row['coin_id']
+            if volume is not None:
+                current['volume_sum'] += volume * samples
+                current['volume_samples'] += samples
 
-            if coin_id in existing_data_dict:
-                existing_coin = existing_data_dict[coin_id]
+            current['close'] = close if close is not None else current['close']
+            current['market_cap'] = market_cap if market_cap is not None else current['market_cap']
+            current['samples'] += samples
 
-                for key, value in coin_row.items():
-                    setattr(existing_coin, key, value)
+        if current is not None:
+            rollups.append(self.__to_rollup(current))
 
-            else:
-                new_coin = CoinMarketData(**coin_row)
-                session.add(new_coin)
+        self._bulk_upsert(session, Rollup, rollups, key=['coin_id', 'bucket', 'ts'])
+
+        return len(rollups)
 
     #
     #
     #
 
     @use_session
-    def save_extended_toplist_data(self, extended_data: list[dict[str, Any]], session={}) -> None:
+    def prune_market_history(self, snapshot_retention_sec: int, levels: list[tuple[str, int, int]], now: Optional[int] = None, session={}) -> int:
         """
-        Save extended toplist data to the database.
+        Delete the snapshots and rollups past their retention.
 
         Args:
-            extended_data (list[dict[str, Any]]): A list of extended toplist data dictionaries.
+            snapshot_retention_sec (int): The time in seconds raw snapshots are kept.
+            levels (list[tuple[str, int, int]]): The rollup levels as (bucket, bucket_sec, retention_sec), kept forever with a retention of 0.
+            now (Optional[int]): The current unix time, the current time if None.
             session (Session, optional): An optional SQLAlchemy session. Defaults to an empty session, which is assigned by the decorator.
 
         Returns:
-            None
+            int: The number of rows deleted.
         """
         m = self.models
+        Snapshot, Rollup = m.CoinMarketSnapshot, m.CoinMarketRollup
+
+        now = int(time()) if now is None else now
+
+        deleted = session.query(Snapshot).filter(Snapshot.ts < now - snapshot_retention_sec).delete(synchronize_session=False)
 
-        existing_base_data = session.query(m.CoinBaseData).all()
-        existing_ratings = session.query(m.CoingeckoRatings).all()
-        existing_unprocessed_links = session.query(m.UnprocessedCoingeckoLinks).all()
+        for bucket, _, retention_sec in levels:
+            if retention_sec:
+                deleted += session.query(Rollup).filter(Rollup.bucket == bucket, Rollup.ts < now - retention_sec).delete(synchronize_session=False)
 
-        for coin_row in extended_data:
-            self.__save_categories(existing_base_data, coin_row['categories'])
-            self.__save_coingecko_ratings(session, existing_ratings, coin_row['ratings'])
-            self.__save_unprocessed_links(session, existing_unprocessed_links, coin_row['unprocessed_links'])
+        return deleted
+
+    #
+    #
+    #
+
+    @use_session
+    def get_market_history(self, coin_id: str, start: int, end: int, max_points: Optional[int] = None, session={}) -> list[dict[str, Any]]:
+        """
+        Get the price and volume history of a coin.
+
+        The finest level which still holds the start of the range and returns at most max_points rows is read, so
+        long ranges scan the daily or weekly rollups instead of the raw snapshots.
+
+        Args:
+            coin_id (str): The ID of the coin.
+            start (int): The unix time of the start of the range.
+            end (int): The unix time of the end of the range, exclusive.
+            max_points (Optional[int]): The maximum number of rows wanted, market_history_max_points of the config if None.
+            session (Session, optional): An optional SQLAlchemy session. Defaults to an empty session, which is assigned by the decorator.
+
+        Returns:
+            list[dict[str, Any]]: Rows of ts, open, high, low, close, volume and market_cap, ordered by ts.
+        """
+        m = self.models
+        Snapshot, Rollup = m.CoinMarketSnapshot, m.CoinMarketRollup
+
+        cfg = CoingeckoConfig
+        levels = cfg.market_history_levels
+        max_points = max_points or cfg.market_history_max_points
+
+        now = int(time())
+
+        def fits(bucket_sec: int, retention_sec: int) -> bool:
+            return (not retention_sec or start >= now - retention_sec) and (end - start) / bucket_sec <= max_points
+
+        if fits(levels[0][1], cfg.market_snapshot_retention_sec):
+            rows = (
+                session.query(Snapshot.ts, Snapshot.price, Snapshot.total_volume, Snapshot.market_cap)
+                .filter(Snapshot.coin_id == coin_id, Snapshot.ts >= start, Snapshot.ts < end)
+                .order_by(Snapshot.ts)
+            )
+
+            return [{'ts': ts, 'open': price, 'high': price, 'low': price, 'close': price, 'volume': volume, 'market_cap': market_cap} for ts, price, volume, market_cap in rows]
+
+        bucket, bucket_sec, _ = next((level for level in levels if fits(level[1], level[2])), levels[-1])
+
+        rows = (
+            session.query(Rollup.ts, Rollup.open, Rollup.high, Rollup.low, Rollup.close, Rollup.volume, Rollup.market_cap)
+            .filter(Rollup.coin_id == coin_id, Rollup.bucket == bucket, Rollup.ts >= self.__bucket_start(start, bucket_sec), Rollup.ts < end)
+            .order_by(Rollup.ts)
+        )
+
+        return [row._asdict() for row in rows]
 
     #
     #
     #
 
     @staticmethod
-    def __save_categories(existing_base_data: list[CoinBaseData], new_categories: dict[str, Any]) -> None:
+    #
+    def __to_rollup(bucket: dict[str, Any]) -> dict[str, Any]:
         """
-        Private helper method to save coin categories.
+        Private helper method to create the rollup row of an aggregated bucket.
 
         Args:
-            existing_base_data (list[CoinBaseData]): A list of existing base coin data.
-            new_categories (dict[str, Any]): A dictionary of new categories data.
+            bucket (dict[str, Any]): The aggregated bucket.
 
         Returns:
-            None
+            dict[str, Any]: The CoinMarketRollup row.
         """
-        existing_base_data_dict = {coin.coin_id: coin for coin in existing_base_data}
+        volume = bucket['volume_sum'] / bucket['volume_samples'] if bucket['volume_samples'] else None
+
+        return {
+            'coin_id': bucket['coin_id'],
+            'bucket': bucket['bucket'],
+            'ts': bucket['ts'],
+            'open': bucket['open'],
+            'high': bucket['high'],
+            'low': bucket['low'],
+            'close': bucket['close'],
+            'volume': volume,
+            'market_cap': bucket['market_cap'],
+            'samples': bucket['samples'],
+        }
 
-        coin_id = new_categories['coin_id']
-        existing_coin = existing_base_data_dict[coin_id]
+    #
+    #
+    #
 
-        if coin_id in existing_base_data_dict and not existing_coin.categories:
-            setattr(existing_coin, 'categories', new_categories['categories'])
+    @staticmethod
+    #
+    def __bucket_start(ts: int, bucket_sec: int) -> int:
+        """
+        Get the start of the bucket of a unix time, buckets are aligned to Monday 1970-01-05 so weeks start on Monday.
+        """
+        return ts - (ts - 4 * 24 * 3600) % bucket_sec
 
     #
     #
     #
 
-    def __save_coingecko_ratings(self, session: Session, existing_ratings: list[CoingeckoRatings], new_ratings: dict[str, Any]) -> None:
+    @use_session
+    def save_extended_toplist_data(self, extended_data: list[dict[str, Any]], session={}) -> None:
         """
-        Private helper method to save Coingecko ratings.
+        Save extended toplist data to the database, and record the refresh of each coin with its current rank.
+
+        Only new and changed ratings and unprocessed links are written, dated with the refresh. Categories are only
+        set on coins of the base data which have none yet.
 
         Args:
-            session (Session): SQLAlchemy session object.
-            existing_ratings (list[CoingeckoRatings]): A list of existing Coingecko ratings data.
-            new_ratings (dict[str, Any]): A dictionary of new Coingecko ratings data.
+            extended_data (list[dict[str, Any]]): A list of extended toplist data dictionaries.
+            session (Session, optional): An optional SQLAlchemy session. Defaults to an empty session, which is assigned by the decorator.
 
         Returns:
             None
         """
-        existing_ratings_dict = {coin.coin_id: coin for coin in existing_ratings}
+        m = self.models
 
-        coin_id = new_ratings['coin_id']
+        if not extended_data:
+            return
 
-        if coin_id in existing_ratings_dict:
-            existing_coin = existing_ratings_dict[coin_id]
+        now = datetime.now()
 
-            for key, value in new_ratings.items():
-                if key != 'coin_id':
-                    setattr(existing_coin, key, value)
+        coin_ids = [coin_row['ratings']['coin_id'] for coin_row in extended_data]
 
-        else:
-            new_coin = self.models.CoingeckoRatings(**new_ratings)
-            session.add(new_coin)
+        ranks = dict(session.query(m.CoinMarketData.coin_id, m.CoinMarketData.market_cap_rank).filter(m.CoinMarketData.coin_id.in_(coin_ids)).all())
+
+        base_data = m.CoinBaseData.__table__
+
+        session.execute(
+            update(base_data)
+            .where(base_data.c.coin_id == bindparam('b_coin_id'), or_(base_data.c.categories.is_(None), base_data.c.categories == ''))
+            .values(categories=bindparam('b_categories')),
+            [{'b_coin_id': coin_row['categories']['coin_id'], 'b_categories': coin_row['categories']['categories']} for coin_row in extended_data],
+        )
+
+        ratings = self._skip_unchanged(session, m.CoingeckoRatings, [coin_row['ratings'] for coin_row in extended_data])
+        links = self._skip_unchanged(session, m.UnprocessedCoingeckoLinks, [coin_row['unprocessed_links'] for coin_row in extended_data])
+
+        self._bulk_upsert(session, m.CoingeckoRatings, [{**row, 'date': now} for row in ratings], key='coin_id')
+        self._bulk_upsert(session, m.UnprocessedCoingeckoLinks, [{**row, 'date': now} for row in links], key='coin_id')
+
+        refresh_state = [{'coin_id': coin_id, 'refreshed_at': now, 'market_cap_rank': ranks.get(coin_id)} for coin_id in coin_ids]
+
+        self._bulk_upsert(session, m.CoinRefreshState, refresh_state, key='coin_id')
 
     #
     #
     #
 
-    def __save_unprocessed_links(self, session: Session, existing_unprocessed_links: list[UnprocessedCoingeckoLinks], new_unprocessed_links: dict[str, Any]) -> None:
+    @use_session
+    def get_refresh_candidates(self, session={}) -> list[dict[str, Any]]:
         """
-        Private helper method to save unprocessed links.
+        Get the coins of the toplist with the age of their extended data and their rank change.
 
         Args:
-            session (Session): SQLAlchemy session object.
-            existing_unprocessed_links (list[UnprocessedCoingeckoLinks]): A list of existing unprocessed links data.
-            new_unprocessed_links (dict[str, Any]): A dictionary of new unprocessed links data.
+            session (Session, optional): An optional SQLAlchemy session. Defaults to an empty session, which is assigned by the decorator.
 
         Returns:
-            None
+            list[dict[str, Any]]: Per coin its coin_id, its current market_cap_rank, the rank at its last refresh as
+                refreshed_rank, and refreshed_at, the date of its last refresh. Coins refreshed before the refresh state
+                was recorded are dated by their older ratings or unprocessed links row, None if either is missing.
         """
-        existing_unprocessed_links_dict = {coin.coin_id: coin for coin in existing_unprocessed_links}
+        m = self.models
+
+        ranks = dict(session.query(m.CoinMarketData.coin_id, m.CoinMarketData.market_cap_rank).all())
+        ratings_dates = dict(session.query(m.CoingeckoRatings.coin_id, m.CoingeckoRatings.date).all())
+        links_dates = dict(session.query(m.UnprocessedCoingeckoLinks.coin_id, m.UnprocessedCoingeckoLinks.date).all())
+        refresh_state = {coin_id: (refreshed_at, rank) for coin_id, refreshed_at, rank in session.query(m.CoinRefreshState.coin_id, m.CoinRefreshState.refreshed_at, m.CoinRefreshState.market_cap_rank)}
+
+        candidates = []
+
+        for (coin_id,) in session.query(m.CoinBaseData.coin_id).all():
+            dates = [ratings_dates.get(coin_id), links_dates.get(coin_id)]
+
+            refreshed_at, refreshed_rank = refresh_state.get(coin_id, (None if None in dates else min(dates), None))
 
-        coin_id = new_unprocessed_links['coin_id']
+            candidates.append({
+                'coin_id': coin_id,
+                'market_cap_rank': ranks.get(coin_id),
+                'refreshed_rank': refreshed_rank,
+                'refreshed_at': refreshed_at,
+            })
 
-        if coin_id not in existing_unprocessed_links_dict:
-            new_row = self.models.UnprocessedCoingeckoLinks(**new_unprocessed_links)
-            session.add(new_row)
+        return candidates
 
     #
     #
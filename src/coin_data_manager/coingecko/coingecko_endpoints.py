@@ -35,14 +35,17 @@ class CoingeckoEndpoints:
     #
     #
 
-    def create_toplist_endpoint(self) -> str:
+    def create_toplist_endpoint(self, page: int = 1) -> str:
         """
-        Create a URL for the toplist endpoint.
+        Create a URL for a page of the toplist endpoint.
+
+        Args:
+            page (int): The page number, starting at 1 (default: 1).
 
         Returns:
             str: The URL for the toplist endpoint based on the configuration settings.
         """
-        return f'https://api.coingecko.com/api/v3/coins/markets?vs_currency={self.query_params["currency"]}&order=market_cap_desc&per_page={self.query_params["toplist_len"]}&page=1&sparkline=false&price_change_percentage=1h%2C24h%2C7d%2C14d%2C30d%2C200d%2C1y&locale=en'
+        return f'https://api.coingecko.com/api/v3/coins/markets?vs_currency={self.query_params["currency"]}&order=market_cap_desc&per_page={self.query_params["toplist_len"]}&page={page}&sparkline=false&price_change_percentage=1h%2C24h%2C7d%2C14d%2C30d%2C200d%2C1y&locale=en'
 
     #
     #
@@ -1,9 +1,13 @@
-from typing import Union, Any
-import time
+from typing import Any, Optional
+from math import inf
+from heapq import nlargest
+from datetime import datetime
+from asyncio import as_completed, gather
 from lib.base_classes.routine import Routine
+from lib.base_classes.async_routine import AsyncRoutine
 
 
-use_run_interval = Routine.run_interval_decorator
+use_run_interval = AsyncRoutine.run_interval_decorator
 
 
 def coingecko_routines_factory(coingecko_instance) -> dict[str, Routine]:
@@ -29,6 +33,7 @@ def coingecko_routines_factory(coingecko_instance) -> dict[str, Routine]:
     routines['ToplistRoutine'] = ToplistRoutine(coingecko_instance)
     routines['ExtendedToplistRoutine'] = ExtendedToplistRoutine(coingecko_instance)
     routines['HomepageRoutine'] = HomepageRoutine(coingecko_instance)
+    routines['MarketHistoryRoutine'] = MarketHistoryRoutine(coingecko_instance)
 
     return routines
 
@@ -36,11 +41,12 @@ def coingecko_routines_factory(coingecko_instance) -> dict[str, Routine]:
 #
 
 
-class ToplistRoutine(Routine):
+class ToplistRoutine(AsyncRoutine):
     """
     Routine for fetching and processing top cryptocurrency data from the Coingecko API.
 
-    This routine fetches toplist data from the API, processes it, and saves it to the database.
+    This routine fetches toplist data from the API, processes it, and saves it to the database. The toplist pages are
+    requested concurrently under the shared rate limit of the API host, each page is filtered and saved as it arrives.
 
     Attributes:
         None
@@ -50,50 +56,92 @@ class ToplistRoutine(Routine):
 
     Example Usage:
         toplist_routine = ToplistRoutine(service, processor, db)
-        toplist_routine.run()
+        await toplist_routine.run()
     """
 
     @use_run_interval('1 hour')
-    def run(self, refetch_attempts: int = 4) -> None:
+    async def run(self, _) -> None:
         """
         Execute the routine to fetch and process top cryptocurrency data.
 
+        A failed page reschedules the run with the backoff of the routine's retry policy, the pages fetched are saved anyway.
+
         Args:
-            refetch_attempts (int): The number of refetch attempts in case of API failure (default: 4).
+            _ (Unused): Placeholder argument.
         """
         coingecko = self._service
+        db = self._db
 
-        endpoint = coingecko.endpoints.create_toplist_endpoint()
-        response = coingecko.fetch(endpoint)
-
-        if response:
-            c = self._cleaner
-            db = self._db
+        stablecoins = db.get_full_table(table=db.models.Stablecoin)
 
-            toplist = c.filter_coin_datapoints(coin_list=response, list_type='toplist')
+        pages = [self.__fetch_page(coingecko, page) for page in range(1, coingecko.config.toplist_pages + 1)]
 
-            stablecoins = db.get_full_table(table=db.models.Stablecoin)
+        failed_pages = 0
 
-            pure_toplist = c.filter_out_stablecoins(toplist, stablecoins)
+        for page in as_completed(pages):
+            response = await page
 
-            base_data, market_data = self._formatter.subdivide_toplist_data(pure_toplist)
+            if response is None:
+                failed_pages += 1
+                continue
 
-            db.save_base_data(base_data)
-            db.save_market_data(market_data)
+            self.__save_page(response, stablecoins)
 
+        if not failed_pages:
             self._log.success()
 
-        else:
-            self._refetch(self.run, self._refetch_timeout_sec, refetch_attempts)
+        elif not self._retry_later():
+            self._log.warn(f'fetch_failure: {failed_pages} of {len(pages)} toplist pages')
+
+    #
+    #
+    #
+
+    async def __fetch_page(self, coingecko, page: int) -> Optional[list[dict[str, Any]]]:
+        """
+        Fetch a page of the toplist.
+
+        Args:
+            coingecko (CoingeckoCoordinator): An instance of the CoingeckoCoordinator for API access.
+            page (int): The page number, starting at 1.
+
+        Returns:
+            Optional[list[dict[str, Any]]]: The coins of the page, empty past the end of the list, None if the fetch failed.
+        """
+        return await coingecko.fetch(coingecko.endpoints.create_toplist_endpoint(page))
+
+    #
+    #
+    #
+
+    def __save_page(self, response: list[dict[str, Any]], stablecoins: list) -> None:
+        """
+        Filter a page of the toplist and save its base and market data.
+
+        Args:
+            response (list[dict[str, Any]]): The coins of the page.
+            stablecoins (list[Stablecoin]): The stablecoins, which are left out.
+        """
+        c = self._cleaner
+        db = self._db
+
+        toplist = c.filter_coin_datapoints(coin_list=response, list_type='toplist')
+
+        pure_toplist = c.filter_out_stablecoins(toplist, stablecoins)
 
-            if refetch_attempts == 0:
-                self._log.warn('fetch_failure')
+        if not pure_toplist:
+            return
+
+        base_data, market_data = self._formatter.subdivide_toplist_data(pure_toplist)
+
+        db.save_base_data(base_data)
+        db.save_market_data(market_data)
 
 
 #
 
 
-class StablecoinsRoutine(Routine):
+class StablecoinsRoutine(AsyncRoutine):
     """
     Routine for fetching and processing stablecoins data from the Coingecko API.
 
@@ -107,42 +155,44 @@ class StablecoinsRoutine(Routine):
 
     Example Usage:
         stablecoins_routine = StablecoinsRoutine(service, db)
-        stablecoins_routine.run()
+        await stablecoins_routine.run()
     """
 
     @use_run_interval('3 days')
-    def run(self, refetch_attempts: int = 4) -> None:
+    async def run(self, _) -> None:
         """
         Execute the routine to fetch and process stablecoins data.
 
+        A failed fetch reschedules the run with the backoff of the routine's retry policy.
+
         Args:
-            refetch_attempts (int): The number of refetch attempts in case of API failure (default: 4).
+            _ (Unused): Placeholder argument.
         """
         coingecko = self._service
 
         endpoint = coingecko.endpoints.stablecoins_endpoint
-        response = coingecko.fetch(endpoint)
+        response = await coingecko.fetch(endpoint)
 
         if response:
             stablecoins_data = [{"coin_id": coin["id"]} for coin in response]
             self._db.save_stablecoins(stablecoins_data)
             self._log.success()
 
-        else:
-            self._refetch(self.run, self._refetch_timeout_sec, refetch_attempts)
-
-            if refetch_attempts == 0:
-                self._log.warn('fetch_failure')
+        elif not self._retry_later():
+            self._log.warn('fetch_failure')
 
 
 #
 
 
-class ExtendedToplistRoutine(Routine):
+class ExtendedToplistRoutine(AsyncRoutine):
     """
     Routine for fetching and processing extended toplist cryptocurrency data from the Coingecko API.
 
-    This routine fetches extended toplist data from the API, processes it, and saves it to the database.
+    This routine refreshes the extended data of the stalest coins, as many as the hourly request budget allows, and
+    saves them in batches. Coins are prioritized by the time since their last refresh, weighted by their rank change
+    since then, coins without extended data come first. Failed coins keep their priority, so
+    the whole toplist is covered over time.
 
     Attributes:
         None
@@ -152,77 +202,95 @@ class ExtendedToplistRoutine(Routine):
 
     Example Usage:
         extended_toplist_routine = ExtendedToplistRoutine(service, processor, db)
-        extended_toplist_routine.run()
+        await extended_toplist_routine.run()
     """
 
-    @use_run_interval('24 hours')
-    def run(self, _) -> None:
+    @use_run_interval('1 hour')
+    async def run(self, _) -> None:
         """
         Execute the routine to fetch and process extended toplist cryptocurrency data.
 
+        A run without any fetched coin is rescheduled with the backoff of the routine's retry policy.
+
         Args:
             _ (Unused): Placeholder argument.
         """
         coingecko = self._service
         db = self._db
+        cfg = coingecko.config
 
-        self._insufficient_data: bool = False
+        coin_ids = self.__prioritize(db.get_refresh_candidates(), cfg.extended_toplist_hourly_budget, cfg.extended_toplist_rank_change_weight)
 
-        result = db.get_full_table(db.models.CoinBaseData.coin_id)
-        coin_ids: list[str] = [coin.coin_id for coin in result]
+        batch_size = cfg.extended_toplist_batch_size
+        refreshed = 0
 
-        response = [self.__fetch_coin(coingecko, coin_id) for coin_id in coin_ids[0:10]]
+        for i in range(0, len(coin_ids), batch_size):
+            responses = await gather(*[coingecko.fetch(coingecko.endpoints.create_coin_data_endpoint(coin_id)) for coin_id in coin_ids[i : i + batch_size]])
 
-        if self._insufficient_data:
-            self._log.warn('insufficient')
+            response = [coin for coin in responses if coin]
 
-            return
+            if not response:
+                continue
 
-        extended_toplist = self._cleaner.filter_coin_datapoints(coin_list=response, list_type='extended_toplist')
+            extended_toplist = self._cleaner.filter_coin_datapoints(coin_list=response, list_type='extended_toplist')
 
-        seperated_coinlist = self._formatter.subdivide_extended_toplist_data(extended_toplist)
+            seperated_coinlist = self._formatter.subdivide_extended_toplist_data(extended_toplist)
 
-        db.save_extended_toplist_data(seperated_coinlist)
+            db.save_extended_toplist_data(seperated_coinlist)
 
-        self._log.success()
+            refreshed += len(response)
+
+        self._log.info(f'Unchanged rows skipped: {db.take_write_stats(db.models.CoingeckoRatings, db.models.UnprocessedCoingeckoLinks)}')
+
+        if refreshed or not coin_ids:
+            self._log.success(f'Refreshed the extended data of {refreshed} of {len(coin_ids)} coins.')
+
+        elif not self._retry_later():
+            self._log.warn('insufficient')
 
     #
     #
     #
 
-    def __fetch_coin(self, coingecko, coin_id: str, refetch_attempts: int = 4) -> dict[str, Union[dict[str, Any], dict]]:
+    @staticmethod
+    #
+    def __prioritize(candidates: list[dict[str, Any]], limit: int, rank_change_weight: float) -> list[str]:
         """
-        Fetches extended data for a specific coin from the Coingecko API.
+        Select the coins most in need of a refresh.
+
+        Coins without extended data come first by rank. The others are ordered by the time since their last refresh, multiplied
+        by 1 + rank_change_weight * |rank change| / current rank, so climbing and falling coins are refreshed sooner.
 
         Args:
-            coingecko (CoingeckoCoordinator): An instance of the CoingeckoCoordinator for API access.
-            coin_id (str): The ID of the coin to fetch data for.
-            refetch_attempts (int): The number of refetch attempts in case of API failure (default: 4).
+            candidates (list[dict[str, Any]]): The coins with their ranks and refresh date, see get_refresh_candidates.
+            limit (int): The maximum number of coins selected.
+            rank_change_weight (float): The weight of the relative rank change.
 
         Returns:
-            dict[str, Union[dict[str, Any], dict]]: The extended data for the specified coin.
-
-        Raises:
-            Exception: If the data cannot be fetched after all refetch attempts.
+            list[str]: The IDs of the selected coins, highest priority first.
         """
-        response = coingecko.fetch(coingecko.endpoints.create_coin_data_endpoint(coin_id))
+        now = datetime.now()
 
-        if response:
-            time.sleep(coingecko.config.request_delay_time_seconds)
-            return response
+        def priority(coin: dict[str, Any]) -> tuple[bool, float, float]:
+            rank = coin['market_cap_rank']
 
-        elif refetch_attempts == 0:
-            self._insufficient_data = True
-            return {}
+            if coin['refreshed_at'] is None:
+                return True, 0, -(rank or inf)
 
-        else:
-            return self.__fetch_coin(coingecko, coin_id, refetch_attempts - 1)
+            age_sec = (now - coin['refreshed_at']).total_seconds()
+
+            if rank and coin['refreshed_rank']:
+                age_sec *= 1 + rank_change_weight * abs(rank - coin['refreshed_rank']) / rank
+
+            return False, age_sec, -(rank or inf)
+
+        return [coin['coin_id'] for coin in nlargest(limit, candidates, key=priority)]
 
 
 #
 
 
-class HomepageRoutine(Routine):
+class HomepageRoutine(AsyncRoutine):
     """
     Routine for extracting and saving coin homepages.
 
@@ -236,11 +304,11 @@ class HomepageRoutine(Routine):
 
     Example Usage:
         homepage_routine = HomepageRoutine(processor, db)
-        homepage_routine.run()
+        await homepage_routine.run()
     """
 
     @use_run_interval('2 days')
-    def run(self, _) -> None:
+    async def run(self, _) -> None:
         """
         Execute the routine to extract and save coin homepages.
 
@@ -261,3 +329,47 @@ class HomepageRoutine(Routine):
         db.save_coin_homepages(coin_homepages)
 
         self._log.success()
+
+
+#
+
+
+class MarketHistoryRoutine(AsyncRoutine):
+    """
+    Routine for rolling up and pruning the market history.
+
+    This routine aggregates the raw market snapshots into hourly buckets, those into daily and weekly buckets, and
+    deletes snapshots and rollups past their retention.
+
+    Attributes:
+        None
+
+    Methods:
+        run: Executes the routine, rolling up and pruning the market history.
+
+    Example Usage:
+        market_history_routine = MarketHistoryRoutine(service)
+        await market_history_routine.run()
+    """
+
+    @use_run_interval('1 hour')
+    async def run(self, _) -> None:
+        """
+        Execute the routine to roll up and prune the market history.
+
+        Args:
+            _ (Unused): Placeholder argument.
+        """
+        db = self._db
+        cfg = self._service.config
+
+        created = {}
+        source = None
+
+        for bucket, bucket_sec, _ in cfg.market_history_levels:
+            created[bucket] = db.rollup_market_history(bucket, bucket_sec, source=source)
+            source = bucket
+
+        deleted = db.prune_market_history(cfg.market_snapshot_retention_sec, cfg.market_history_levels)
+
+        self._log.success(f'Rolled up market history buckets {created}, pruned {deleted} rows.')
@@ -4,8 +4,20 @@ from lib.base_classes.config import Config
 class SocialLinksConfig(Config):
     """
     Configuration settings needed for Social Links service operations.
+
+    Attributes:
+        social_links_workers (int): The number of concurrent workers draining the Social Links job queue.
+        social_links_batch_size (int): The number of coins' social links saved at once.
+        service_base_url (dict[str, list[str]]): Root urls for social media platforms.
     """
 
+    social_links_workers: int = 2
+    social_links_batch_size: int = 10
+
+    #
+    #
+    #
+
     @staticmethod
     #
     def create_google_search_url(coin_id: str, platform: str) -> str:
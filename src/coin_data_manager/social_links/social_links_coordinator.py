@@ -11,6 +11,7 @@ from coin_data_manager.social_links.social_links_routine import SocialLinksRouti
 from coin_data_manager.social_links.social_links_config import SocialLinksConfig
 
 from db.db import Database
+from lib.job_queue import JobQueue
 
 
 class SocialLinksCoordinator(ServiceCoordinator):
@@ -21,28 +22,32 @@ class SocialLinksCoordinator(ServiceCoordinator):
 
     Attributes:
         db (SocialLinksDBOperations): An instance of SocialLinksDBOperations for database operations.
+        jobs (JobQueue): An instance of JobQueue for queueing the social links scrape jobs.
         config (SocialLinksConfig): An instance of SocialLinksConfig for configuration settings.
         formatter (SocialLinksDataProcessor): An instance of SocialLinksDataFormatter for data formatting.
         finder (SocialLinksDataFinder): An instance of SocialLinksDataFinder for data finding data.
         validator (SocialLinksDataValidator): An instance of SocialLinksDataValidator for data validation.
         routines (dict[str, SocialLinksRoutine]): A dictionary mapping routine names to their corresponding routine instances.
         scrape (Callable): A Callable function for scraping data from a URL.
-        _routine_interval_sec (int): The interval in seconds between routine executions.
+        fetch_page (Callable): A Callable function for scraping a page which may need a browser to render.
         _task (None): A placeholder for the asynchronous task associated with the routine.
 
     Methods:
         __init__: Initializes the SocialLinksCoordinator instance.
     """
 
-    def __init__(self, database: Database, scrape_url: Callable) -> None:
+    def __init__(self, database: Database, scrape_url: Callable, fetch_page: Callable, shards=None) -> None:
         """
         Constructor for initializing the SocialLinksCoordinator.
 
         Args:
             database (Database): An instance of the Database class for database operations.
             scrape_url (Callable): A Callable function for scraping data from a URL.
+            fetch_page (Callable): A Callable function for scraping a page, escalating to a browser if plain HTTP returns nothing.
+            shards (Optional[ShardLeaseManager]): The worker's shard leases, used to split the job queue between worker processes.
         """
         self.db = SocialLinksDBLayer(database)
+        self.jobs = JobQueue(database, shards)
         self.config = SocialLinksConfig()
 
         self.formatter = SocialLinksDataFormatter()
@@ -50,8 +55,7 @@ class SocialLinksCoordinator(ServiceCoordinator):
         self.validator = SocialLinksDataValidator()
 
         self.scrape = scrape_url
-
-        self._routine_interval_sec = self.config.routine_intervals_hours['12 min'] * 360
+        self.fetch_page = fetch_page
 
         self._task = None
 
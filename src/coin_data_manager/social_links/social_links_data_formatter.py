@@ -6,30 +6,9 @@ class SocialLinksDataFormatter(DataFormatter):
     Data formatter class to support social links service operations with utility functions for data formatting.
 
     Methods:
-        format_links_update: Formats social media links for update in the database.
         format_platform_url: Formats the platform URL.
     """
 
-    @staticmethod
-    #
-    def format_links_update(links):
-        """
-        Formats social media links for update in the database.
-
-        Args:
-            links: Social media links.
-
-        Returns:
-            list: A list of dictionaries containing formatted links.
-        """
-        formatted_links = [{'coin_id': key, **value} for key, value in links.items()]
-
-        return formatted_links
-
-    #
-    #
-    #
-
     @staticmethod
     #
     def format_platform_url(platform: str, url: str) -> str:
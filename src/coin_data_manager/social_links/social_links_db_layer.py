@@ -1,7 +1,36 @@
+from typing import Any
 from lib.base_classes.db_access_layer import DBAccessLayer
 
 use_session = DBAccessLayer.use_session
 
 
 class SocialLinksDBLayer(DBAccessLayer):
-    pass
+    """
+    SocialLinksDBLayer is responsible for database operations related to the social links routine data.
+
+    Methods:
+        save_social_links: Save social media links of coins to the database.
+    """
+
+    @use_session
+    def save_social_links(self, table_rows: list[dict[str, Any]], session={}) -> None:
+        """
+        Save social media links of coins to the database. Coins which already have saved links are skipped.
+
+        Args:
+            table_rows (list[dict[str, Any]]): A list of dictionaries representing the data to be saved.
+            session (Session, optional): An optional SQLAlchemy session. Defaults to an empty session, which is assigned by the decorator.
+
+        Returns:
+            None
+        """
+        table = self.models.CoinSocialMediaLinks
+
+        coin_ids = [row['coin_id'] for row in table_rows]
+
+        existing_links = session.query(table.coin_id).filter(table.coin_id.in_(coin_ids)).all()
+        existing_coin_ids = {row.coin_id for row in existing_links}
+
+        for row in table_rows:
+            if row['coin_id'] not in existing_coin_ids:
+                session.add(table(**row))
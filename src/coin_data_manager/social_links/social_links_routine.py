@@ -1,34 +1,48 @@
-from typing import Any, Union, Callable
-import time
-from bs4 import BeautifulSoup
+from typing import Any, Optional
+from datetime import datetime, timedelta
+from bs4 import BeautifulSoup, SoupStrainer
 
-from lib.base_classes.routine import Routine
+from lib.base_classes.async_routine import AsyncRoutine
+from lib.job_worker_pool import JobWorkerPool
 
 
-use_run_interval = Routine.run_interval_decorator
+use_run_interval = AsyncRoutine.run_interval_decorator
 
 
-class SocialLinksRoutine(Routine):
+class SocialLinksRoutine(AsyncRoutine):
     """
     Social Links Routine for scraping and updating social media links of coins.
 
     This routine scrapes and updates social media links for coins, completing missing links and validating existing ones.
 
+    Every coin without saved social links is enqueued as a job in the 'social_links' job queue, which is drained by a pool
+    of async workers. A failed scrape only reschedules the job of that coin. In worker mode every worker process
+    drains the jobs of its own shards.
+
     Methods:
         run: Executes the routine, scraping and updating social media links.
 
     Private Methods:
-        __scrape_missing_links: Scrapes and updates missing social media links for coins.
+        __enqueue_jobs: Enqueues a job for each coin with new social media links.
+        __process_job: Job handler, scrapes and completes the social media links of a single coin.
         __find_social_media_links: Finds social media links on a coin's homepage.
         __google_search_link: Performs a Google search for a specific platform link.
-        __rescrape_link: Retries a scraping job in case of failure.
 
     Attributes:
-        __scrape: A Callable function for scraping data from a URL.
+        __scrape: A coroutine function for scraping data from a URL.
+        __fetch_page: A coroutine function for scraping homepages, rendered in a browser if they need JS.
     """
 
+    __queue_name: str = 'social_links'
+
+    # Homepages are only searched for links and search pages for their result list, the rest isn't parsed.
+    __homepage_strainer = SoupStrainer('a', href=True)
+    __search_strainer = SoupStrainer('div', id='rso')
+
+    _sharded: bool = True
+
     @use_run_interval('2 days')
-    def run(self, _):
+    async def run(self, _):
         """
         Execute the routine to scrape and update social media links.
 
@@ -36,77 +50,119 @@ class SocialLinksRoutine(Routine):
             _: Placeholder argument (not used).
         """
         self.__scrape = self._service.scrape
+        self.__fetch_page = self._service.fetch_page
+
+        cfg = self._config
         db = self._db
+        jobs = self._service.jobs
+
+        # Jobs created in the first half of the run interval belong to the current, possibly interrupted, pass.
+        run_interval = timedelta(hours=self._routine_intervals_hours[self.run.interval_time])
+        jobs.purge(self.__queue_name, created_before=datetime.now() - run_interval / 2)
 
-        social_links_table = db.models.CoinSocialMediaLinks
+        self.__enqueue_jobs()
 
-        existing_links = db.get_full_table(social_links_table)
+        self._log.info(f'Job queue depth: {jobs.depth(self.__queue_name)}')
+
+        pool = JobWorkerPool(
+            jobs,
+            self.__queue_name,
+            handler=self.__process_job,
+            save_results=db.save_social_links,
+            workers=cfg.social_links_workers,
+            batch_size=cfg.social_links_batch_size,
+            retry_policy=self._job_retry_policy,
+            lease_sec=cfg.job_lease_sec,
+        )
+
+        stats = await pool.drain()
+
+        self._log.info(f'Jobs processed: {stats}')
+        self._log.success()
+
+    #
+    #
+    #
+
+    def __enqueue_jobs(self) -> None:
+        """
+        Enqueues a job for each coin with new social media links, along with the coin's homepage URL.
+        """
+        db = self._db
+
+        existing_links = db.get_full_table(db.models.CoinSocialMediaLinks)
         existing_links_dict = self._formatter.to_table_by_coin_id_index(existing_links)
 
         unprocessed_socials = db.get_full_table(db.models.UnprocessedCoingeckoLinks)
 
         new_links = self._finder.extract_new_links(existing_links_dict, unprocessed_socials)
 
-        complete_links = self.__scrape_missing_links(new_links)
+        existing_homepages = db.get_full_table(db.models.CoinHomepageLink)
+        existing_homepages_index = self._formatter.to_table_by_coin_id_index(existing_homepages)
 
-        db.save_table_data(table=social_links_table, table_rows=complete_links)
+        new_jobs = []
 
-        self._log.success()
+        for coin_id, coin_links in new_links.items():
+            if not coin_links:
+                continue
+
+            homepage = existing_homepages_index[coin_id].homepage_url if coin_id in existing_homepages_index else None
+
+            payload = {'coin_id': coin_id, 'homepage': homepage, 'links': coin_links}
+            new_jobs.append({'job_key': coin_id, 'payload': payload})
+
+        self._service.jobs.enqueue(self.__queue_name, new_jobs)
 
     #
     #
     #
 
-    def __scrape_missing_links(self, new_links: dict[str, dict[str, str]], rescrape_attempts: int = 4) -> list[dict]:
+    async def __process_job(self, payload: dict[str, Any]) -> Optional[dict[str, str]]:
         """
-        Scrapes and updates missing social media links for coins.
+        Job handler, scrapes the coin's homepage and completes its missing social media links.
+
+        Coins without a known homepage are completed from Google search results only.
 
         Args:
-            new_links (dict[str, dict[str, str]]): A dictionary of new social media links.
-            rescrape_attempts (int): The number of rescrape attempts in case of scraping failure (default: 4).
+            payload (dict[str, Any]): The job payload with the coin ID, homepage URL and the coin's social media links.
 
         Returns:
-            list[dict]: A list of updated social media links.
+            Optional[dict[str, str]]: A social media links table row, None if a scrape failed.
         """
-        existing_homepages = self._db.get_full_table(self._db.models.CoinHomepageLink)
-
-        existing_homepages_index = self._formatter.to_table_by_coin_id_index(existing_homepages)
-
-        result_links = new_links
-        for coin_id, coin_links in new_links.items():
-            homepage = existing_homepages_index[coin_id].homepage_url if coin_id in existing_homepages_index else None
+        coin_id = payload['coin_id']
+        homepage = payload['homepage']
 
-            if not homepage:
-                continue
+        soup = None
 
-            soup = self.__scrape(homepage)
+        if homepage:
+            soup = await self.__fetch_page(homepage, parse_only=self.__homepage_strainer)
 
             if not soup:
-                error_msg = f'Failed to scrape {coin_id} homepage: {homepage}'
-
-                return self.__rescrape_link(job=self.__scrape_missing_links, job_params=[new_links], attempts=rescrape_attempts, error_msg=error_msg, return_val=[])
+                self._log.error(f'Failed to scrape {coin_id} homepage: {homepage}')
+                return None
 
-            updated_links = self.__find_social_media_links(coin_id, soup, coin_links)
+        updated_links = await self.__find_social_media_links(coin_id, soup, payload['links'])
 
-            result_links[coin_id] = updated_links
+        if updated_links is None:
+            return None
 
-        return self._formatter.format_links_update(result_links)
+        return {'coin_id': coin_id, **updated_links}
 
     #
     #
     #
 
-    def __find_social_media_links(self, coin_id: str, soup: BeautifulSoup, coin_links: dict[str, Any]) -> dict[str, str]:
+    async def __find_social_media_links(self, coin_id: str, soup: Optional[BeautifulSoup], coin_links: dict[str, Any]) -> Optional[dict[str, str]]:
         """
         Finds social media links on a coin's homepage.
 
         Args:
             coin_id (str): The ID of the coin.
-            soup (BeautifulSoup): A BeautifulSoup object representing the coin's homepage.
+            soup (Optional[BeautifulSoup]): A BeautifulSoup object representing the coin's homepage.
             coin_links (dict[str, Any]): A dictionary of coin's social media links.
 
         Returns:
-            dict[str, str]: A dictionary of updated social media links.
+            Optional[dict[str, str]]: A dictionary of updated social media links, None if a Google search failed.
         """
         updated_coin_links = coin_links
         del updated_coin_links['homepage']
@@ -123,7 +179,11 @@ class SocialLinksRoutine(Routine):
             invalid_link = True if missing_link else self._validator.validate_platform_url(platform, updated_coin_links[platform])
 
             if missing_link or invalid_link:
-                search_result = self.__google_search_link(coin_id, platform)
+                search_result = await self.__google_search_link(coin_id, platform)
+
+                if search_result is None:
+                    return None
+
                 updated_coin_links[platform] = search_result
 
             updated_coin_links[platform] = self._formatter.format_platform_url(platform, updated_coin_links[platform])
@@ -134,35 +194,28 @@ class SocialLinksRoutine(Routine):
     #
     #
 
-    def __google_search_link(self, coin_id: str, platform: str, rescrape_attempts: int = 4) -> Union[list[str], str]:
+    async def __google_search_link(self, coin_id: str, platform: str) -> Optional[str]:
         """
         Performs a Google search for a specific platform link.
 
         Args:
             coin_id (str): The ID of the coin.
             platform (str): The social media platform to search for.
-            rescrape_attempts (int): The number of rescrape attempts (default: 4).
 
         Returns:
-            Union[list[str], str]: A list of search results (if found) or an empty string.
+            Optional[str]: The first matching search result, an empty string if none matched, or None if the search failed.
         """
         cfg = self._config
 
         url = cfg.create_google_search_url(coin_id, platform)
 
-        soup = self.__scrape(url)
-
-        time.sleep(1)
-
-        error_msg = f'Failed to scrape google links for: {coin_id}, {platform}'
-
-        if not soup:
-            return self.__rescrape_link(job=self.__google_search_link, job_params=[coin_id, platform], attempts=rescrape_attempts, error_msg=error_msg, return_val='')
+        soup = await self.__scrape(url, parse_only=self.__search_strainer)
 
-        search_results = soup.find('div', id='rso')
+        search_results = soup.find('div', id='rso') if soup else None
 
         if not search_results:
-            return self.__rescrape_link(job=self.__google_search_link, job_params=[coin_id, platform], attempts=rescrape_attempts, error_msg=error_msg, return_val='')
+            self._log.error(f'Failed to scrape google links for: {coin_id}, {platform}')
+            return None
 
         for a in search_results.find_all('a'):
             href = a.get('href', '').lower()
@@ -171,29 +224,3 @@ class SocialLinksRoutine(Routine):
                 return href
 
         return ''
-
-    #
-    #
-    #
-
-    def __rescrape_link(self, job: Callable, job_params: list[Any], attempts: int, error_msg: str, return_val: Any):
-        """
-        Retries a scraping job in case of failure.
-
-        Args:
-            job (Callable): The job function to be retried.
-            job_params (list[Any]): List of job function parameters.
-            attempts (int): The number of retry attempts.
-            error_msg (str): Error message to log in case of repeated failure.
-            return_val (Any): Default return value.
-
-        Returns:
-            Any: The result of the job function or the default return value.
-        """
-        time.sleep(1)
-        if attempts > 0:
-            return job(*job_params, attempts - 1)
-
-        self._log.error(error_msg)
-
-        return return_val
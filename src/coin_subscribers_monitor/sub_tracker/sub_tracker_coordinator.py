@@ -10,6 +10,7 @@ from coin_subscribers_monitor.sub_tracker.sub_tracker_data_finder import SubTrac
 
 from db.db import Database
 from lib.twitter_api import TwitterAPI
+from lib.job_queue import JobQueue
 
 
 class SubTrackerCoordinator(ServiceCoordinator):
@@ -18,22 +19,23 @@ class SubTrackerCoordinator(ServiceCoordinator):
 
     Attributes:
         db (SubTrackerDBOperations): An instance of SubTrackerDBOperations for database operations.
+        jobs (JobQueue): An instance of JobQueue for queueing the subscriber count requests.
+        quarantine (Optional[LinkQuarantine]): The quarantine of failing links.
         config (SubscribersMonitorConfig): An instance of SubscribersMonitorConfig for configuration settings.
         formatter (SubTrackerFormatter): An instance of SubTrackerFormatter for data formatting.
         finder (SubTrackerFinder): An instance of SubTrackerFinder for data finding operations.
         twitter (TwitterAPI): An instance of TwitterAPI for Twitter-related operations.
-        scrape (Callable): A callable function for scraping data from a URL.
+        fetch_bytes (Callable): A callable function for fetching the raw page of a URL.
         fetch (Callable): A callable function for fetching data from an external source.
-        _routine_interval_sec (int): The interval in seconds for running routines.
         _task (None): A placeholder for task-related data (if needed).
 
     Methods:
-        __init__(self, database: Database, twitter_api: TwitterAPI, scrape: Callable, fetch: Callable) -> None:
+        __init__(self, database: Database, twitter_api: TwitterAPI, fetch_bytes: Callable, fetch: Callable, shards=None, quarantine=None) -> None:
             Constructor for initializing the SubtrackerCoordinator.
 
     """
 
-    def __init__(self, database: Database, twitter_api: TwitterAPI, scrape: Callable, fetch: Callable) -> None:
+    def __init__(self, database: Database, twitter_api: TwitterAPI, fetch_bytes: Callable, fetch: Callable, shards=None, quarantine=None) -> None:
         """
         Constructor for initializing the SubtrackerCoordinator.
 
@@ -41,20 +43,22 @@ class SubTrackerCoordinator(ServiceCoordinator):
             database (Database): An instance of the Database class for database operations.
             formatter: An instance of the DataFormatter class.
             twitter_api (TwitterAPI): An instance of TwitterAPI for Twitter-related operations.
-            scrape (Callable): A callable function for scraping data from a URL.
-            fetch (Callable): A callable function for fetching data from an external source.
+            fetch_bytes (Callable): A coroutine function for fetching the raw page of a URL.
+            fetch (Callable): A coroutine function for fetching data from an external source.
+            shards (Optional[ShardLeaseManager]): The worker's shard leases, used to split the job queue between worker processes.
+            quarantine (Optional[LinkQuarantine]): The quarantine of failing links, whose links are skipped until their recheck time.
         """
         self.db = SubTrackerDBLayer(database)
+        self.jobs = JobQueue(database, shards)
+        self.quarantine = quarantine
         self.config = SubscribersMonitorConfig()
 
-        self.finder = SubTrackerDataFinder()
+        self.finder = SubTrackerDataFinder(html_parser=self.config.html_parser, fast_path_bytes=self.config.sub_tracker_fast_path_bytes)
         self.formatter = SubTrackerDataFormatter()
 
         self.twitter = twitter_api
 
-        self.scrape = scrape
+        self.fetch_bytes = fetch_bytes
         self.fetch = fetch
 
-        self._routine_interval_sec = self.config.routine_intervals_hours['24 hours'] * 360
-
         self._task = None
@@ -1,7 +1,9 @@
 import re
-from typing import Union
+from typing import Optional, Union
+from bs4 import SoupStrainer
 
 from lib.base_classes.processors.data_finder import DataFinder
+from lib.scrapers.html_parser import HtmlParser
 
 from models.coin_links import CoinSocialMediaLinks
 
@@ -10,12 +12,44 @@ class SubTrackerDataFinder(DataFinder):
     """
     DataFinder class that provides ulitity methods for finding or extracting purposes for the SubTrackerRoutine.
 
+    Telegram and Discord counts are first searched in the raw page bytes with precompiled regexes, only reading the
+    first fast_path_bytes of the page. Only when the fast path misses, the page is parsed into a DOM, limited to the
+    elements holding the counts. The fast path hits and misses of each platform are counted.
+
+    Args:
+        html_parser (str): The HTML parser backend of the DOM fallback, 'lxml' or 'html.parser' (default: 'lxml').
+        fast_path_bytes (int): The number of leading page bytes searched by the fast path (default: 64 KB).
+
     Methods:
         get_coin_platforms: Extract social media platform URLs for a coin.
+        find_telegram_sub_count: Find the number of subscribers on a Telegram channel page.
+        find_discord_members_count: Find the number of members on a Discord invite page.
+        fast_path_stats: Get the fast path hit counters and hit rate of each platform.
         extract_discord_members_count: Extract the number of members from a Discord server description.
+        extract_telegram_sub_count: Extract the number of subscribers from a Telegram channel description.
         extract_twitter_accountname: Extract the Twitter account name from a Twitter URL.
     """
 
+    __telegram_pattern = re.compile(rb'<div class="[^"]*\btgme_page_extra\b[^"]*">([^<]+)<')
+    __discord_pattern = re.compile(rb'<meta\b[^>]*?\bcontent="([^"]*\bmembers\b[^"]*)"')
+
+    # The DOM fallback only parses the elements holding the counts. Strainers match the whole class attribute, hence the regex.
+    __telegram_strainer = SoupStrainer('div', class_=re.compile(r'\btgme_page_extra\b'))
+    __discord_strainer = SoupStrainer('meta', content=True)
+
+    def __init__(self, html_parser: str = 'lxml', fast_path_bytes: int = 64 * 1024) -> None:
+        """
+        Initialize the SubTrackerDataFinder.
+        """
+        self.__html_parser = HtmlParser(html_parser)
+        self.__fast_path_bytes = fast_path_bytes
+
+        self.__stats = {platform: {'hits': 0, 'misses': 0} for platform in ('telegram', 'discord')}
+
+    #
+    #
+    #
+
     @staticmethod
     #
     def get_coin_platforms(coin_socials: CoinSocialMediaLinks) -> dict[str, Union[str, None]]:
@@ -34,6 +68,121 @@ class SubTrackerDataFinder(DataFinder):
     #
     #
 
+    def find_telegram_sub_count(self, content: bytes) -> int:
+        """
+        Find the number of subscribers on a Telegram channel page.
+
+        Args:
+            content (bytes): The page HTML.
+
+        Returns:
+            int: The number of subscribers, 0 if the page has none.
+        """
+        match = self.__telegram_pattern.search(content, 0, self.__fast_path_bytes)
+
+        count = self.__try_extract(self.extract_telegram_sub_count, match.group(1)) if match else None
+
+        if self.__count_hit('telegram', count):
+            return count
+
+        soup = self.__html_parser.parse(content, self.__telegram_strainer)
+
+        for div in soup.find_all('div', class_='tgme_page_extra') if soup else []:
+            return self.extract_telegram_sub_count(div.text)
+
+        return 0
+
+    #
+    #
+    #
+
+    def find_discord_members_count(self, content: bytes) -> int:
+        """
+        Find the number of members on a Discord invite page.
+
+        Args:
+            content (bytes): The page HTML.
+
+        Returns:
+            int: The number of members, 0 if the page has none.
+        """
+        match = self.__discord_pattern.search(content, 0, self.__fast_path_bytes)
+
+        count = self.__try_extract(self.extract_discord_members_count, match.group(1)) if match else None
+
+        if self.__count_hit('discord', count):
+            return count
+
+        soup = self.__html_parser.parse(content, self.__discord_strainer)
+
+        for tag in soup.find_all('meta') if soup else []:
+            if 'members' in tag['content']:
+                return self.extract_discord_members_count(tag['content'])
+
+        return 0
+
+    #
+    #
+    #
+
+    def fast_path_stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get the fast path hit counters of each platform since the finder was created.
+
+        Returns:
+            dict[str, dict[str, float]]: The hits, misses and hit rate of each platform.
+        """
+        return {platform: {**stats, 'hit_rate': round(stats['hits'] / max(stats['hits'] + stats['misses'], 1), 3)} for platform, stats in self.__stats.items()}
+
+    #
+    #
+    #
+
+    def __count_hit(self, platform: str, count: Optional[int]) -> bool:
+        """
+        Count a fast path hit or miss of a platform.
+
+        Args:
+            platform (str): The platform name.
+            count (Optional[int]): The count found by the fast path, None if it missed.
+
+        Returns:
+            bool: True if the fast path hit.
+        """
+        hit = count is not None
+
+        self.__stats[platform]['hits' if hit else 'misses'] += 1
+
+        return hit
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __try_extract(extract, raw: bytes) -> Optional[int]:
+        """
+        Extract a count from the raw bytes matched by a fast path regex.
+
+        Args:
+            extract (Callable[[str], int]): The extractor of the DOM path, given the decoded text.
+            raw (bytes): The matched bytes.
+
+        Returns:
+            Optional[int]: The count, None if the text holds no count, e.g. because it contains entities, which is
+                left to the DOM fallback to confirm.
+        """
+        try:
+            return extract(raw.decode('utf-8', 'replace')) or None
+
+        except ValueError:
+            return None
+
+    #
+    #
+    #
+
     @staticmethod
     #
     def extract_discord_members_count(input_string: str) -> int:
@@ -1,5 +1,4 @@
 from typing import Any
-from datetime import datetime
 from lib.base_classes.db_access_layer import DBAccessLayer
 
 use_session = DBAccessLayer.use_session
@@ -22,11 +21,11 @@ class SubTrackerDBLayer(DBAccessLayer):
         Returns:
             None
         """
-        today = datetime.now().date()
-
         table = self.models.CoinSocialMediaSubs
 
-        subs = self.get_filtered_table(table, filter_condition=table.date == today)
+        row_ids = [row['id'] for row in table_rows]
+
+        subs = self.get_filtered_table(table, filter_condition=table.id.in_(row_ids))
 
         subs_dict = {row.id: row for row in subs}
 
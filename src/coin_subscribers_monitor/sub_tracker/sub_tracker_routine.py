@@ -1,31 +1,45 @@
-import time
-from lib.base_classes.routine import Routine
-from models.coin_links import CoinSocialMediaLinks
+from typing import Any, Optional
+from asyncio import to_thread
+from datetime import datetime, timedelta
+from lib.base_classes.async_routine import AsyncRoutine
+from lib.job_worker_pool import JobWorkerPool
 
-use_run_interval = Routine.run_interval_decorator
+use_run_interval = AsyncRoutine.run_interval_decorator
 
 
-class SubTrackerRoutine(Routine):
+class SubTrackerRoutine(AsyncRoutine):
     """
     SubTrackerRoutine is a routine for tracking social media subscribers of cryptocurrency coins.
 
+    Every (coin, platform) pair with a link is enqueued as a job in the 'sub_tracker' job queue, which is drained by
+    a pool of async workers. Counts are saved in batches as jobs finish, so an interrupted run resumes with the
+    unfinished jobs instead of starting over. In worker mode every worker process drains the jobs of its own shards.
+
     Methods:
         run: Executes the routine for tracking coin subscribers for different social media platforms.
 
     Private Methods:
-        __get_sub_data: Retrieve social media subscriber data for each coin.
-        __get_coin_subs: Retrieve subscriber counts for each platform associated with a coin.
+        __enqueue_jobs: Enqueue a job for each coin platform with a link, save zero counts for platforms without one.
+        __process_job: Job handler, retrieves the subscriber count of a single coin platform.
+        __save_subs: Save a batch of subscriber counts.
         __get_platform_subs:  Retrieve subscriber count for a specific social media platform.
-        __handle_failed_request: __handle_failed_request
+        __request_url: Get the URL requested for the subscriber count of a platform link.
 
     Attributes:
-        __scrape: Scrapes a given website url and returns the html data.
-        __fetch: Fetches JSON data from a given web API url.
+        __fetch_bytes: Coroutine function, fetches the raw page of a given website url.
+        __fetch: Coroutine function, fetches JSON data from a given web API url.
         __get_twitter_user_followers_count: Retrieves follower count for a twitter user.
     """
 
+    __queue_name: str = 'sub_tracker'
+
+    # Discord's member count is in the meta tags of the head, the rest of the page isn't downloaded.
+    __discord_stop_at: bytes = b'</head>'
+
+    _sharded: bool = True
+
     @use_run_interval('24 hours')
-    def run(self, _):
+    async def run(self, _):
         """
         The main routine function for running the SubTracker routine.
 
@@ -35,93 +49,156 @@ class SubTrackerRoutine(Routine):
         Returns:
             None
         """
-        db = self._db
+        cfg = self._config
+        jobs = self._service.jobs
 
-        self.__scrape = self._service.scrape
+        self.__fetch_bytes = self._service.fetch_bytes
         self.__fetch = self._service.fetch
         self.__get_twitter_user_followers_count = self._service.twitter.get_user_followers_count
 
-        result = self.__get_sub_data()
-        rows = self._formatter.to_sub_table_rows(result)
+        # Jobs created in the first half of the run interval belong to the current, possibly interrupted, pass.
+        run_interval = timedelta(hours=self._routine_intervals_hours[self.run.interval_time])
+        jobs.purge(self.__queue_name, created_before=datetime.now() - run_interval / 2)
+
+        self.__enqueue_jobs()
 
-        db.save_subs_data(table_rows=rows)
+        self._log.info(f'Job queue depth: {jobs.depth(self.__queue_name)}')
 
+        pool = JobWorkerPool(
+            jobs,
+            self.__queue_name,
+            handler=self.__process_job,
+            save_results=self.__save_subs,
+            workers=cfg.sub_tracker_workers,
+            batch_size=cfg.sub_tracker_batch_size,
+            retry_policy=self._job_retry_policy,
+            lease_sec=cfg.job_lease_sec,
+        )
+
+        stats = await pool.drain()
+
+        self._log.info(f'Jobs processed: {stats}')
+        self._log.info(f'Count fast path: {self._finder.fast_path_stats()}')
         self._log.success()
 
     #
     #
     #
 
-    def __get_sub_data(self) -> dict[str, dict[str, int]]:
+    def __enqueue_jobs(self) -> None:
         """
-        Retrieve social media subscriber data for each coin.
+        Walk the social links table in coin ID order and enqueue a job for each coin platform with a link.
 
-        Returns:
-            dict: A dictionary containing coin IDs and their respective subscriber counts.
+        Platforms without a link are saved with a zero count right away, quarantined links are skipped until their recheck time.
         """
         db = self._db
+        table = db.models.CoinSocialMediaLinks
+
+        quarantine = self._service.quarantine
+
+        cursor = None
+        skipped = 0
 
-        socials = db.get_full_table(db.models.CoinSocialMediaLinks)
-        socials_dict = self._formatter.to_table_by_coin_id_index(socials)
+        while True:
+            socials = db.get_table_page(table, table.coin_id, after=cursor, limit=self._config.sub_tracker_batch_size)
 
-        result = {coin_id: self.__get_coin_subs(coin_socials) for coin_id, coin_socials in socials_dict.items()}
+            if not socials:
+                break
 
-        return result
+            new_jobs = []
+            missing_links = []
+
+            for coin_socials in socials:
+                platforms = self._finder.get_coin_platforms(coin_socials)
+
+                for platform, url in platforms.items():
+                    if not url:
+                        missing_links.append({'coin_id': coin_socials.coin_id, 'platform': platform, 'subscriber_count': 0})
+                        continue
+
+                    payload = {'coin_id': coin_socials.coin_id, 'platform': platform, 'url': url}
+                    new_jobs.append({'job_key': f'{coin_socials.coin_id}:{platform}', 'shard_key': coin_socials.coin_id, 'payload': payload})
+
+            if quarantine and new_jobs:
+                quarantined = quarantine.quarantined([self.__request_url(job['payload']['platform'], job['payload']['url']) for job in new_jobs])
+
+                new_jobs = [job for job in new_jobs if self.__request_url(job['payload']['platform'], job['payload']['url']) not in quarantined]
+                skipped += len(quarantined)
+
+            self._service.jobs.enqueue(self.__queue_name, new_jobs)
+            self.__save_subs(missing_links)
+
+            cursor = socials[-1].coin_id
+
+        if skipped:
+            self._log.info(f'Skipped {skipped} quarantined links')
 
     #
     #
     #
 
-    def __get_coin_subs(self, coin_socials: CoinSocialMediaLinks) -> dict[str, int]:
+    async def __process_job(self, payload: dict[str, str]) -> Optional[dict[str, Any]]:
         """
-        Retrieve subscriber counts for each platform associated with a coin.
+        Job handler, retrieves the subscriber count of a single coin platform.
 
         Args:
-            coin_socials (CoinSocialMediaLinks): Coin's social media links.
+            payload (dict[str, str]): The job payload with the coin ID, platform name and platform URL.
 
         Returns:
-            dict: A dictionary containing platform names and their respective subscriber counts.
+            Optional[dict[str, Any]]: The payload with the subscriber count, None if the request failed.
+        """
+        count = await self.__get_platform_subs(payload['platform'], payload['url'])
+
+        if count is None:
+            return None
+
+        return {**payload, 'subscriber_count': count}
+
+    #
+    #
+    #
+
+    def __save_subs(self, results: list[dict[str, Any]]) -> None:
         """
-        platforms = self._finder.get_coin_platforms(coin_socials)
+        Save a batch of subscriber counts.
 
-        coin_subs = {}
+        Args:
+            results (list[dict[str, Any]]): A list of job results with coin ID, platform name and subscriber count.
+        """
+        if not results:
+            return
+
+        sub_data: dict[str, dict[str, int]] = {}
 
-        for platform, url in platforms.items():
-            if not url:
-                coin_subs[platform] = 0
+        for result in results:
+            sub_data.setdefault(result['coin_id'], {})[result['platform']] = result['subscriber_count']
 
-            else:
-                coin_subs[platform] = self.__get_platform_subs(platform, url)
-                time.sleep(1)
+        rows = self._formatter.to_sub_table_rows(sub_data)
 
-        return coin_subs
+        self._db.save_subs_data(table_rows=rows)
 
     #
     #
     #
 
-    def __get_platform_subs(self, platform: str, url: str, request_attempts: int = 4) -> int:
+    async def __get_platform_subs(self, platform: str, url: str) -> Optional[int]:
         """
         Retrieve subscriber count for a specific social media platform.
 
         Args:
             platform (str): The social media platform name.
             url (str): The URL of the platform's profile or page.
-            request_attempts (int): The number of request attempts in case of failure.
 
         Returns:
-            int: The subscriber count for the platform.
+            Optional[int]: The subscriber count for the platform, None if the request failed.
         """
         f = self._finder
 
         if platform == 'reddit':
-            url_addon = 'about.json'
-            reddit_url = f'{url}{"" if url.endswith("/") else "/"}{url_addon}'
-
-            response = self.__fetch(reddit_url)
+            response = await self.__fetch(self.__request_url(platform, url))
 
             if not response:
-                return self.__handle_failed_request(platform, url, request_attempts)
+                return None
 
             subscribers_count = response['data']['subscribers']
 
@@ -129,40 +206,25 @@ class SubTrackerRoutine(Routine):
 
         elif platform == 'twitter':
             account_name = f.extract_twitter_accountname(url)
-            count = self.__get_twitter_user_followers_count(account_name)
-
-            # if not count:
-            #     return self.__handle_failed_request(platform, url, request_attempts)
+            count = await to_thread(self.__get_twitter_user_followers_count, account_name)
 
             return count
 
         elif platform == 'telegram':
-            time.sleep(1)
-
-            soup = self.__scrape(url)
-
-            if not soup:
-                return self.__handle_failed_request(platform, url, request_attempts)
+            content = await self.__fetch_bytes(url)
 
-            elements = soup.find_all('div', class_='tgme_page_extra')
+            if not content:
+                return None
 
-            for div in elements:
-                extracted_subscribers = f.extract_telegram_sub_count(div.text)
-                return extracted_subscribers
+            return f.find_telegram_sub_count(content)
 
         elif platform == 'discord':
-            soup = self.__scrape(url)
-
-            if not soup:
-                return self.__handle_failed_request(platform, url, request_attempts)
-
-            elements = soup.find_all('meta')
+            content = await self.__fetch_bytes(url, stop_at=self.__discord_stop_at)
 
-            for tag in elements:
-                is_valid_element = 'content' in tag.attrs and 'members' in tag['content']
+            if not content:
+                return None
 
-                if is_valid_element:
-                    return f.extract_discord_members_count(tag['content'])
+            return f.find_discord_members_count(content)
 
         return 0
 
@@ -170,22 +232,21 @@ class SubTrackerRoutine(Routine):
     #
     #
 
-    def __handle_failed_request(self, platform: str, url: str, attempts: int) -> int:
+    @staticmethod
+    #
+    def __request_url(platform: str, url: str) -> str:
         """
-        Handle failed platform request by retrying or returning zero after 4 attempts.
+        Get the URL requested for the subscriber count of a platform link.
 
         Args:
             platform (str): The social media platform name.
             url (str): The URL of the platform's profile or page.
-            attempts (int): The number of remaining retry attempts.
 
         Returns:
-            int: The subscriber count (zero if failed).
+            str: The requested URL, the about.json endpoint for reddit links and the link itself otherwise.
         """
-        while attempts > 0:
-            time.sleep(30)
-            return self.__get_platform_subs(platform, url, attempts - 1)
-
-        self._log.warn('fetch_failure')
+        if platform == 'reddit':
+            url_addon = 'about.json'
+            return f'{url}{"" if url.endswith("/") else "/"}{url_addon}'
 
-        return 0
+        return url
@@ -4,6 +4,14 @@ from lib.base_classes.config import Config
 class SubscribersMonitorConfig(Config):
     """
     Combined Configuration settings needed for TrendMonitor and  SubTracker service operations.
+
+    Attributes:
+        sub_tracker_batch_size (int): The number of subscriber counts saved at once by the SubTracker routine.
+        sub_tracker_workers (int): The number of concurrent workers draining the SubTracker job queue.
+        sub_tracker_fast_path_bytes (int): The number of leading page bytes searched for Telegram and Discord counts
+            before falling back to parsing the page.
     """
 
-    pass
+    sub_tracker_batch_size: int = 10
+    sub_tracker_workers: int = 4
+    sub_tracker_fast_path_bytes: int = 64 * 1024
@@ -26,19 +26,19 @@ class SubscribersMonitorCoordinator(ServiceCoordinator):
     Args:
         database (Database): An instance of the Database class for database operations.
         twitter_api (TwitterAPI): An instance of the TwitterAPI class for interacting with the Twitter API.
-        scrape (Callable): A callable function for web scraping operations.
+        fetch_bytes (Callable): A callable function for fetching raw web pages.
         fetch (Callable): A callable function for fetching data from web sources.
+        shards (Optional[ShardLeaseManager]): The worker's shard leases, used to split the job queue between worker processes.
+        quarantine (Optional[LinkQuarantine]): The quarantine of failing links, whose links are skipped until their recheck time.
     """
 
-    def __init__(self, database: Database, twitter_api: TwitterAPI, scrape: Callable, fetch: Callable) -> None:
+    def __init__(self, database: Database, twitter_api: TwitterAPI, fetch_bytes: Callable, fetch: Callable, shards=None, quarantine=None) -> None:
         """
         Initializes a new instance of SubscribersMonitorCoordinator.
         """
-        sub_tracker = SubTrackerCoordinator(database, twitter_api, scrape, fetch)
+        sub_tracker = SubTrackerCoordinator(database, twitter_api, fetch_bytes, fetch, shards, quarantine)
         trend_monitor = TrendMonitorCoordinator(database)
 
         self.config = SubscribersMonitorConfig()
 
         self.routines = {"SubTrackerRoutine": SubTrackerRoutine(service=sub_tracker), "TrendMonitorRoutine": TrendMonitorRoutine(service=trend_monitor)}
-
-        self._routine_interval_sec = self.config.routine_intervals_hours['15 min'] * 360
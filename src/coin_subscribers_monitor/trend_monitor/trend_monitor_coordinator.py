@@ -18,7 +18,6 @@ class TrendMonitorCoordinator(ServiceCoordinator):
         config (SubscribersMonitorConfig): An instance of SubscribersMonitorConfig for configuration settings.
         formatter (TrendMonitorFormatter): An instance of TrendMonitorFormatter for data formatting.
         processor (TrendMonitorProcessor): An instance of TrendMonitorProcessor for data finding operations.
-        _routine_interval_sec (int): The interval in seconds for running routines.
         _task (None): A placeholder for task-related data (if needed).
 
     Methods:
@@ -39,6 +38,4 @@ class TrendMonitorCoordinator(ServiceCoordinator):
         self.processor = TrendMonitorProcessor()
         self.formatter = TrendMonitorFormatter()
 
-        self._routine_interval_sec = self.config.routine_intervals_hours['24 hours'] * 360
-
         self._task = None
@@ -1,10 +1,10 @@
 from datetime import datetime
-from lib.base_classes.routine import Routine
+from lib.base_classes.async_routine import AsyncRoutine
 
-use_run_interval = Routine.run_interval_decorator
+use_run_interval = AsyncRoutine.run_interval_decorator
 
 
-class TrendMonitorRoutine(Routine):
+class TrendMonitorRoutine(AsyncRoutine):
     """
     TrendMonitorRoutine class is responsible for running routines to monitor and find trends in social media subscribers data for coins.
 
@@ -16,7 +16,7 @@ class TrendMonitorRoutine(Routine):
     """
 
     @use_run_interval('24 hours')
-    def run(self, _) -> None:
+    async def run(self, _) -> None:
         """
         The main routine function to find and save trends for coins social media subscribers.
 
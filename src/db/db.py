@@ -10,6 +10,14 @@ from models.unprocessed_coingecko_links import UnprocessedCoingeckoLinks
 from models.coin_social_media_subs import CoinSocialMediaSubs
 from models.coin_subscriber_trends import CoinSubscriberTrends
 from models.log_entry import LogEntry
+from models.routine_run_state import RoutineRunState
+from models.fetch_job import FetchJob
+from models.shard_lease import ShardLease, WorkerHeartbeat
+from models.quarantined_link import QuarantinedLink
+from models.domain_fetch_strategy import DomainFetchStrategy
+from models.coin_refresh_state import CoinRefreshState
+from models.coin_market_history import CoinMarketSnapshot, CoinMarketRollup
+from models.row_fingerprint import RowFingerprint
 
 
 class DatabaseModels:
@@ -29,6 +37,16 @@ class DatabaseModels:
         self.CoinSocialMediaSubs = CoinSocialMediaSubs
         self.CoinSubscriberTrends = CoinSubscriberTrends
         self.LogEntry = LogEntry
+        self.RoutineRunState = RoutineRunState
+        self.FetchJob = FetchJob
+        self.ShardLease = ShardLease
+        self.WorkerHeartbeat = WorkerHeartbeat
+        self.QuarantinedLink = QuarantinedLink
+        self.DomainFetchStrategy = DomainFetchStrategy
+        self.CoinRefreshState = CoinRefreshState
+        self.CoinMarketSnapshot = CoinMarketSnapshot
+        self.CoinMarketRollup = CoinMarketRollup
+        self.RowFingerprint = RowFingerprint
 
 
 #
@@ -54,7 +72,8 @@ class Database:
 
         Initializes the database connection and creates an instance of the `__DatabaseModels` class for accessing model classes.
         """
-        self.__engine = create_engine(f'sqlite://{self.__sqlite_db_path}', echo=False)
+        # Worker processes share the SQLite file, wait for locks instead of failing right away.
+        self.__engine = create_engine(f'sqlite://{self.__sqlite_db_path}', echo=False, connect_args={'timeout': 30})
 
         self.__models = DatabaseModels()
 
@@ -0,0 +1,40 @@
+from abc import abstractmethod
+
+from lib.base_classes.routine import Routine
+
+
+class AsyncRoutine(Routine):
+    """
+    Base class for routines whose run method is a coroutine.
+
+    Async routines await their fetch callables, so a long running routine doesn't block the event loop
+    shared by all service coordinators. Requests are throttled by the rate limiter of the fetch layer.
+
+    Methods:
+        - run(): Run the routine. Implementation is in child classes.
+        - restart(): Add routine to the list of active routine instances and run it.
+
+    Usage:
+        To create a custom async routine, subclass `AsyncRoutine` and implement the `run()` coroutine,
+        decorated with `AsyncRoutine.run_interval_decorator`.
+    """
+
+    @abstractmethod
+    async def run(self) -> None:
+        """
+        Implement in child classes
+
+        This coroutine should be overridden in child classes to define the behavior of the routine.
+        """
+        pass
+
+    #
+    #
+    #
+
+    async def restart(self) -> None:
+        """
+        Adds the routine to the list of active routine instances and awaits its execution.
+        """
+        self._service.add_routine(self)
+        await self.run()
@@ -5,12 +5,61 @@ class Config:
     """
     Configuration class that defines various constants and settings for the project.
 
-    This class includes configuration options such as routine intervals in hours and refetch timeout in seconds.
+    This class includes configuration options such as routine intervals in hours and retry policies.
 
     Attributes:
         routine_intervals_hours (dict[str, Union[int, float]]): A dictionary mapping routine intervals (e.g., '5 min')
             to their corresponding time in hours.
-        refetch_timeout_sec (int): The timeout in seconds used for refetching data.
+        routine_retry_max_attempts (int): The number of attempts of a failed routine run before it waits for its next interval.
+        routine_retry_base_delay_sec (int): The delay in seconds before a failed routine run is retried, doubled after every attempt.
+        routine_retry_max_delay_sec (int): The maximum delay in seconds before a failed routine run is retried.
+        routine_time_budget_sec (int): The default time budget in seconds of a routine run, overrunning runs are cancelled.
+        routine_time_budgets_sec (dict[str, int]): Time budgets in seconds of a routine run by routine name.
+        scheduler_jitter_sec (int): Upper bound in seconds of the random delay added to each routine's next run time.
+        job_max_attempts (int): The number of attempts before a queued job is marked as failed.
+        job_retry_delay_sec (int): The delay in seconds before a failed job is retried, doubled after every attempt.
+        job_retry_max_delay_sec (int): The maximum delay in seconds before a failed job is retried.
+        job_lease_sec (int): The time in seconds a worker holds a leased job before it can be leased by another worker.
+        shard_count (int): The number of shards the coin universe is split into for multi-worker execution.
+        shard_lease_sec (int): The time in seconds a worker holds its shards without a heartbeat before they get reassigned.
+        http_max_connections (int): The maximum number of HTTP connections per host.
+        http_max_keepalive_connections (int): The maximum number of idle keep-alive HTTP connections per host.
+        http_keepalive_expiry_sec (int): The time in seconds an idle HTTP connection is kept alive.
+        http_connect_timeout_sec (int): The timeout in seconds to establish an HTTP connection.
+        http_read_timeout_sec (int): The timeout in seconds between two chunks of an HTTP response.
+        http_request_deadline_sec (int): The total time budget in seconds of a single HTTP request attempt.
+        http2 (bool): Whether to negotiate HTTP/2 with hosts which support it.
+        html_parser (str): The HTML parser backend, 'lxml' or 'html.parser', html.parser is used if lxml isn't installed.
+        http_max_body_bytes (int): The maximum number of bytes read of an HTTP response body, longer bodies are truncated.
+        http_content_types (list[str]): The media types of HTTP responses whose body is downloaded, others are rejected.
+        http_retry_max_attempts (int): The number of attempts of a request failing with a retryable error.
+        http_retry_base_delay_sec (int): The delay in seconds before a failed request is retried, doubled after every attempt.
+        http_retry_max_delay_sec (int): The maximum delay in seconds before a failed request is retried.
+        http_retry_deadline_sec (int): The time budget in seconds of all attempts of a request.
+        default_host_rate (float): The maximum request rate per second of hosts without a rate in host_rates.
+        host_rates (dict[str, float]): Maximum request rates per second by host, lowered automatically when a host throttles.
+        http_coalesce_ttl_sec (int): The time in seconds the parsed result of a request is shared with requests for the same URL.
+        circuit_failure_threshold (int): The number of consecutive failed requests to a host which open its circuit.
+        circuit_cooldown_sec (int): The time in seconds requests to a host are rejected after its circuit opened, doubled while it keeps failing.
+        circuit_max_cooldown_sec (int): The maximum time in seconds a host's circuit stays open.
+        quarantine_threshold (int): The number of consecutive failed requests after which a link is quarantined.
+        quarantine_recheck_sec (int): The time in seconds until a quarantined link is requested again, doubled after every failed recheck.
+        quarantine_max_recheck_sec (int): The maximum time in seconds between rechecks of a quarantined link.
+        quarantine_exclude_patterns (list[str]): Regex patterns of URLs which are never quarantined, i.e. API endpoints.
+        http_cache_dir (str): The directory of the on-disk HTTP response cache.
+        http_cache_max_bytes (int): The maximum total size of the cached response bodies.
+        http_cache_ttls (list[tuple[str, int]]): Regex URL patterns with the time in seconds their responses are served
+            from the cache, the first match applies. Responses with a TTL of 0 are only revalidated, URLs matching no pattern are not cached.
+        browser_pool_size (int): The number of long-lived Playwright browsers.
+        browser_max_pages (int): The maximum number of browser pages open at once.
+        browser_context_max_uses (int): The number of pages after which a browser context is closed instead of reused.
+        browser_restart_after_uses (int): The number of pages after which a browser is restarted to free its memory.
+        browser_restart_after_sec (int): The age in seconds after which a browser is restarted.
+        browser_blocked_resource_types (list[str]): The Playwright resource types whose requests browser pages abort.
+        browser_blocked_domains (list[str]): The domains, including their subdomains, whose requests browser pages abort.
+        fetch_strategy_recheck_sec (int): The age in seconds after which a domain rendered in a browser is tried over plain HTTP again.
+        cookie_store_path (str): The JSON file of the persistent per-host cookie jars.
+        cookie_session_ttl_sec (int): The time in seconds cookies without an expiry date are kept.
 
     """
 
@@ -26,4 +75,102 @@ class Config:
         '3 days': 72,
     }
 
-    refetch_timeout_sec: int = 20
+    routine_retry_max_attempts: int = 4
+    routine_retry_base_delay_sec: int = 20
+    routine_retry_max_delay_sec: int = 600
+
+    routine_time_budget_sec: int = 3600
+    routine_time_budgets_sec: dict[str, int] = {
+        'ToplistRoutine': 600,
+        'StablecoinsRoutine': 600,
+        'HomepageRoutine': 600,
+        'MarketHistoryRoutine': 600,
+        'ExtendedToplistRoutine': 3600,
+        'SocialLinksRoutine': 20 * 3600,
+        'SubTrackerRoutine': 20 * 3600,
+    }
+
+    scheduler_jitter_sec: int = 30
+
+    job_max_attempts: int = 4
+    job_retry_delay_sec: int = 30
+    job_retry_max_delay_sec: int = 600
+    job_lease_sec: int = 300
+
+    shard_count: int = 16
+    shard_lease_sec: int = 60
+
+    http_max_connections: int = 10
+    http_max_keepalive_connections: int = 5
+    http_keepalive_expiry_sec: int = 30
+    http_connect_timeout_sec: int = 5
+    http_read_timeout_sec: int = 15
+    http_request_deadline_sec: int = 30
+    http2: bool = True
+    html_parser: str = 'lxml'
+    http_max_body_bytes: int = 5 * 1024**2
+    http_content_types: list[str] = ['text/html', 'application/xhtml+xml', 'application/json', 'text/plain']
+
+    http_retry_max_attempts: int = 3
+    http_retry_base_delay_sec: int = 1
+    http_retry_max_delay_sec: int = 10
+    http_retry_deadline_sec: int = 30
+
+    default_host_rate: float = 2
+    host_rates: dict[str, float] = {
+        'api.coingecko.com': 0.2,
+        'google.com': 0.5,
+        'reddit.com': 1,
+        't.me': 2,
+        'discord.com': 1,
+    }
+
+    http_coalesce_ttl_sec: int = 10
+
+    circuit_failure_threshold: int = 5
+    circuit_cooldown_sec: int = 60
+    circuit_max_cooldown_sec: int = 1800
+
+    quarantine_threshold: int = 3
+    quarantine_recheck_sec: int = 3600
+    quarantine_max_recheck_sec: int = 7 * 24 * 3600
+    quarantine_exclude_patterns: list[str] = [r'api\.coingecko\.com/', r'google\.com/search']
+
+    http_cache_dir: str = 'data/http_cache'
+    http_cache_max_bytes: int = 200 * 1024**2
+    http_cache_ttls: list[tuple[str, int]] = [
+        (r'api\.coingecko\.com/api/v3/coins/markets\?.*category=stablecoins', 24 * 3600),
+        (r'api\.coingecko\.com/api/v3/coins/markets\?', 0),
+        # Revalidated on every request, the extended toplist refresh stamps the coin data it saves as current.
+        (r'api\.coingecko\.com/api/v3/coins/', 0),
+        (r'api\.coingecko\.com/', 0),
+        (r'reddit\.com/', 0),
+        (r'//t\.me/', 0),
+        (r'//(www\.)?discord(app)?\.(com|gg)/', 0),
+        (r'//(www\.)?google\.com/search', 24 * 3600),
+        (r'.*', 24 * 3600),
+    ]
+
+    browser_pool_size: int = 2
+    browser_max_pages: int = 4
+    browser_context_max_uses: int = 20
+    browser_restart_after_uses: int = 500
+    browser_restart_after_sec: int = 3600
+    browser_blocked_resource_types: list[str] = ['image', 'media', 'font', 'stylesheet']
+    browser_blocked_domains: list[str] = [
+        'google-analytics.com',
+        'googletagmanager.com',
+        'googlesyndication.com',
+        'doubleclick.net',
+        'facebook.net',
+        'hotjar.com',
+        'segment.io',
+        'mixpanel.com',
+        'intercom.io',
+        'clarity.ms',
+    ]
+
+    fetch_strategy_recheck_sec: int = 7 * 24 * 3600
+
+    cookie_store_path: str = 'data/cookies.json'
+    cookie_session_ttl_sec: int = 24 * 3600
@@ -1,4 +1,8 @@
-from typing import Any, Callable
+import json
+from hashlib import blake2b
+from typing import Any, Callable, Optional, Union
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert
 
 from db.session_decorator import session_decorator
 
@@ -8,7 +12,8 @@ class DBAccessLayer:
     A utility class for common database operations with SQLAlchemy.
 
     This class provides methods to interact with database tables including fetching data, filtering data,
-    and saving data to a specified table.
+    saving and bulk upserting data to a specified table, skipping unchanged rows by their fingerprint, as well as
+    persisting the run state of routines.
 
     Attributes:
         use_session (Callable): A decorator function for database session management.
@@ -31,6 +36,8 @@ class DBAccessLayer:
         self.engine = db.engine
         self.models = db.models
 
+        self.__write_stats: dict[str, dict[str, int]] = {}
+
     #
     #
     #
@@ -78,6 +85,35 @@ class DBAccessLayer:
     #
     #
 
+    @use_session
+    def get_table_page(self, table, key_column, after: Optional[Any] = None, limit: int = 100, session={}) -> list[Any]:
+        """
+        Retrieve a page of rows from a specified database table, ordered by a unique key column (keyset pagination).
+
+        Args:
+            table: The database table class to fetch data from.
+            key_column: The unique column to order and paginate by, i.e. table.coin_id.
+            after: Only rows with a key greater than this cursor value are returned, None for the first page.
+            limit: The maximum number of rows in the page.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            list[Any]: A list of rows, empty when there are no more rows after the cursor.
+
+        """
+        query = session.query(table)
+
+        if after is not None:
+            query = query.filter(key_column > after)
+
+        response = query.order_by(key_column).limit(limit).all()
+
+        return response
+
+    #
+    #
+    #
+
     @use_session
     def save_table_data(self, table, table_rows: list[dict[str, Any]], session={}) -> None:
         """
@@ -91,3 +127,247 @@ class DBAccessLayer:
         """
         for row_data in table_rows:
             session.add(table(**row_data))
+
+    #
+    #
+    #
+
+    @use_session
+    def bulk_upsert(
+        self,
+        table,
+        rows: list[dict[str, Any]],
+        key: Union[str, list[str]],
+        update_columns: Optional[list[str]] = None,
+        where=None,
+        batch_size: int = 500,
+        session={},
+    ) -> None:
+        """
+        Insert rows into a table, updating the rows whose key already exists.
+
+        See _bulk_upsert, which runs the upsert in the session of the calling method.
+
+        Args:
+            table: The database table class to upsert into.
+            rows: A list of dictionaries containing data for each row.
+            key: The primary key or unique column(s) a conflict is detected on.
+            update_columns: The columns updated on conflict, all columns of a row except the key if None, nothing if empty.
+            where: An optional condition an existing row must match to be updated.
+            batch_size: The number of rows per statement execution.
+            session: The database session (provided by the session_decorator).
+
+        """
+        self._bulk_upsert(session, table, rows, key, update_columns, where, batch_size)
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def _bulk_upsert(session, table, rows: list[dict[str, Any]], key: Union[str, list[str]], update_columns: Optional[list[str]] = None, where=None, batch_size: int = 500) -> None:
+        """
+        Insert rows into a table within a session, updating the rows whose key already exists.
+
+        A single INSERT ... ON CONFLICT DO UPDATE statement is compiled and executed with executemany per batch, so
+        writing thousands of rows is a few statement executions instead of loading, diffing and flushing ORM objects.
+        Column defaults apply to inserted rows, columns left out of a row aren't updated. Rows with different keys
+        are executed as separate groups, since an executemany binds the same parameters for every row.
+
+        Args:
+            session: The database session.
+            table: The database table class to upsert into.
+            rows: A list of dictionaries containing data for each row.
+            key: The primary key or unique column(s) a conflict is detected on.
+            update_columns: The columns updated on conflict, all columns of a row except the key if None, nothing if empty.
+            where: An optional condition an existing row must match to be updated.
+            batch_size: The number of rows per statement execution.
+
+        """
+        if not rows:
+            return
+
+        key = [key] if isinstance(key, str) else key
+
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(row)
+
+        for columns, group in groups.items():
+            updated = [column for column in columns if column not in key] if update_columns is None else update_columns
+
+            statement = insert(table.__table__)
+
+            if updated:
+                statement = statement.on_conflict_do_update(
+                    index_elements=key,
+                    set_={column: statement.excluded[column] for column in updated},
+                    where=where,
+                )
+
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=key)
+
+            for i in range(0, len(group), batch_size):
+                session.execute(statement, group[i : i + batch_size])
+
+    #
+    #
+    #
+
+    def _skip_unchanged(self, session, table, rows: list[dict[str, Any]], key: str = 'coin_id') -> list[dict[str, Any]]:
+        """
+        Filter out the rows whose content didn't change since they were last written, within a session.
+
+        A 64-bit hash of each row is kept in the row_fingerprints table. Rows whose hash matches the stored one are
+        skipped, the fingerprints of the others are updated in the same transaction as the caller's write, so the
+        caller must write every row returned. The written and skipped rows are counted per table, see take_write_stats.
+
+        Args:
+            session: The database session.
+            table: The database table class the rows are written to.
+            rows: A list of dictionaries containing data for each row, without values changing on every write, i.e. dates.
+            key: The unique column identifying a row.
+
+        Returns:
+            list[dict[str, Any]]: The new and changed rows.
+        """
+        if not rows:
+            return []
+
+        table_name = table.__tablename__
+        Fingerprint = self.models.RowFingerprint
+
+        hashes = {str(row[key]): self.__fingerprint(row) for row in rows}
+
+        stored = dict(
+            session.query(Fingerprint.row_key, Fingerprint.hash)
+            .filter(Fingerprint.table_name == table_name, Fingerprint.row_key.in_(list(hashes)))
+            .all()
+        )
+
+        changed = [row for row in rows if stored.get(str(row[key])) != hashes[str(row[key])]]
+
+        fingerprints = [{'table_name': table_name, 'row_key': str(row[key]), 'hash': hashes[str(row[key])]} for row in changed]
+
+        self._bulk_upsert(session, Fingerprint, fingerprints, key=['table_name', 'row_key'])
+
+        stats = self.__write_stats.setdefault(table_name, {'written': 0, 'skipped': 0})
+        stats['written'] += len(changed)
+        stats['skipped'] += len(rows) - len(changed)
+
+        return changed
+
+    #
+    #
+    #
+
+    def take_write_stats(self, *tables) -> dict[str, dict[str, Union[int, float]]]:
+        """
+        Get and reset the counters of written and skipped unchanged rows.
+
+        Args:
+            *tables: The database table classes to report, all tables if none are given.
+
+        Returns:
+            dict[str, dict[str, Union[int, float]]]: Per table name the rows written and skipped, and the skip ratio.
+        """
+        table_names = [table.__tablename__ for table in tables] or list(self.__write_stats)
+
+        report = {}
+
+        for table_name in table_names:
+            stats = self.__write_stats.pop(table_name, None)
+
+            if stats:
+                total = stats['written'] + stats['skipped']
+                report[table_name] = {**stats, 'skip_ratio': round(stats['skipped'] / total, 3) if total else 0.0}
+
+        return report
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __fingerprint(row: dict[str, Any]) -> int:
+        """
+        Get the signed 64-bit content hash of a row, independent of its key order.
+        """
+        content = json.dumps(row, sort_keys=True, default=str).encode('utf-8')
+
+        return int.from_bytes(blake2b(content, digest_size=8).digest(), 'big', signed=True)
+
+    #
+    #
+    #
+
+    @use_session
+    def get_routine_run_state(self, routine_name: str, session={}) -> Optional[Any]:
+        """
+        Retrieve the persisted run state of a routine.
+
+        Args:
+            routine_name: The class name of the routine.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            Optional[RoutineRunState]: The run state row, or None if the routine has never run.
+
+        """
+        return session.get(self.models.RoutineRunState, routine_name)
+
+    #
+    #
+    #
+
+    @use_session
+    def save_routine_start(self, routine_name: str, start: datetime, session={}) -> None:
+        """
+        Persist the start time of a routine run.
+
+        Args:
+            routine_name: The class name of the routine.
+            start: The start time of the run.
+            session: The database session (provided by the session_decorator).
+
+        """
+        table = self.models.RoutineRunState
+
+        state = session.get(table, routine_name)
+
+        if not state:
+            session.add(table(routine_name=routine_name, last_start=start))
+            return
+
+        state.last_start = start
+
+    #
+    #
+    #
+
+    @use_session
+    def save_routine_success(self, routine_name: str, success: datetime, duration_sec: float, session={}) -> None:
+        """
+        Persist the completion time and duration of a successful routine run.
+
+        Args:
+            routine_name: The class name of the routine.
+            success: The time the run completed.
+            duration_sec: The duration of the run in seconds.
+            session: The database session (provided by the session_decorator).
+
+        """
+        table = self.models.RoutineRunState
+
+        state = session.get(table, routine_name)
+
+        if not state:
+            session.add(table(routine_name=routine_name, last_success=success, duration_sec=duration_sec))
+            return
+
+        state.last_success = success
+        state.duration_sec = duration_sec
@@ -1,10 +1,11 @@
-from typing import Optional, Any, Callable, Union
+from typing import Callable, Union
 from abc import ABC, abstractmethod
-import time
 from functools import wraps
+from inspect import iscoroutinefunction
 from datetime import datetime
 
 from lib.logger import Logger
+from lib.retry_policy import RetryPolicy
 
 
 class Routine(ABC):
@@ -16,21 +17,27 @@ class Routine(ABC):
         service: Reference to the service associated with the routine.
         _routine_intervals_hours (List[Union[int, float]]): List of routine
         run/idle intervals in hours.
-        refetch_timeout_sec (int): Timeout duration for refetching routines.
-        update_timestamp (int): Timestamp of the last routine update.
+        _retry_policy (RetryPolicy): Backoff of failed runs, which are rescheduled before their regular interval.
+        _job_retry_policy (RetryPolicy): Backoff of the routine's failed queued jobs.
+        _time_budget_sec (Optional[float]): Time budget of a run, the scheduler cancels runs which overrun it.
+        update_timestamp (int): Timestamp of the last routine update, restored from the persisted run state on the first check.
+        _sharded (bool): Whether the routine splits its work by shard, so it runs on every worker process instead of the leader only.
 
     Methods:
         - run(): Run the routine. Implementation is in child classes.
         - start(): Add routine to the list of active routine instances.
         - stop(): Remove routine from the list of active routine instances.
-        - refetch(): Refetch utility method for failed fetch attempts.
+        - _retry_later(): Mark the current run as failed and reschedule it with the backoff of the retry policy.
         - check_idle_status(): Check if the routine has been idle for a specified interval.
+        - next_run_timestamp(): Get the timestamp at which the routine is due to run again.
         - check_run_interval(): Decorator to control routine execution based on intervals.
 
     Usage:
         To create a custom routine, subclass `Routine` and implement the `run()` method.
     """
 
+    _sharded: bool = False
+
     def __init__(self, service) -> None:
         """
         Initialize a Routine
@@ -58,10 +65,29 @@ class Routine(ABC):
         if hasattr(service, 'processor'):
             self._processor = service.processor
 
-        self._routine_intervals_hours = service.config.routine_intervals_hours
-        self._refetch_timeout_sec = service.config.refetch_timeout_sec
+        cfg = service.config
+
+        self._routine_intervals_hours = cfg.routine_intervals_hours
+
+        self._retry_policy = RetryPolicy(
+            max_attempts=cfg.routine_retry_max_attempts,
+            base_delay_sec=cfg.routine_retry_base_delay_sec,
+            max_delay_sec=cfg.routine_retry_max_delay_sec,
+        )
+        self._job_retry_policy = RetryPolicy(
+            max_attempts=cfg.job_max_attempts,
+            base_delay_sec=cfg.job_retry_delay_sec,
+            max_delay_sec=cfg.job_retry_max_delay_sec,
+        )
+
+        self._time_budget_sec = cfg.routine_time_budgets_sec.get(self.__class__.__name__, cfg.routine_time_budget_sec)
 
         self._update_timestamp = None
+        self._run_state_loaded = False
+
+        self._run_failed = False
+        self._retry_attempt = 0
+        self._retry_timestamp = None
 
         self._cookie = None
 
@@ -103,31 +129,28 @@ class Routine(ABC):
     #
     #
 
-    @staticmethod
-    def _refetch(run: Callable, timeout_sec: int, attempts: int, return_call: bool = False) -> Optional[Any]:
+    def _retry_later(self) -> bool:
         """
-        Make specified fetch attempts for failed API responses. Multiply timeout time after each attempt.
+        Mark the current run as failed and reschedule it with the backoff of the retry policy.
 
-        Args:
-            run (Callable): The fetch function to retry.
-            timeout_sec (int): Timeout duration in seconds.
-            attempts (int): Number of retry attempts.
-            return_call (bool): Whether to return the result of the fetch function.
+        The run is not recorded as completed, the scheduler picks the routine up again at its retry time.
 
         Returns:
-            Optional[Any]: Result of the fetch call (if return_call is True).
+            bool: True if a retry is scheduled, False if the retry attempts are exhausted and the routine waits for its next interval.
         """
-        if attempts == 0:
-            return
+        self._run_failed = True
+        self._retry_attempt += 1
 
-        sleep_time = timeout_sec if attempts > 4 else timeout_sec * (5 - attempts)
+        delay_sec = self._retry_policy.next_delay(self._retry_attempt)
 
-        time.sleep(sleep_time)
+        if delay_sec is None:
+            self._retry_attempt = 0
+            self._retry_timestamp = None
+            return False
 
-        if return_call:
-            return run(attempts - 1)
+        self._retry_timestamp = datetime.now().timestamp() + delay_sec
 
-        run(attempts - 1)
+        return True
 
     #
     #
@@ -153,11 +176,115 @@ class Routine(ABC):
     #
     #
 
+    def _claim_run(self, interval_time: str) -> bool:
+        """
+        Check if the routine is due for the given interval and mark the run as started if it is.
+
+        The start time is persisted, so the run interval is respected across process restarts.
+
+        Args:
+            interval_time (str): The key of the interval in the routine intervals dictionary.
+
+        Returns:
+            bool: True if the routine should run now, False if it is still idle.
+        """
+        self.__load_run_state()
+
+        run_interval = self._routine_intervals_hours[interval_time]
+        current_timestamp = datetime.now().timestamp()
+
+        retry_due = self._retry_timestamp is not None and current_timestamp >= self._retry_timestamp
+
+        if retry_due:
+            self._retry_timestamp = None
+
+        elif self._update_timestamp:
+            is_idle = self._check_idle_status(current_timestamp, self._update_timestamp, run_interval)
+
+            if is_idle:
+                return False
+
+        self._update_timestamp = current_timestamp
+        self._run_failed = False
+        self._db.save_routine_start(self.__class__.__name__, datetime.fromtimestamp(current_timestamp))
+
+        return True
+
+    #
+    #
+    #
+
+    def _complete_run(self) -> None:
+        """
+        Persist the completion time and duration of the run, unless it failed and was rescheduled.
+        """
+        if self._run_failed:
+            return
+
+        self._retry_attempt = 0
+
+        now = datetime.now()
+        duration_sec = now.timestamp() - self._update_timestamp
+
+        self._db.save_routine_success(self.__class__.__name__, now, duration_sec)
+
+    #
+    #
+    #
+
+    def __load_run_state(self) -> None:
+        """
+        Restore the last start timestamp from the persisted run state, once per process.
+
+        Only runs which completed successfully are restored, an interrupted run makes the routine due immediately.
+        """
+        if self._run_state_loaded:
+            return
+
+        self._run_state_loaded = True
+
+        state = self._db.get_routine_run_state(self.__class__.__name__)
+
+        if not state or not state.last_start or not state.last_success:
+            return
+
+        if state.last_success >= state.last_start:
+            self._update_timestamp = int(state.last_start.timestamp())
+
+    #
+    #
+    #
+
+    def next_run_timestamp(self) -> float:
+        """
+        Get the timestamp at which the routine's idle interval ends and it is due to run again.
+
+        Returns:
+            float: Unix timestamp of the next run, the retry time of a failed run, or the current time if the routine has never run.
+        """
+        self.__load_run_state()
+
+        if self._retry_timestamp is not None:
+            return self._retry_timestamp
+
+        if not self._update_timestamp:
+            return datetime.now().timestamp()
+
+        run_interval = self._routine_intervals_hours[self.run.interval_time]
+
+        return self._update_timestamp + run_interval * 3600
+
+    #
+    #
+    #
+
     @staticmethod
     def run_interval_decorator(interval_time) -> Callable:
         """
         Control Routine Execution Based on Intervals
 
+        Supports both synchronous and asynchronous (coroutine) run methods.
+
         Args:
             interval_time: The index of the interval in the routine intervals list.
 
@@ -166,19 +293,33 @@ class Routine(ABC):
         """
 
         def decorator(func: Callable) -> Union[Callable, None]:
+            if iscoroutinefunction(func):
+
+                @wraps(func)
+                async def async_wrapper(self, _=None):
+                    if not self._claim_run(interval_time):
+                        return
+
+                    result = await func(self, _)
+                    self._complete_run()
+
+                    return result
+
+                async_wrapper.interval_time = interval_time
+
+                return async_wrapper
+
             @wraps(func)
-            def wrapper(self, refetch_attempts: int = 5):
-                run_interval = self._routine_intervals_hours[interval_time]
-                current_timestamp = int(datetime.now().timestamp())
+            def wrapper(self, _=None):
+                if not self._claim_run(interval_time):
+                    return
 
-                if self._update_timestamp:
-                    is_idle = self._check_idle_status(current_timestamp, self._update_timestamp, run_interval)
+                result = func(self, _)
+                self._complete_run()
 
-                    if is_idle:
-                        return
+                return result
 
-                self._update_timestamp = current_timestamp
-                return func(self, refetch_attempts)
+            wrapper.interval_time = interval_time
 
             return wrapper
 
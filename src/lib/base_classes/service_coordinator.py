@@ -1,8 +1,8 @@
 from typing import Coroutine, Any, NoReturn
-from datetime import datetime
-from asyncio import sleep, create_task, CancelledError
+from asyncio import create_task, CancelledError
 
 from lib.base_classes.routine import Routine
+from lib.routine_scheduler import RoutineScheduler
 from lib.logger import Logger
 
 
@@ -69,23 +69,14 @@ class ServiceCoordinator:
 
     async def _routine(self) -> Coroutine[Any, Any, NoReturn]:
         """
-        Implements the routine logic for managing Coingecko data.
+        Runs the coordinator's routines with a RoutineScheduler of its own.
 
-        This method runs asynchronous routines that retrieve and process data, coordinating various tasks.
-
-        It calculates sleep times based on routine intervals to manage the frequency of data retrieval.
+        Each routine is dispatched when its run interval ends, instead of polling all routines in a fixed interval.
+        To schedule the routines of several coordinators together, pass them to a single RoutineScheduler instead.
         """
-        while True:
-            start_time = datetime.now()
-            for routine in self.routines.values():
-                routine.run()
-            end_time = datetime.now()
-
-            elapsed_time_seconds = (end_time - start_time).total_seconds()
-
-            sleep_time = max(self._routine_interval_sec - elapsed_time_seconds, 0)
+        scheduler = RoutineScheduler([self], jitter_sec=self.config.scheduler_jitter_sec)
 
-            await sleep(sleep_time)
+        await scheduler.run()
 
     #
     #
@@ -97,8 +88,10 @@ class ServiceCoordinator:
 
         If a task is running, it will be canceled.
         """
-        if self._task:
-            self._task.cancel()
+        task = getattr(self, '_task', None)
+
+        if task:
+            task.cancel()
 
     #
     #
@@ -113,6 +106,11 @@ class ServiceCoordinator:
         """
         self.routines[routine.__class__.__name__] = routine
 
+        scheduler = getattr(self, '_scheduler', None)
+
+        if scheduler:
+            scheduler.schedule(self, routine)
+
     #
     #
     #
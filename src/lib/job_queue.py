@@ -0,0 +1,340 @@
+import json
+from typing import Any, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, and_
+from sqlalchemy.dialects.sqlite import insert
+
+from lib.base_classes.db_access_layer import DBAccessLayer
+
+use_session = DBAccessLayer.use_session
+
+
+class JobQueue(DBAccessLayer):
+    """
+    Durable job queue backed by the fetch_jobs table.
+
+    Routines enqueue fine-grained jobs, i.e. one per (coin, platform), which are leased by workers, acknowledged when
+    their results are saved, or rescheduled with a retry-at time when they fail. Jobs left leased by a crashed worker
+    become available again once their lease expires.
+
+    With shard leases, every job is assigned to the shard of its coin and a worker only leases the jobs of the shards
+    it owns, so several worker processes split a queue between them.
+
+    Job statuses:
+        pending: Waiting to be leased once its run_at time has passed.
+        leased: Being processed by a worker until its leased_until time.
+        done: Processed and its result saved.
+        failed: Gave up after the maximum number of attempts.
+
+    Methods:
+        enqueue: Add jobs to a queue, ignoring job keys which are already queued.
+        lease: Lease due jobs of a queue to a worker.
+        ack: Mark jobs as done.
+        retry: Reschedule a failed job.
+        fail: Mark a job as failed.
+        depth: Count the jobs of a queue by status.
+        seconds_until_next: Get the time until the next job of a queue could become available.
+        has_unfinished: Check if a queue has unfinished jobs in the worker's shards.
+        purge: Delete the jobs of the worker's shards of a queue created before a given time.
+
+    Args:
+        db (Database): An instance of the Database class.
+        shards (Optional[ShardLeaseManager]): The worker's shard leases, all jobs belong to shard 0 without them.
+    """
+
+    def __init__(self, db, shards=None) -> None:
+        """
+        Initialize the JobQueue.
+        """
+        super().__init__(db)
+
+        self.__shards = shards
+
+    #
+    #
+    #
+
+    @use_session
+    def enqueue(self, queue: str, jobs: list[dict[str, Any]], session={}) -> None:
+        """
+        Add jobs to a queue. Jobs whose key is already in the queue are ignored, so enqueuing is idempotent.
+
+        All job times are set in local time, like the purge cutoff, instead of the UTC defaults of SQLite.
+
+        Args:
+            queue (str): The name of the queue.
+            jobs (list[dict[str, Any]]): A list of jobs with a unique 'job_key', a JSON serializable 'payload' and an optional
+                'shard_key', i.e. the coin ID, which defaults to the job key.
+            session: The database session (provided by the session_decorator).
+        """
+        if not jobs:
+            return
+
+        table = self.models.FetchJob
+
+        now = datetime.now()
+
+        rows = [
+            {
+                'queue': queue,
+                'job_key': job['job_key'],
+                'payload': json.dumps(job['payload']),
+                'shard': self.__shard_for(job.get('shard_key', job['job_key'])),
+                'status': 'pending',
+                'attempts': 0,
+                'run_at': now,
+                'created': now,
+                'updated': now,
+            }
+            for job in jobs
+        ]
+
+        statement = insert(table).on_conflict_do_nothing(index_elements=['queue', 'job_key'])
+
+        session.execute(statement, rows)
+
+    #
+    #
+    #
+
+    @use_session
+    def lease(self, queue: str, worker_id: str, limit: int = 1, lease_sec: int = 300, session={}) -> list[Any]:
+        """
+        Lease due jobs of a queue to a worker.
+
+        Pending jobs whose run_at time has passed, and leased jobs whose lease has expired, are claimed with a conditional
+        update, so concurrent workers never lease the same job. Only the jobs of the worker's own shards are leased.
+
+        Args:
+            queue (str): The name of the queue.
+            worker_id (str): The unique ID of the leasing worker.
+            limit (int): The maximum number of jobs to lease.
+            lease_sec (int): The lease duration in seconds, after which the job can be leased by another worker.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            list[FetchJob]: The leased jobs, with their attempts count including the current attempt.
+        """
+        table = self.models.FetchJob
+
+        now = datetime.now()
+        leased_until = now + timedelta(seconds=lease_sec)
+
+        is_available = and_(
+            table.queue == queue,
+            *self.__shard_filter(),
+            or_(
+                and_(table.status == 'pending', table.run_at <= now),
+                and_(table.status == 'leased', table.leased_until < now),
+            ),
+        )
+
+        candidates = session.query(table.id).filter(is_available).order_by(table.run_at).limit(limit).all()
+        candidate_ids = [row.id for row in candidates]
+
+        if not candidate_ids:
+            return []
+
+        session.query(table).filter(table.id.in_(candidate_ids), is_available).update(
+            {'status': 'leased', 'leased_by': worker_id, 'leased_until': leased_until, 'attempts': table.attempts + 1, 'updated': now},
+            synchronize_session=False,
+        )
+
+        leased = session.query(table).filter(table.id.in_(candidate_ids), table.leased_by == worker_id, table.leased_until == leased_until).all()
+
+        return leased
+
+    #
+    #
+    #
+
+    @use_session
+    def ack(self, job_ids: list[int], session={}) -> None:
+        """
+        Mark jobs as done.
+
+        Args:
+            job_ids (list[int]): The IDs of the processed jobs.
+            session: The database session (provided by the session_decorator).
+        """
+        if not job_ids:
+            return
+
+        table = self.models.FetchJob
+
+        session.query(table).filter(table.id.in_(job_ids)).update({'status': 'done', 'leased_until': None, 'updated': datetime.now()}, synchronize_session=False)
+
+    #
+    #
+    #
+
+    @use_session
+    def retry(self, job_id: int, delay_sec: float, error: Optional[str] = None, session={}) -> None:
+        """
+        Reschedule a failed job to be leased again after a delay.
+
+        Args:
+            job_id (int): The ID of the failed job.
+            delay_sec (float): The delay in seconds before the job becomes available again.
+            error (Optional[str]): A description of the failure.
+            session: The database session (provided by the session_decorator).
+        """
+        table = self.models.FetchJob
+
+        run_at = datetime.now() + timedelta(seconds=delay_sec)
+
+        session.query(table).filter(table.id == job_id).update(
+            {'status': 'pending', 'run_at': run_at, 'leased_by': None, 'leased_until': None, 'last_error': error, 'updated': datetime.now()},
+            synchronize_session=False,
+        )
+
+    #
+    #
+    #
+
+    @use_session
+    def fail(self, job_id: int, error: Optional[str] = None, session={}) -> None:
+        """
+        Mark a job as failed, it won't be leased again.
+
+        Args:
+            job_id (int): The ID of the failed job.
+            error (Optional[str]): A description of the failure.
+            session: The database session (provided by the session_decorator).
+        """
+        table = self.models.FetchJob
+
+        session.query(table).filter(table.id == job_id).update({'status': 'failed', 'leased_until': None, 'last_error': error, 'updated': datetime.now()}, synchronize_session=False)
+
+    #
+    #
+    #
+
+    @use_session
+    def depth(self, queue: str, session={}) -> dict[str, int]:
+        """
+        Count the jobs of a queue by status.
+
+        Args:
+            queue (str): The name of the queue.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            dict[str, int]: A dictionary mapping job statuses to their counts.
+        """
+        table = self.models.FetchJob
+
+        response = session.query(table.status, func.count(table.id)).filter(table.queue == queue).group_by(table.status).all()
+
+        return {status: count for status, count in response}
+
+    #
+    #
+    #
+
+    @use_session
+    def seconds_until_next(self, queue: str, exclude_worker: Optional[str] = None, session={}) -> Optional[float]:
+        """
+        Get the time until the next job of a queue could become available for leasing.
+
+        Considers pending jobs of the worker's own shards waiting for their run_at time, and jobs leased by other workers
+        which may be released when their lease expires.
+
+        Args:
+            queue (str): The name of the queue.
+            exclude_worker (Optional[str]): Ignore the jobs leased by this worker.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            Optional[float]: Seconds until the next job could become available, None if the queue has no unfinished jobs.
+        """
+        table = self.models.FetchJob
+
+        next_pending = session.query(func.min(table.run_at)).filter(table.queue == queue, *self.__shard_filter(), table.status == 'pending').scalar()
+
+        leased_filter = [table.queue == queue, *self.__shard_filter(), table.status == 'leased']
+
+        if exclude_worker:
+            leased_filter.append(table.leased_by != exclude_worker)
+
+        next_lease_expiry = session.query(func.min(table.leased_until)).filter(*leased_filter).scalar()
+
+        times = [time for time in (next_pending, next_lease_expiry) if time]
+
+        if not times:
+            return None
+
+        return (min(times) - datetime.now()).total_seconds()
+
+    #
+    #
+    #
+
+    @use_session
+    def has_unfinished(self, queue: str, exclude_worker: Optional[str] = None, session={}) -> bool:
+        """
+        Check if a queue has unfinished jobs in the worker's own shards.
+
+        Shards of other workers are left to their owners, so a drain doesn't wait for the slowest worker. The owned
+        shards are refreshed on every heartbeat, so the shards taken over from a dead worker are drained too.
+
+        Args:
+            queue (str): The name of the queue.
+            exclude_worker (Optional[str]): Ignore the jobs leased by this worker.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            bool: True if the queue has pending or leased jobs.
+        """
+        table = self.models.FetchJob
+
+        unfinished = session.query(table.id).filter(table.queue == queue, *self.__shard_filter(), table.status.in_(['pending', 'leased']))
+
+        if exclude_worker:
+            unfinished = unfinished.filter(or_(table.leased_by.is_(None), table.leased_by != exclude_worker))
+
+        return unfinished.first() is not None
+
+    #
+    #
+    #
+
+    @use_session
+    def purge(self, queue: str, created_before: datetime, session={}) -> None:
+        """
+        Delete the jobs of a queue created before a given time, i.e. left over from a previous pass.
+
+        Only the jobs of the worker's own shards are deleted, so a worker starting its pass late never deletes the jobs
+        other workers are still draining.
+
+        Args:
+            queue (str): The name of the queue.
+            created_before (datetime): Jobs created before this time are deleted.
+            session: The database session (provided by the session_decorator).
+        """
+        table = self.models.FetchJob
+
+        session.query(table).filter(table.queue == queue, *self.__shard_filter(), table.created < created_before).delete(synchronize_session=False)
+
+    #
+    #
+    #
+
+    def __shard_for(self, key: str) -> int:
+        """
+        Get the shard of a job key, 0 without shard leases.
+        """
+        return self.__shards.shard_for(key) if self.__shards else 0
+
+    #
+    #
+    #
+
+    def __shard_filter(self) -> list[Any]:
+        """
+        Get the filter restricting a query to the worker's own shards, empty without shard leases.
+        """
+        if not self.__shards:
+            return []
+
+        return [self.models.FetchJob.shard.in_(self.__shards.owned_shards)]
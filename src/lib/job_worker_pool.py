@@ -0,0 +1,192 @@
+import os
+import json
+import socket
+from typing import Any, Awaitable, Callable, Optional
+from asyncio import sleep, create_task, gather
+
+from lib.job_queue import JobQueue
+from lib.retry_policy import RetryPolicy
+from lib.logger import Logger
+
+
+class JobWorkerPool:
+    """
+    Pool of async workers draining a job queue.
+
+    Each worker leases one job at a time and awaits the handler with the job's decoded payload. Results are buffered
+    and saved in batches, the jobs of a batch are acknowledged only after their results are saved. A handler returning
+    None, or raising, counts as a failed attempt, the job is then rescheduled with the backoff of the retry policy until
+    it runs out of attempts. Jobs raising an error which isn't retryable fail right away.
+
+    With shard leases the drain only ends once the jobs of every shard are finished, so the shards of a dead worker
+    are picked up after they are reassigned.
+
+    Args:
+        queue (JobQueue): The job queue to drain.
+        queue_name (str): The name of the queue.
+        handler (Callable): Coroutine function called with the job payload, returns the job result or None on failure.
+        save_results (Callable): Function called with a list of job results to save them.
+        workers (int): The number of concurrent workers (default: 4).
+        batch_size (int): The number of results saved at once (default: 10).
+        retry_policy (Optional[RetryPolicy]): The backoff and maximum attempts of failed jobs (default: 4 attempts, 30s base delay).
+        lease_sec (int): The lease duration of a job in seconds (default: 300).
+        worker_id (Optional[str]): Unique ID of the pool, defaults to the host name and process ID.
+
+    Methods:
+        drain: Process jobs until the worker's shards of the queue have no unfinished jobs left.
+
+    Example Usage:
+        pool = JobWorkerPool(jobs, 'sub_tracker', handler=fetch_subs, save_results=db.save_subs_data)
+        stats = await pool.drain()
+    """
+
+    __idle_poll_sec: float = 5
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        queue_name: str,
+        handler: Callable[[dict[str, Any]], Awaitable[Optional[Any]]],
+        save_results: Callable[[list[Any]], None],
+        workers: int = 4,
+        batch_size: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        lease_sec: int = 300,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the JobWorkerPool.
+        """
+        self.__queue = queue
+        self.__queue_name = queue_name
+        self.__handler = handler
+        self.__save_results = save_results
+
+        self.__workers = workers
+        self.__batch_size = batch_size
+        self.__retry_policy = retry_policy or RetryPolicy(max_attempts=4, base_delay_sec=30, max_delay_sec=600)
+        self.__lease_sec = lease_sec
+        self.__worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}-{queue_name}'
+
+        self.__results: list[tuple[int, Any]] = []
+        self.__stats = {'done': 0, 'retried': 0, 'failed': 0}
+
+        self.__log = Logger(name=f'{self.__class__.__name__}:{queue_name}')
+
+    #
+    #
+    #
+
+    async def drain(self) -> dict[str, int]:
+        """
+        Process jobs with all workers until the worker's shards of the queue have no unfinished jobs left.
+
+        Buffered results are saved even if the drain gets cancelled.
+
+        Returns:
+            dict[str, int]: The number of jobs done, retried and failed during the drain.
+        """
+        self.__stats = {'done': 0, 'retried': 0, 'failed': 0}
+
+        workers = [create_task(self.__work()) for _ in range(self.__workers)]
+
+        try:
+            await gather(*workers)
+
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+            self.__flush()
+
+        return dict(self.__stats)
+
+    #
+    #
+    #
+
+    async def __work(self) -> None:
+        """
+        Worker loop, leases and processes jobs until no unfinished jobs are left in the worker's shards.
+        """
+        queue = self.__queue
+
+        while True:
+            jobs = queue.lease(self.__queue_name, self.__worker_id, limit=1, lease_sec=self.__lease_sec)
+
+            if not jobs:
+                wait_sec = queue.seconds_until_next(self.__queue_name, exclude_worker=self.__worker_id)
+
+                if wait_sec is None:
+                    if not queue.has_unfinished(self.__queue_name, exclude_worker=self.__worker_id):
+                        return
+
+                    wait_sec = self.__idle_poll_sec
+
+                await sleep(min(max(wait_sec, 0.1), self.__idle_poll_sec))
+                continue
+
+            job = jobs[0]
+
+            error = None
+
+            try:
+                result = await self.__handler(json.loads(job.payload))
+
+            except Exception as e:
+                result = None
+                error = e
+
+            if result is None:
+                self.__handle_failure(job, error)
+                continue
+
+            self.__results.append((job.id, result))
+
+            if len(self.__results) >= self.__batch_size:
+                self.__flush()
+
+    #
+    #
+    #
+
+    def __handle_failure(self, job, error: Optional[Exception]) -> None:
+        """
+        Reschedule a failed job, or mark it as failed when it isn't retryable or out of attempts.
+
+        Args:
+            job (FetchJob): The failed job.
+            error (Optional[Exception]): The error raised by the handler, None if it returned no result.
+        """
+        policy = self.__retry_policy
+
+        retryable = error is None or policy.is_retryable(error)
+
+        delay_sec = policy.next_delay(job.attempts) if retryable else None
+
+        if delay_sec is None:
+            self.__queue.fail(job.id, str(error) if error else None)
+            self.__stats['failed'] += 1
+            self.__log.warn(f'Job {job.job_key} failed after {job.attempts} attempts. {error or ""}')
+            return
+
+        self.__queue.retry(job.id, delay_sec=delay_sec, error=str(error) if error else None)
+        self.__stats['retried'] += 1
+
+    #
+    #
+    #
+
+    def __flush(self) -> None:
+        """
+        Save the buffered results and acknowledge their jobs.
+        """
+        if not self.__results:
+            return
+
+        results, self.__results = self.__results, []
+
+        self.__save_results([result for _, result in results])
+        self.__queue.ack([job_id for job_id, _ in results])
+
+        self.__stats['done'] += len(results)
@@ -0,0 +1,181 @@
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+from lib.base_classes.db_access_layer import DBAccessLayer
+
+use_session = DBAccessLayer.use_session
+
+
+class LinkQuarantine(DBAccessLayer):
+    """
+    Quarantine of failing URLs backed by the quarantined_links table.
+
+    Every failed request of a URL is counted. Once a URL failed the threshold number of times in a row, it is
+    quarantined and not requested again until its recheck time, which doubles with every further failure. Links
+    which are gone for good, i.e. 404 or 410 responses, are quarantined on their first failure. A successful request
+    releases the URL. URLs matching an exclude pattern, i.e. API endpoints, are never quarantined.
+
+    Args:
+        db (Database): An instance of the Database class.
+        threshold (int): The number of consecutive failures after which a URL is quarantined (default: 3).
+        recheck_sec (float): The time in seconds until the first recheck of a quarantined URL (default: 1 hour).
+        max_recheck_sec (float): The maximum time in seconds between rechecks (default: 7 days).
+        exclude_patterns (Optional[list[str]]): Regex patterns of URLs which are never quarantined.
+
+    Methods:
+        applies_to: Check whether a URL may be quarantined.
+        is_quarantined: Check whether a URL is quarantined.
+        quarantined: Get the quarantined URLs of a list of URLs.
+        report_failure: Count a failed request of a URL.
+        release: Clear the failures of a URL.
+    """
+
+    def __init__(
+        self,
+        db,
+        threshold: int = 3,
+        recheck_sec: float = 3600,
+        max_recheck_sec: float = 7 * 24 * 3600,
+        exclude_patterns: Optional[list[str]] = None,
+    ) -> None:
+        """
+        Initialize the LinkQuarantine.
+        """
+        super().__init__(db)
+
+        self.__exclude_patterns = [re.compile(pattern) for pattern in exclude_patterns or []]
+
+        self.__threshold = threshold
+        self.__recheck_sec = recheck_sec
+        self.__max_recheck_sec = max_recheck_sec
+
+    #
+    #
+    #
+
+    def applies_to(self, url: str) -> bool:
+        """
+        Check whether a URL may be quarantined.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            bool: False if the URL matches an exclude pattern.
+        """
+        return not any(pattern.search(url) for pattern in self.__exclude_patterns)
+
+    #
+    #
+    #
+
+    @use_session
+    def is_quarantined(self, url: str, session={}) -> Optional[bool]:
+        """
+        Check whether a URL is quarantined.
+
+        Args:
+            url (str): The URL.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            Optional[bool]: True if the URL is quarantined until its recheck time, False if it failed before but may be
+                requested, None if it has no failures recorded.
+        """
+        table = self.models.QuarantinedLink
+
+        row = session.query(table.failures, table.recheck_at).filter(table.url == url).first()
+
+        if row is None:
+            return None
+
+        return row.failures >= self.__threshold and row.recheck_at > datetime.now()
+
+    #
+    #
+    #
+
+    @use_session
+    def quarantined(self, urls: list[str], session={}) -> set[str]:
+        """
+        Get the URLs of a list which are quarantined until their recheck time.
+
+        Args:
+            urls (list[str]): The URLs to check.
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            set[str]: The quarantined URLs.
+        """
+        table = self.models.QuarantinedLink
+
+        now = datetime.now()
+
+        quarantined = set()
+
+        for i in range(0, len(urls), 500):
+            chunk = urls[i : i + 500]
+
+            response = session.query(table.url).filter(table.url.in_(chunk), table.failures >= self.__threshold, table.recheck_at > now).all()
+
+            quarantined.update(url for (url,) in response)
+
+        return quarantined
+
+    #
+    #
+    #
+
+    @use_session
+    def report_failure(self, url: str, error: Optional[str] = None, dead: bool = False, session={}) -> None:
+        """
+        Count a failed request of a URL and set its recheck time.
+
+        Args:
+            url (str): The URL.
+            error (Optional[str]): A description of the failure.
+            dead (bool): Whether the link is gone for good, which quarantines it right away.
+            session: The database session (provided by the session_decorator).
+        """
+        table = self.models.QuarantinedLink
+
+        now = datetime.now()
+
+        row = session.query(table).filter(table.url == url).first()
+
+        if row is None:
+            row = table(url=url, failures=0, first_failed=now)
+            session.add(row)
+
+        failures = row.failures + 1
+
+        if dead:
+            failures = max(failures, self.__threshold)
+
+        if failures >= self.__threshold:
+            recheck_sec = min(self.__recheck_sec * 2 ** (failures - self.__threshold), self.__max_recheck_sec)
+        else:
+            recheck_sec = 0
+
+        row.failures = failures
+        row.last_failed = now
+        row.recheck_at = now + timedelta(seconds=recheck_sec)
+        row.last_error = error
+
+    #
+    #
+    #
+
+    @use_session
+    def release(self, url: str, session={}) -> None:
+        """
+        Clear the failures of a URL after a successful request.
+
+        Args:
+            url (str): The URL.
+            session: The database session (provided by the session_decorator).
+        """
+        table = self.models.QuarantinedLink
+
+        session.query(table).filter(table.url == url).delete(synchronize_session=False)
@@ -13,7 +13,7 @@ class Logger:
     Logger class for logging messages to both the console and a database.
 
     This class initializes a logger with customizable logging levels and formats.
-    It can log messages of different severity levels, including success, warning, error, and critical.
+    It can log messages of different severity levels, including success, info, warning, error, and critical.
 
     Args:
         db (Database): An instance of the Database class for database operations.
@@ -24,7 +24,7 @@ class Logger:
         __logger (Logger): The logger object configured for logging.
 
     Usage:
-        To create an instance of the Logger class and log messages, use the methods like success, warn, error, and critical.
+        To create an instance of the Logger class and log messages, use the methods like success, info, warn, error, and critical.
     """
 
     __default_level: str = 'info'
@@ -53,6 +53,12 @@ class Logger:
         logger = logging.getLogger(name)
         logger.propagate = False
 
+        self.__logger = logger
+
+        # Loggers are shared by name, so instances created repeatedly, i.e. per routine run, reuse the handlers.
+        if logger.handlers:
+            return
+
         formatter = logging.Formatter('%(levelname)s - %(asctime)s - %(name)s - %(message)s', '%Y-%m-%d %H:%M:%S')
 
         handler = logging.StreamHandler()
@@ -65,8 +71,6 @@ class Logger:
         db_handler.setFormatter(formatter)
         logger.addHandler(db_handler)
 
-        self.__logger = logger
-
     #
     #
     #
@@ -90,6 +94,19 @@ class Logger:
     #
     #
 
+    def info(self, message: str) -> None:
+        """
+        Logs an informational message to the logger, i.e. progress or statistics of a routine run.
+
+        Args:
+            message (str): The message to log.
+        """
+        self.__logger.info(message)
+
+    #
+    #
+    #
+
     def warn(self, message: str) -> None:
         """
         Log a warning message with some predefined messages for failed fetch/scrape operations.
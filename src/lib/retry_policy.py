@@ -0,0 +1,138 @@
+import httpx
+from time import monotonic
+from random import uniform
+from typing import Optional
+
+
+class RetryPolicy:
+    """
+    Retry policy with exponential backoff, jitter, an attempt limit and a deadline budget.
+
+    The policy only computes when to retry, the caller reschedules the work, i.e. a job with a retry-at time, a
+    routine with an earlier due time, or a request after a non-blocking sleep. It also classifies errors: throttling,
+    server errors, timeouts and connection errors are worth retrying, other client errors such as 404 are not.
+
+    Args:
+        max_attempts (int): The maximum number of attempts, including the first one (default: 4).
+        base_delay_sec (float): The delay before the first retry (default: 1).
+        max_delay_sec (float): The maximum delay between attempts (default: 60).
+        multiplier (float): The factor the delay grows by after each attempt (default: 2).
+        jitter (bool): Whether to randomize each delay between half and all of its value (default: True).
+        deadline_sec (Optional[float]): The maximum time budget from the first attempt, no retry is scheduled past it.
+
+    Methods:
+        delay: Get the backoff delay after a failed attempt.
+        next_delay: Get the delay before the next attempt, None if the attempts or the deadline budget are exhausted.
+        is_retryable_status: Check whether an HTTP status is worth retrying.
+        is_retryable: Check whether an error is worth retrying.
+
+    Example Usage:
+        policy = RetryPolicy(max_attempts=3, base_delay_sec=1, deadline_sec=30)
+        delay = policy.next_delay(attempt, started_at)
+    """
+
+    __retryable_statuses: frozenset[int] = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay_sec: float = 1,
+        max_delay_sec: float = 60,
+        multiplier: float = 2,
+        jitter: bool = True,
+        deadline_sec: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the RetryPolicy.
+        """
+        self.max_attempts = max_attempts
+
+        self.__base_delay_sec = base_delay_sec
+        self.__max_delay_sec = max_delay_sec
+        self.__multiplier = multiplier
+        self.__jitter = jitter
+        self.__deadline_sec = deadline_sec
+
+    #
+    #
+    #
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the backoff delay after a failed attempt.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 1.
+            retry_after (Optional[float]): A delay requested by the server, which is never undercut.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = min(self.__base_delay_sec * self.__multiplier ** max(attempt - 1, 0), self.__max_delay_sec)
+
+        if self.__jitter:
+            delay = uniform(delay / 2, delay)
+
+        return max(delay, retry_after or 0)
+
+    #
+    #
+    #
+
+    def next_delay(self, attempt: int, started_at: Optional[float] = None, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Get the delay before the next attempt.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 1.
+            started_at (Optional[float]): Monotonic time of the first attempt, needed for the deadline budget.
+            retry_after (Optional[float]): A delay requested by the server.
+
+        Returns:
+            Optional[float]: The delay in seconds, None if no attempts are left or the next one would start past the deadline.
+        """
+        if attempt >= self.max_attempts:
+            return None
+
+        delay = self.delay(attempt, retry_after)
+
+        if self.__deadline_sec is not None and started_at is not None:
+            if monotonic() + delay - started_at > self.__deadline_sec:
+                return None
+
+        return delay
+
+    #
+    #
+    #
+
+    def is_retryable_status(self, status: int) -> bool:
+        """
+        Check whether an HTTP status is worth retrying, i.e. throttling, timeouts and server errors.
+
+        Args:
+            status (int): The HTTP status code.
+
+        Returns:
+            bool: True if the request may succeed when retried.
+        """
+        return status in self.__retryable_statuses
+
+    #
+    #
+    #
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """
+        Check whether an error is worth retrying.
+
+        Args:
+            error (BaseException): The error of the failed attempt.
+
+        Returns:
+            bool: True for retryable HTTP statuses, timeouts and connection errors, False otherwise.
+        """
+        if isinstance(error, httpx.HTTPStatusError):
+            return self.is_retryable_status(error.response.status_code)
+
+        return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
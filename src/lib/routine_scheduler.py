@@ -0,0 +1,227 @@
+from typing import Any, Callable, Iterable, NoReturn, Optional
+from heapq import heappush, heappop
+from random import uniform
+from datetime import datetime
+from inspect import isawaitable
+from asyncio import Event, Task, create_task, ensure_future, wait_for, gather
+
+from lib.base_classes.routine import Routine
+from lib.logger import Logger
+
+
+class RoutineScheduler:
+    """
+    Central deadline scheduler for the routines of one or more service coordinators.
+
+    Keeps every routine in a min-heap keyed by its next due time, sleeps exactly until the earliest deadline and
+    dispatches due routines as separate tasks, so a long running routine never delays the others. After a routine
+    finishes it is pushed back onto the heap with its next due time plus a random jitter.
+
+    A watchdog cancels async routines which overrun their time budget, so one stalled host can't hold a routine,
+    and the connections and jobs it leased, forever.
+
+    In worker mode only the leader process runs the routines which are not split by shard, the other workers check
+    again after the leader poll interval in case they took over the leadership.
+
+    Args:
+        coordinators (Iterable[ServiceCoordinator]): Coordinators whose routines will be scheduled.
+        jitter_sec (float, optional): Upper bound of the random delay added to each deadline (default: 0).
+        is_leader (Optional[Callable[[], bool]]): Returns whether this process is the leader, all routines run if not given.
+        leader_poll_sec (float, optional): Delay before a non-leader checks an unsharded routine again (default: 60).
+
+    Methods:
+        run: Runs the scheduling loop.
+        schedule: Adds a routine of a coordinator to the heap.
+        stop: Cancels the scheduling loop and all running routines.
+
+    Example Usage:
+        scheduler = RoutineScheduler([coingecko, social_links], jitter_sec=30)
+        await scheduler.run()
+    """
+
+    def __init__(
+        self,
+        coordinators: Iterable[Any],
+        jitter_sec: float = 0,
+        is_leader: Optional[Callable[[], bool]] = None,
+        leader_poll_sec: float = 60,
+    ) -> None:
+        """
+        Initialize the RoutineScheduler and register the routines of the given coordinators.
+
+        Args:
+            coordinators (Iterable[ServiceCoordinator]): Coordinators whose routines will be scheduled.
+            jitter_sec (float, optional): Upper bound of the random delay added to each deadline (default: 0).
+            is_leader (Optional[Callable[[], bool]]): Returns whether this process is the leader, all routines run if not given.
+            leader_poll_sec (float, optional): Delay before a non-leader checks an unsharded routine again (default: 60).
+        """
+        self.__heap: list[tuple[float, int, str, Any, Routine]] = []
+        self.__counter = 0
+        self.__scheduled: set[tuple[int, str]] = set()
+        self.__running: dict[tuple[int, str], Task] = {}
+
+        self.__jitter_sec = jitter_sec
+        self.__is_leader = is_leader
+        self.__leader_poll_sec = leader_poll_sec
+        self.__wakeup = Event()
+        self.__task = None
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+        for coordinator in coordinators:
+            coordinator._scheduler = self
+
+            for name, routine in coordinator.routines.items():
+                self.__push(coordinator, name, routine, routine.next_run_timestamp())
+
+    #
+    #
+    #
+
+    def schedule(self, coordinator, routine: Routine) -> None:
+        """
+        Add a routine of a coordinator to the heap, unless it is already scheduled or running.
+
+        Args:
+            coordinator (ServiceCoordinator): The coordinator which manages the routine.
+            routine (Routine): The routine instance to schedule.
+        """
+        name = routine.__class__.__name__
+
+        if (id(coordinator), name) in self.__scheduled:
+            return
+
+        self.__push(coordinator, name, routine, routine.next_run_timestamp())
+        self.__wakeup.set()
+
+    #
+    #
+    #
+
+    async def run(self) -> NoReturn:
+        """
+        Run the scheduling loop.
+
+        Sleeps until the earliest deadline in the heap, or until a routine gets rescheduled, then dispatches all due routines.
+        """
+        self.__task = create_task(self.__loop())
+
+        try:
+            await self.__task
+
+        finally:
+            running = list(self.__running.values())
+
+            for task in running:
+                task.cancel()
+
+            await gather(*running, return_exceptions=True)
+
+    #
+    #
+    #
+
+    def stop(self) -> None:
+        """
+        Cancel the scheduling loop, which also cancels all running routines.
+        """
+        if self.__task:
+            self.__task.cancel()
+
+    #
+    #
+    #
+
+    async def __loop(self) -> NoReturn:
+        """
+        The scheduling loop, pops and dispatches due routines and sleeps until the next deadline.
+        """
+        while True:
+            self.__wakeup.clear()
+
+            now = datetime.now().timestamp()
+
+            while self.__heap and self.__heap[0][0] <= now:
+                _, _, name, coordinator, routine = heappop(self.__heap)
+
+                key = (id(coordinator), name)
+
+                if coordinator.routines.get(name) is not routine:
+                    self.__scheduled.discard(key)
+                    continue
+
+                if not routine._sharded and self.__is_leader and not self.__is_leader():
+                    self.__scheduled.discard(key)
+                    self.__push(coordinator, name, routine, now + self.__leader_poll_sec)
+                    continue
+
+                self.__running[key] = create_task(self.__execute(coordinator, name, routine))
+
+            timeout = max(self.__heap[0][0] - now, 0) if self.__heap else None
+
+            try:
+                await wait_for(self.__wakeup.wait(), timeout)
+
+            except TimeoutError:
+                pass
+
+    #
+    #
+    #
+
+    async def __execute(self, coordinator, name: str, routine: Routine) -> None:
+        """
+        Run a single routine and push it back onto the heap with its next due time.
+
+        Args:
+            coordinator (ServiceCoordinator): The coordinator which manages the routine.
+            name (str): The name of the routine in the coordinator's routines dictionary.
+            routine (Routine): The routine instance to run.
+        """
+        key = (id(coordinator), name)
+        task = None
+
+        try:
+            result = routine.run()
+
+            if isawaitable(result):
+                task = ensure_future(result)
+                await wait_for(task, routine._time_budget_sec)
+
+        except TimeoutError as e:
+            # A TimeoutError raised by the routine itself leaves its task finished, not cancelled
+            if task is not None and task.cancelled():
+                self.__log.error(f'{name} overran its time budget of {routine._time_budget_sec}s and was cancelled')
+
+            else:
+                self.__log.error(f'{name} failed: {e!r}')
+
+        except Exception as e:
+            self.__log.error(f'{name} failed: {e}')
+
+        finally:
+            del self.__running[key]
+            self.__scheduled.discard(key)
+
+        if coordinator.routines.get(name) is routine:
+            self.__push(coordinator, name, routine, routine.next_run_timestamp() + uniform(0, self.__jitter_sec))
+            self.__wakeup.set()
+
+    #
+    #
+    #
+
+    def __push(self, coordinator, name: str, routine: Routine, due_timestamp: float) -> None:
+        """
+        Push a routine onto the heap.
+
+        Args:
+            coordinator (ServiceCoordinator): The coordinator which manages the routine.
+            name (str): The name of the routine in the coordinator's routines dictionary.
+            routine (Routine): The routine instance.
+            due_timestamp (float): Unix timestamp at which the routine is due.
+        """
+        self.__counter += 1
+        self.__scheduled.add((id(coordinator), name))
+
+        heappush(self.__heap, (due_timestamp, self.__counter, name, coordinator, routine))
@@ -0,0 +1,622 @@
+import json
+import httpx
+import logging
+from time import monotonic
+from asyncio import sleep, wait_for
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+from typing import Optional, Union, Callable, List
+from bs4 import BeautifulSoup, SoupStrainer
+from lib.logger import Logger
+from lib.scrapers.html_parser import HtmlParser
+from lib.scrapers.cookie_store import CookieStore
+from lib.scrapers.rate_limiter import HostRateLimiter
+from lib.scrapers.response_cache import ResponseCache
+from lib.scrapers.single_flight import SingleFlight
+from lib.scrapers.circuit_breaker import CircuitBreaker
+from lib.link_quarantine import LinkQuarantine
+from lib.retry_policy import RetryPolicy
+
+# httpx logs every request at INFO level, which would end up in the logs table.
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+
+class UnsupportedContentTypeError(httpx.HTTPError):
+    '''The response has a content type outside the allow-list, its body is not downloaded.'''
+
+
+class AsyncRequestsHandler:
+    '''
+    Async handler for fetch and scrape requests using the httpx library,
+    parses the response accordingly.
+
+    Keeps a pooled client per host, so connections are reused with HTTP keep-alive
+    and one slow host can't exhaust the connections of the others. HTTP/2 is used
+    when requested and the h2 package is installed. With a rate limiter every request
+    waits for a token of its host and reports the response status back to it. With a
+    response cache fresh responses are served from disk and stale ones are revalidated
+    with a conditional GET. Concurrent requests for the same URL share a single request
+    and parsed result, which is also reused for a few seconds after it arrived.
+    Requests to hosts whose circuit is open, and to quarantined URLs, fail right away.
+    Retryable failures are retried within the budget of the retry policy. Pages are
+    parsed with lxml when it is installed, callers can restrict parsing to the elements
+    they need with a SoupStrainer. Bodies are streamed and capped at a maximum size,
+    responses of other content types than the allowed ones, i.e. PDFs and binaries,
+    are rejected before their body is downloaded, and callers which only need the
+    beginning of a page can stop the download once a marker was read. With a cookie
+    store every request carries the unexpired cookies stored for its host. Callers
+    which fall back to another fetch method can tell a parsed page, a blocked request
+    and a failed request apart with scrape_page.
+
+    Args:
+        generate_headers (Callable): Function generating the request headers from a list of referers.
+        referers (List): A list of referer URLs.
+        max_connections (int): The maximum number of connections per host (default: 10).
+        max_keepalive_connections (int): The maximum number of idle keep-alive connections per host (default: 5).
+        keepalive_expiry_sec (float): The time in seconds an idle connection is kept alive (default: 30).
+        connect_timeout_sec (float): The timeout in seconds to establish a connection (default: 5).
+        read_timeout_sec (float): The timeout in seconds between two chunks of the response (default: 15).
+        deadline_sec (float): The total time budget in seconds of a single request attempt, so a host
+            trickling its response can't stall it either (default: 30).
+        http2 (bool): Whether to negotiate HTTP/2 (default: True).
+        rate_limiter (Optional[HostRateLimiter]): Shared per-host rate limiter.
+        cache (Optional[ResponseCache]): On-disk response cache.
+        coalesce_ttl_sec (float): The time in seconds a parsed result is shared after its request finished (default: 5).
+        circuit_breaker (Optional[CircuitBreaker]): Per-host circuit breaker.
+        quarantine (Optional[LinkQuarantine]): Quarantine of failing URLs.
+        retry_policy (Optional[RetryPolicy]): Retry policy of failed requests, which are not retried without one.
+        html_parser (str): The preferred HTML parser backend, 'lxml' or 'html.parser' (default: 'lxml').
+        max_body_bytes (int): The maximum number of body bytes read, longer bodies are truncated (default: 5 MB).
+        content_types (Optional[List[str]]): The allowed media types of responses, all if None.
+        cookie_store (Optional[CookieStore]): Persistent per-host cookie jars.
+
+    Example Usage:
+        req = AsyncRequestsHandler(generate_requests_headers, referers)
+        soup = await req.scrape_url(url)
+        await req.close()
+    '''
+
+    # Statuses of bot walls and JS challenges, which a browser may get past.
+    __blocking_statuses: frozenset[int] = frozenset({403, 503})
+
+    def __init__(
+        self,
+        generate_headers: Callable,
+        referers: List,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry_sec: float = 30,
+        connect_timeout_sec: float = 5,
+        read_timeout_sec: float = 15,
+        deadline_sec: float = 30,
+        http2: bool = True,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce_ttl_sec: float = 5,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        quarantine: Optional[LinkQuarantine] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        html_parser: str = 'lxml',
+        max_body_bytes: int = 5 * 1024**2,
+        content_types: Optional[List[str]] = None,
+        cookie_store: Optional[CookieStore] = None,
+    ) -> None:
+        '''Initialize the AsyncRequestsHandler with default headers.'''
+        self.__headers = generate_headers(referers)
+        self.__referers = referers
+        self.__generate_headers = generate_headers
+
+        self.__limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_sec,
+        )
+        # Waiting for a pooled connection is covered by the request deadline.
+        self.__timeout = httpx.Timeout(read_timeout_sec, connect=connect_timeout_sec, pool=None)
+        self.__deadline_sec = deadline_sec
+        self.__http2 = http2 and find_spec('h2') is not None
+
+        self.__clients: dict[str, httpx.AsyncClient] = {}
+        self.__rate_limiter = rate_limiter
+        self.__cache = cache
+        self.__single_flight = SingleFlight(memo_ttl_sec=coalesce_ttl_sec)
+        self.__circuit_breaker = circuit_breaker
+        self.__quarantine = quarantine
+        self.__retry_policy = retry_policy
+        self.__html_parser = HtmlParser(html_parser)
+        self.__max_body_bytes = max_body_bytes
+        self.__content_types = frozenset(content_types) if content_types is not None else None
+        self.__cookie_store = cookie_store
+
+        self.__stream_stats = {'truncated': 0, 'stopped_early': 0, 'rejected': 0}
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+    #
+    #
+    #
+
+    def change_headers(self) -> None:
+        '''Change the headers for subsequent requests.'''
+        self.__headers = self.__generate_headers(self.__referers)
+
+    #
+    #
+    #
+
+    def set_cookies(self, cookies) -> None:
+        '''Add cookies to the headers.'''
+        self.__headers['Cookie'] = cookies
+
+    #
+    #
+    #
+
+    async def close(self) -> None:
+        '''Close the connection pools of all hosts.'''
+        self.__log.info(f'Coalesced requests: {self.__single_flight.stats()}')
+        self.__log.info(f'Partial downloads: {self.__stream_stats}')
+
+        if self.__cache:
+            self.__log.info(f'Response cache: {self.__cache.stats()}')
+
+        clients, self.__clients = self.__clients, {}
+
+        for client in clients.values():
+            await client.aclose()
+
+    #
+    #
+    #
+
+    async def scrape_url(self, url: str, parse_only: Optional[SoupStrainer] = None, stop_at: Optional[bytes] = None) -> Optional[BeautifulSoup]:
+        '''
+        Scrape the HTML content of a URL.
+
+        Args:
+            url (str): The URL to scrape.
+            parse_only (Optional[SoupStrainer]): Strainer selecting the elements to parse, the whole page if None.
+                Requests are only coalesced with requests passing the same strainer object.
+            stop_at (Optional[bytes]): Marker after which the rest of the page isn't needed, e.g. b'</head>'.
+
+        Returns:
+            BeautifulSoup: A BeautifulSoup object representing the parsed HTML.
+
+        '''
+        return await self.__single_flight.do(('html', url, parse_only, stop_at), lambda: self.__scrape(url, parse_only, stop_at))
+
+    #
+    #
+    #
+
+    async def scrape_page(self, url: str, parse_only: Optional[SoupStrainer] = None, stop_at: Optional[bytes] = None) -> tuple[Optional[BeautifulSoup], str]:
+        '''
+        Scrape the HTML content of a URL, with the outcome of the request.
+
+        Args:
+            url (str): The URL to scrape.
+            parse_only (Optional[SoupStrainer]): Strainer selecting the elements to parse, the whole page if None.
+            stop_at (Optional[bytes]): Marker after which the rest of the page isn't needed, e.g. b'</head>'.
+
+        Returns:
+            tuple[Optional[BeautifulSoup], str]: The parsed page and the outcome, 'ok' if the page was received,
+                'blocked' if the host answered with a blocking status, i.e. 403 or 503, and 'failed' for all other
+                failures, i.e. quarantined links, open circuits, dead links, exhausted retries and rejected content types.
+
+        '''
+        return await self.__single_flight.do(('page', url, parse_only, stop_at), lambda: self.__scrape_page(url, parse_only, stop_at))
+
+    #
+    #
+    #
+
+    async def fetch_json(self, url: str) -> Optional[list]:
+        '''
+        Fetch JSON data from a URL.
+
+        Args:
+            url (str): The URL to fetch JSON data from.
+
+        Returns:
+            dict: A dictionary representing the parsed JSON data.
+
+        '''
+        return await self.__single_flight.do(('json', url), lambda: self.__fetch(url))
+
+    #
+    #
+    #
+
+    async def fetch_bytes(self, url: str, stop_at: Optional[bytes] = None) -> Optional[bytes]:
+        '''
+        Fetch the raw body of a URL, for callers which extract data without parsing it.
+
+        Args:
+            url (str): The URL to fetch.
+            stop_at (Optional[bytes]): Marker after which the rest of the body isn't needed, e.g. b'</head>'.
+
+        Returns:
+            bytes: The response body.
+
+        '''
+        return await self.__single_flight.do(('bytes', url, stop_at), lambda: self.__get_content(url, stop_at))
+
+    #
+    #
+    #
+
+    async def __scrape(self, url: str, parse_only: Optional[SoupStrainer], stop_at: Optional[bytes]) -> Optional[BeautifulSoup]:
+        '''Request and parse the HTML content of a URL.'''
+        content = await self.__get_content(url, stop_at)
+        if content:
+            return self.__html_parser.parse(content, parse_only)
+
+        return None
+
+    #
+    #
+    #
+
+    async def __scrape_page(self, url: str, parse_only: Optional[SoupStrainer], stop_at: Optional[bytes]) -> tuple[Optional[BeautifulSoup], str]:
+        '''Request and parse the HTML content of a URL, with the outcome of the request.'''
+        content, outcome = await self.__get_content_outcome(url, stop_at)
+        if content:
+            return self.__html_parser.parse(content, parse_only), outcome
+
+        return None, outcome
+
+    #
+    #
+    #
+
+    async def __fetch(self, url: str) -> Optional[list]:
+        '''Request and parse the JSON data of a URL.'''
+        content = await self.__get_content(url)
+        if content:
+            return self.__parse_json(content)
+
+        return None
+
+    #
+    #
+    #
+
+    async def __get_content(self, url: str, stop_at: Optional[bytes] = None) -> Optional[bytes]:
+        '''
+        Send a GET request to a URL, see __get_content_outcome.
+
+        Args:
+            url (str): The URL to send the request to.
+            stop_at (Optional[bytes]): Marker after which the download is stopped.
+
+        Returns:
+            bytes: The response body.
+
+        '''
+        content, _ = await self.__get_content_outcome(url, stop_at)
+
+        return content
+
+    #
+    #
+    #
+
+    async def __get_content_outcome(self, url: str, stop_at: Optional[bytes] = None) -> tuple[Optional[bytes], str]:
+        '''
+        Send a GET request to a URL through the connection pool of its host,
+        or serve it from the response cache.
+
+        Failed attempts are retried after a non-blocking backoff as long as the
+        error is retryable and the retry policy's attempts and deadline allow it.
+
+        Args:
+            url (str): The URL to send the request to.
+            stop_at (Optional[bytes]): Marker after which the download is stopped.
+
+        Returns:
+            tuple[Optional[bytes], str]: The response body and the outcome, 'ok', 'blocked' or 'failed'.
+
+        '''
+        cache = self.__cache
+        conditional_headers = {}
+
+        if cache:
+            content, conditional_headers = cache.lookup(url)
+
+            if content is not None:
+                return content, 'ok'
+
+        host = urlsplit(url).hostname or ''
+
+        quarantine = self.__quarantine if self.__quarantine and self.__quarantine.applies_to(url) else None
+
+        quarantined = quarantine.is_quarantined(url) if quarantine else None
+
+        if quarantined:
+            return None, 'failed'
+
+        policy = self.__retry_policy
+        started_at = monotonic()
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            if self.__circuit_breaker and not self.__circuit_breaker.allow(host):
+                return None, 'failed'
+
+            try:
+                content = await self.__request(url, host, conditional_headers, stop_at)
+
+                if quarantined is not None:
+                    quarantine.release(url)
+
+                return content, 'ok'
+            except httpx.HTTPError as err:
+                error = err
+
+            delay = policy.next_delay(attempt, started_at) if policy and policy.is_retryable(error) else None
+
+            if delay is not None:
+                await sleep(delay)
+                continue
+
+            self.__log.error(f'{error.__class__.__name__}: {error} ({url})')
+
+            if quarantine:
+                self.__report_failure(quarantine, url, error)
+
+            if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in self.__blocking_statuses:
+                return None, 'blocked'
+
+            return None, 'failed'
+
+    #
+    #
+    #
+
+    async def __request(self, url: str, host: str, conditional_headers: dict[str, str], stop_at: Optional[bytes]) -> bytes:
+        '''
+        Make a single request attempt, reporting its outcome to the rate limiter,
+        the circuit breaker and the response cache.
+
+        Args:
+            url (str): The URL to send the request to.
+            host (str): The host name of the URL.
+            conditional_headers (dict[str, str]): Headers revalidating a cached response.
+            stop_at (Optional[bytes]): Marker after which the download is stopped.
+
+        Returns:
+            bytes: The response body.
+
+        Raises:
+            httpx.HTTPError: If the request failed, returned an error status or a content type which isn't allowed.
+
+        '''
+        cache = self.__cache
+        client = self.__get_client(url)
+        headers = self.__host_headers(host)
+
+        response, content, complete = await self.__send(client, url, host, {**headers, **conditional_headers}, stop_at)
+
+        if cache and conditional_headers and response.status_code == 304:
+            cached = cache.revalidate(url, response.headers)
+
+            if cached is not None:
+                return cached
+
+            # The cached body is gone, request it unconditionally.
+            response, content, complete = await self.__send(client, url, host, headers, stop_at)
+
+        response.raise_for_status()
+
+        if not self.__is_allowed_type(response):
+            self.__stream_stats['rejected'] += 1
+            raise UnsupportedContentTypeError(f'Unsupported content type {response.headers.get("Content-Type")}')
+
+        # A partial body must not be served to callers which need the whole of it.
+        if cache and complete:
+            cache.store(url, content, response.headers)
+
+        return content
+
+    #
+    #
+    #
+
+    async def __send(self, client: httpx.AsyncClient, url: str, host: str, headers: dict[str, str], stop_at: Optional[bytes]) -> tuple[httpx.Response, bytes, bool]:
+        '''
+        Send a request within the rate limit and deadline of its host, reporting its outcome to the rate limiter
+        and the circuit breaker.
+
+        Args:
+            client (httpx.AsyncClient): The client of the host.
+            url (str): The URL to send the request to.
+            host (str): The host name of the URL.
+            headers (dict[str, str]): The request headers.
+            stop_at (Optional[bytes]): Marker after which the download is stopped.
+
+        Returns:
+            tuple[httpx.Response, bytes, bool]: The response, its body and whether the body is complete.
+
+        Raises:
+            httpx.TransportError: If the request failed, an overrun deadline is raised as httpx.TimeoutException.
+
+        '''
+        if self.__rate_limiter:
+            await self.__rate_limiter.acquire(host)
+
+        try:
+            response, content, complete = await wait_for(self.__stream(client, url, headers, stop_at), self.__deadline_sec)
+        except (httpx.TransportError, TimeoutError) as err:
+            if self.__circuit_breaker:
+                self.__circuit_breaker.record(host, success=False)
+
+            if isinstance(err, TimeoutError):
+                raise httpx.TimeoutException(f'Request deadline of {self.__deadline_sec}s exceeded') from err
+
+            raise
+
+        if self.__rate_limiter:
+            self.__rate_limiter.on_response(host, response.status_code, response.headers.get('Retry-After'))
+
+        if self.__circuit_breaker:
+            self.__circuit_breaker.record(host, success=response.status_code < 500)
+
+        return response, content, complete
+
+    #
+    #
+    #
+
+    async def __stream(self, client: httpx.AsyncClient, url: str, headers: dict[str, str], stop_at: Optional[bytes]) -> tuple[httpx.Response, bytes, bool]:
+        '''
+        Send a streamed GET request and read its body up to the size cap, or until the stop marker was read.
+
+        The body of error responses and of content types which aren't allowed is not read.
+
+        Args:
+            client (httpx.AsyncClient): The client of the URL's host.
+            url (str): The URL to send the request to.
+            headers (dict[str, str]): The request headers.
+            stop_at (Optional[bytes]): Marker after which the download is stopped.
+
+        Returns:
+            tuple[httpx.Response, bytes, bool]: The response, the body read and whether the body is complete.
+
+        '''
+        async with client.stream('GET', url, headers=headers) as response:
+            if not response.is_success or not self.__is_allowed_type(response):
+                return response, b'', False
+
+            body = bytearray()
+
+            async for chunk in response.aiter_bytes():
+                body += chunk
+
+                if len(body) > self.__max_body_bytes:
+                    self.__stream_stats['truncated'] += 1
+                    return response, bytes(body[: self.__max_body_bytes]), False
+
+                # Only search the new chunk, plus the overlap a marker split between two chunks needs.
+                if stop_at and body.find(stop_at, max(len(body) - len(chunk) - len(stop_at), 0)) != -1:
+                    self.__stream_stats['stopped_early'] += 1
+                    return response, bytes(body), False
+
+            return response, bytes(body), True
+
+    #
+    #
+    #
+
+    def __host_headers(self, host: str) -> dict[str, str]:
+        '''
+        Get the request headers of a host, with the cookies stored for it.
+
+        Args:
+            host (str): The host name of the URL.
+
+        Returns:
+            dict[str, str]: The request headers.
+
+        '''
+        cookie = self.__cookie_store.header(host) if self.__cookie_store else None
+
+        if not cookie:
+            return self.__headers
+
+        return {**self.__headers, 'Cookie': cookie}
+
+    #
+    #
+    #
+
+    def __is_allowed_type(self, response: httpx.Response) -> bool:
+        '''
+        Check whether the content type of a response is allowed, responses without one are.
+
+        Args:
+            response (httpx.Response): The response.
+
+        Returns:
+            bool: True if the body may be downloaded.
+
+        '''
+        content_type = response.headers.get('Content-Type')
+
+        if self.__content_types is None or not content_type:
+            return True
+
+        return content_type.split(';')[0].strip().lower() in self.__content_types
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __report_failure(quarantine: LinkQuarantine, url: str, error: httpx.HTTPError) -> None:
+        '''
+        Count the failure of a link in the quarantine, throttling responses are
+        left to the rate limiter since they don't tell anything about the link.
+        '''
+        if not isinstance(error, httpx.HTTPStatusError):
+            quarantine.report_failure(url, error=error.__class__.__name__)
+            return
+
+        status = error.response.status_code
+
+        if status in (429, 503):
+            return
+
+        quarantine.report_failure(url, error=f'HTTP {status}', dead=status in (404, 410))
+
+    #
+    #
+    #
+
+    def __get_client(self, url: str) -> httpx.AsyncClient:
+        '''
+        Get the pooled client of a URL's host, creating it on first use.
+
+        Args:
+            url (str): The request URL.
+
+        Returns:
+            httpx.AsyncClient: The client of the host.
+
+        '''
+        parts = urlsplit(url)
+        host = f'{parts.scheme}://{parts.netloc}'
+
+        client = self.__clients.get(host)
+
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(http2=self.__http2, limits=self.__limits, timeout=self.__timeout, follow_redirects=True)
+            self.__clients[host] = client
+
+        return client
+
+    #
+    #
+    #
+
+    def __parse_json(self, content: bytes) -> Optional[list]:
+        '''
+        Parse JSON data from the response.
+
+        Args:
+            content (bytes): The response body to parse.
+
+        Returns:
+            dict: A dictionary representing the parsed JSON data.
+
+        '''
+        try:
+            json_data: Union[list, None] = json.loads(content.decode('utf-8'))
+
+            return json_data
+
+        except (json.JSONDecodeError, ValueError) as err:
+            self.__log.error(err)
+            return None
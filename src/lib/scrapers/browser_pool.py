@@ -0,0 +1,410 @@
+from time import monotonic
+from asyncio import Lock, Semaphore
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+from user_agent import generate_user_agent
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from playwright.async_api import Error as PlaywrightError
+
+from lib.logger import Logger
+from lib.base_classes.config import Config
+from lib.scrapers.create_pw_headers import create_pw_headers
+from lib.scrapers.request_blocker import RequestBlocker
+
+
+class PooledBrowser:
+    """
+    A browser of the BrowserPool and its recycled contexts.
+
+    Attributes:
+        browser (Browser): The Playwright browser.
+        launched_at (float): Monotonic time of the launch.
+        uses (int): The number of contexts leased from the browser.
+        active (int): The number of contexts currently leased.
+        idle_contexts (list[tuple[BrowserContext, int]]): Contexts ready for reuse, with their number of uses.
+        retiring (bool): Whether the browser is closed once its leased contexts are returned.
+    """
+
+    def __init__(self, browser: Browser) -> None:
+        """
+        Initialize a PooledBrowser.
+        """
+        self.browser = browser
+        self.launched_at = monotonic()
+        self.uses = 0
+        self.active = 0
+        self.idle_contexts: list[tuple[BrowserContext, int]] = []
+        self.retiring = False
+
+
+#
+#
+#
+
+
+class BrowserPool:
+    """
+    Long-lived pool of Playwright Chromium browsers.
+
+    The browsers are launched on first use and shared by all scrapes, so a JS-heavy page costs a page load instead of
+    a browser launch. A semaphore caps the number of contexts leased at once, i.e. of concurrently open pages. Returned
+    contexts are cleared of their pages and cookies and reused a number of times before they are closed, which also
+    rotates their user agent. A browser is restarted after a number of leases or an age, and when it crashed, to bound
+    the memory it accumulates. A retiring browser is replaced right away and closed once its leases are returned.
+    With a request blocker, every context aborts the requests of unused resources and trackers.
+
+    Args:
+        browsers (int): The number of browsers (default: 2).
+        max_pages (int): The maximum number of contexts leased at once (default: 4).
+        context_max_uses (int): The number of leases after which a context is closed instead of reused (default: 20).
+        restart_after_uses (int): The number of leases after which a browser is restarted (default: 500).
+        restart_after_sec (float): The age in seconds after which a browser is restarted (default: 1 hour).
+        timeout_ms (float): The default navigation and action timeout of pages in milliseconds (default: 60000).
+        request_blocker (Optional[RequestBlocker]): Request interception installed in every context.
+
+    Methods:
+        context: Lease a browser context.
+        page: Lease a browser context and open a page in it.
+        new_page: Open a page in a leased context.
+        stats: Get the launch, restart and lease counters.
+        close: Close all browsers.
+
+    Example Usage:
+        pool = BrowserPool(browsers=2, max_pages=4)
+
+        async with pool.page() as page:
+            await page.goto(url)
+
+        await pool.close()
+    """
+
+    def __init__(
+        self,
+        browsers: int = 2,
+        max_pages: int = 4,
+        context_max_uses: int = 20,
+        restart_after_uses: int = 500,
+        restart_after_sec: float = 3600,
+        timeout_ms: float = 60000,
+        request_blocker: Optional[RequestBlocker] = None,
+    ) -> None:
+        """
+        Initialize the BrowserPool, the browsers are launched on first use.
+        """
+        self.__size = browsers
+        self.__context_max_uses = context_max_uses
+        self.__restart_after_uses = restart_after_uses
+        self.__restart_after_sec = restart_after_sec
+        self.__timeout_ms = timeout_ms
+        self.__request_blocker = request_blocker
+
+        self.__semaphore = Semaphore(max_pages)
+        self.__lock = Lock()
+
+        self.__driver: Any = None
+        self.__browsers: list[PooledBrowser] = []
+
+        self.__stats = {'launches': 0, 'restarts': 0, 'contexts': 0, 'leases': 0}
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+    #
+    #
+    #
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """
+        Lease a browser context, waiting while the maximum number of contexts is leased.
+
+        The context is returned to the pool when the block exits, pages left open in it are closed.
+
+        Yields:
+            BrowserContext: The leased context.
+
+        Raises:
+            PlaywrightError: If a browser or context couldn't be created.
+        """
+        async with self.__semaphore:
+            pooled, context, uses = await self.__lease()
+
+            try:
+                yield context
+
+            finally:
+                await self.__release(pooled, context, uses)
+
+    #
+    #
+    #
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Lease a browser context and open a page in it.
+
+        Yields:
+            Page: The page, closed when the block exits.
+
+        Raises:
+            PlaywrightError: If a browser, context or page couldn't be created.
+        """
+        async with self.context() as context:
+            page = await self.new_page(context)
+
+            try:
+                yield page
+
+            finally:
+                await self.__close_quietly(page)
+
+    #
+    #
+    #
+
+    async def new_page(self, context: BrowserContext) -> Page:
+        """
+        Open a page in a leased context.
+
+        Args:
+            context (BrowserContext): The leased context.
+
+        Returns:
+            Page: A new page with the pool's default timeouts.
+        """
+        page = await context.new_page()
+        page.set_default_navigation_timeout(self.__timeout_ms)
+        page.set_default_timeout(self.__timeout_ms)
+
+        return page
+
+    #
+    #
+    #
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the pool counters.
+
+        Returns:
+            dict[str, int]: Browser launches and restarts, contexts created and contexts leased.
+        """
+        return dict(self.__stats)
+
+    #
+    #
+    #
+
+    async def close(self) -> None:
+        """
+        Close all browsers and stop the Playwright driver.
+        """
+        async with self.__lock:
+            browsers, self.__browsers = self.__browsers, []
+
+            for pooled in browsers:
+                await self.__close_quietly(pooled.browser)
+
+            if self.__driver is not None:
+                self.__log.info(f'Browser pool: {self.__stats}')
+
+                if self.__request_blocker:
+                    self.__log.info(f'Blocked browser requests: {self.__request_blocker.stats()}')
+
+                await self.__driver.stop()
+                self.__driver = None
+
+    #
+    #
+    #
+
+    async def __lease(self) -> tuple[PooledBrowser, BrowserContext, int]:
+        """
+        Lease a recycled or new context of the least busy browser.
+
+        Returns:
+            tuple[PooledBrowser, BrowserContext, int]: The browser, the context and the context's previous uses.
+        """
+        async with self.__lock:
+            pooled = await self.__least_busy()
+
+            pooled.active += 1
+            pooled.uses += 1
+
+        self.__stats['leases'] += 1
+
+        if pooled.idle_contexts:
+            context, uses = pooled.idle_contexts.pop()
+            return pooled, context, uses
+
+        try:
+            context = await pooled.browser.new_context(**create_pw_headers(), user_agent=generate_user_agent())
+
+            if self.__request_blocker:
+                await self.__request_blocker.install(context)
+
+        except PlaywrightError:
+            pooled.active -= 1
+            raise
+
+        self.__stats['contexts'] += 1
+
+        return pooled, context, 0
+
+    #
+    #
+    #
+
+    async def __release(self, pooled: PooledBrowser, context: BrowserContext, uses: int) -> None:
+        """
+        Return a leased context to its browser, or close it after its last use, and restart the browser when due.
+
+        Args:
+            pooled (PooledBrowser): The browser of the context.
+            context (BrowserContext): The returned context.
+            uses (int): The context's uses before this lease.
+        """
+        pooled.active -= 1
+
+        recycled = False
+
+        if not pooled.retiring and uses + 1 < self.__context_max_uses and pooled.browser.is_connected():
+            try:
+                for page in context.pages:
+                    await page.close()
+
+                await context.clear_cookies()
+
+                pooled.idle_contexts.append((context, uses + 1))
+                recycled = True
+
+            except PlaywrightError:
+                pass
+
+        if not recycled:
+            await self.__close_quietly(context)
+
+        async with self.__lock:
+            if not pooled.retiring and self.__is_due(pooled):
+                await self.__retire(pooled)
+
+        if pooled.retiring and pooled.active == 0:
+            await self.__close_quietly(pooled.browser)
+
+    #
+    #
+    #
+
+    async def __least_busy(self) -> PooledBrowser:
+        """
+        Get the browser with the fewest leased contexts, launching and replacing browsers as needed.
+
+        Must be called holding the lock.
+
+        Returns:
+            PooledBrowser: The browser.
+        """
+        if self.__driver is None:
+            self.__driver = await async_playwright().start()
+
+        for pooled in [pooled for pooled in self.__browsers if not pooled.browser.is_connected()]:
+            self.__log.warn('Browser disconnected, restarting it')
+            await self.__retire(pooled)
+
+        while len(self.__browsers) < self.__size:
+            self.__browsers.append(await self.__launch())
+
+        return min(self.__browsers, key=lambda pooled: pooled.active)
+
+    #
+    #
+    #
+
+    async def __launch(self) -> PooledBrowser:
+        """
+        Launch a browser.
+
+        Returns:
+            PooledBrowser: The launched browser.
+        """
+        browser = await self.__driver.chromium.launch()
+
+        self.__stats['launches'] += 1
+
+        return PooledBrowser(browser)
+
+    #
+    #
+    #
+
+    async def __retire(self, pooled: PooledBrowser) -> None:
+        """
+        Replace a browser with a new one, it is closed once its leased contexts are returned.
+
+        Must be called holding the lock.
+
+        Args:
+            pooled (PooledBrowser): The browser to retire.
+        """
+        pooled.retiring = True
+
+        idle_contexts, pooled.idle_contexts = pooled.idle_contexts, []
+
+        for context, _ in idle_contexts:
+            await self.__close_quietly(context)
+
+        self.__browsers.remove(pooled)
+        self.__browsers.append(await self.__launch())
+
+        self.__stats['restarts'] += 1
+
+        if pooled.active == 0:
+            await self.__close_quietly(pooled.browser)
+
+    #
+    #
+    #
+
+    def __is_due(self, pooled: PooledBrowser) -> bool:
+        """
+        Check whether a browser is due for a restart, after its maximum number of uses or age, or when it crashed.
+
+        Args:
+            pooled (PooledBrowser): The browser.
+
+        Returns:
+            bool: True if the browser should be restarted.
+        """
+        if not pooled.browser.is_connected():
+            return True
+
+        return pooled.uses >= self.__restart_after_uses or monotonic() - pooled.launched_at >= self.__restart_after_sec
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    async def __close_quietly(closable: Optional[Any]) -> None:
+        """
+        Close a browser, context or page, ignoring errors of already closed or crashed ones.
+
+        Args:
+            closable (Optional[Any]): The Playwright object to close.
+        """
+        try:
+            await closable.close()
+
+        except PlaywrightError:
+            pass
+
+
+browser_pool_singleton = BrowserPool(
+    browsers=Config.browser_pool_size,
+    max_pages=Config.browser_max_pages,
+    context_max_uses=Config.browser_context_max_uses,
+    restart_after_uses=Config.browser_restart_after_uses,
+    restart_after_sec=Config.browser_restart_after_sec,
+    request_blocker=RequestBlocker(resource_types=Config.browser_blocked_resource_types, domains=Config.browser_blocked_domains),
+)
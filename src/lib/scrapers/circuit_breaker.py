@@ -0,0 +1,122 @@
+from time import monotonic
+
+from lib.logger import Logger
+
+
+class HostCircuit:
+    """
+    Circuit state of a single host.
+
+    Attributes:
+        failures (int): The number of consecutive failed requests.
+        open_until (float): Monotonic time until which requests are rejected, 0 while the circuit is closed.
+        cooldown_sec (float): The duration of the next open period.
+    """
+
+    def __init__(self, cooldown_sec: float) -> None:
+        """
+        Initialize a closed HostCircuit.
+        """
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown_sec = cooldown_sec
+
+
+#
+#
+#
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker of the fetch layer.
+
+    After a number of consecutive failures of a host, i.e. connection errors, timeouts and 5xx responses, its circuit
+    opens and requests to the host are rejected right away instead of waiting for more timeouts. Once the cooldown has
+    passed, a single probe request is let through (half-open), its success closes the circuit, its failure opens it
+    again with a doubled cooldown.
+
+    Args:
+        failure_threshold (int): The number of consecutive failures which open a host's circuit (default: 5).
+        cooldown_sec (float): The first open period in seconds (default: 60).
+        max_cooldown_sec (float): The maximum open period in seconds (default: 30 min).
+
+    Methods:
+        allow: Check whether a request to a host may be sent.
+        record: Record the outcome of a request to a host.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown_sec: float = 60, max_cooldown_sec: float = 1800) -> None:
+        """
+        Initialize the CircuitBreaker.
+        """
+        self.__failure_threshold = failure_threshold
+        self.__cooldown_sec = cooldown_sec
+        self.__max_cooldown_sec = max_cooldown_sec
+
+        self.__circuits: dict[str, HostCircuit] = {}
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+    #
+    #
+    #
+
+    def allow(self, host: str) -> bool:
+        """
+        Check whether a request to a host may be sent.
+
+        Args:
+            host (str): The host name.
+
+        Returns:
+            bool: False while the host's circuit is open, or while its half-open probe is in flight.
+        """
+        circuit = self.__circuits.get(host)
+
+        if circuit is None or not circuit.open_until:
+            return True
+
+        now = monotonic()
+
+        if now < circuit.open_until:
+            return False
+
+        # Let this request through as the probe and hold the others back, also if the probe never reports back.
+        circuit.open_until = now + circuit.cooldown_sec
+
+        return True
+
+    #
+    #
+    #
+
+    def record(self, host: str, success: bool) -> None:
+        """
+        Record the outcome of a request to a host.
+
+        Args:
+            host (str): The host name.
+            success (bool): Whether the host responded, any response below 500 counts as a success.
+        """
+        circuit = self.__circuits.setdefault(host, HostCircuit(self.__cooldown_sec))
+
+        was_open = bool(circuit.open_until)
+
+        if success:
+            if was_open:
+                self.__log.info(f'{host} circuit closed')
+
+            circuit.failures = 0
+            circuit.open_until = 0.0
+            circuit.cooldown_sec = self.__cooldown_sec
+            return
+
+        circuit.failures += 1
+
+        if was_open or circuit.failures >= self.__failure_threshold:
+            circuit.open_until = monotonic() + circuit.cooldown_sec
+
+            self.__log.warn(f'{host} circuit open for {circuit.cooldown_sec:.0f}s after {circuit.failures} failures')
+
+            circuit.cooldown_sec = min(circuit.cooldown_sec * 2, self.__max_cooldown_sec)
@@ -0,0 +1,203 @@
+import os
+import json
+from time import time
+from asyncio import Lock
+from typing import Any, Awaitable, Callable, Optional
+
+from lib.logger import Logger
+from lib.base_classes.config import Config
+
+
+class CookieStore:
+    """
+    Persistent per-host cookie jars with expiry tracking.
+
+    Each host's jar holds the cookies harvested for it, i.e. by a browser accepting a cookie banner, and expires with
+    its first expiring cookie. Session cookies, which have no expiry, are kept for a fixed time. The jars are saved to
+    a JSON file, so the cookies outlive restarts and a browser is only launched again once a jar has expired.
+
+    Args:
+        path (str): The JSON file of the jars.
+        session_ttl_sec (float): The time in seconds session cookies are kept (default: 24 hours).
+
+    Methods:
+        header: Get the Cookie header of a host's unexpired jar.
+        save: Replace the jar of a host.
+        get_or_refresh: Get the Cookie header of a host, refreshing an expired or missing jar.
+
+    Example Usage:
+        store = CookieStore('data/cookies.json')
+        cookie = await store.get_or_refresh(host, lambda: harvest_cookies(url))
+    """
+
+    def __init__(self, path: str, session_ttl_sec: float = 24 * 3600) -> None:
+        """
+        Initialize the CookieStore, the jars are loaded on first use.
+        """
+        self.__path = path
+        self.__session_ttl_sec = session_ttl_sec
+
+        self.__jars: Optional[dict[str, dict[str, Any]]] = None
+        self.__locks: dict[str, Lock] = {}
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+    #
+    #
+    #
+
+    def header(self, host: str) -> Optional[str]:
+        """
+        Get the Cookie header of a host's jar, if it hasn't expired.
+
+        Args:
+            host (str): The host name.
+
+        Returns:
+            Optional[str]: The Cookie header value, None if the host has no unexpired jar.
+        """
+        jar = self.__get_jars().get(self.__normalize(host))
+
+        if jar is None or jar['expires_at'] <= time():
+            return None
+
+        return '; '.join(f"{cookie['name']}={cookie['value']}" for cookie in jar['cookies'])
+
+    #
+    #
+    #
+
+    def save(self, host: str, cookies: list[dict[str, Any]]) -> None:
+        """
+        Replace the jar of a host with the cookies set for it, cookies of other domains are dropped.
+
+        Args:
+            host (str): The host name.
+            cookies (list[dict[str, Any]]): Cookies in the Playwright format, with name, value, domain and expires keys.
+        """
+        host = self.__normalize(host)
+        now = time()
+
+        own_cookies = [
+            {'name': cookie['name'], 'value': cookie['value'], 'expires': cookie.get('expires', -1)}
+            for cookie in cookies
+            if self.__matches(host, cookie.get('domain', host))
+        ]
+
+        expires = [cookie['expires'] for cookie in own_cookies if cookie['expires'] and cookie['expires'] > 0]
+
+        expires_at = min(expires + [now + self.__session_ttl_sec])
+
+        jars = self.__get_jars()
+        jars[host] = {'cookies': own_cookies, 'expires_at': expires_at}
+
+        self.__write(jars)
+
+    #
+    #
+    #
+
+    async def get_or_refresh(self, host: str, refresh: Callable[[], Awaitable[list[dict[str, Any]]]]) -> Optional[str]:
+        """
+        Get the Cookie header of a host, refreshing its jar if it expired or is missing.
+
+        Concurrent callers for the same host share a single refresh.
+
+        Args:
+            host (str): The host name.
+            refresh (Callable[[], Awaitable[list[dict[str, Any]]]]): Coroutine function harvesting new cookies.
+
+        Returns:
+            Optional[str]: The Cookie header value, None if the host has no cookies. An empty jar is kept until it
+                expires too, so hosts setting no cookies aren't refreshed on every call.
+        """
+        cookie = self.header(host)
+
+        if cookie is not None:
+            return cookie or None
+
+        async with self.__locks.setdefault(self.__normalize(host), Lock()):
+            cookie = self.header(host)
+
+            if cookie is not None:
+                return cookie or None
+
+            self.__log.info(f'Refreshing the cookies of {host}')
+
+            self.save(host, await refresh())
+
+            return self.header(host) or None
+
+    #
+    #
+    #
+
+    def __get_jars(self) -> dict[str, dict[str, Any]]:
+        """
+        Get the jars, loading them from the file on first use.
+        """
+        if self.__jars is None:
+            try:
+                with open(self.__path, 'rb') as file:
+                    self.__jars = json.loads(file.read())
+
+            except (OSError, ValueError):
+                self.__jars = {}
+
+        return self.__jars
+
+    #
+    #
+    #
+
+    def __write(self, jars: dict[str, dict[str, Any]]) -> None:
+        """
+        Write the jars to the file atomically, dropping the expired ones.
+        """
+        now = time()
+
+        self.__jars = {host: jar for host, jar in jars.items() if jar['expires_at'] > now}
+
+        temp_path = f'{self.__path}.tmp'
+
+        try:
+            os.makedirs(os.path.dirname(self.__path) or '.', exist_ok=True)
+
+            with open(temp_path, 'w') as file:
+                json.dump(self.__jars, file)
+
+            os.replace(temp_path, self.__path)
+
+        except OSError as err:
+            self.__log.error(f'Failed to save cookies: {err}')
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __matches(host: str, domain: str) -> bool:
+        """
+        Check whether a cookie domain applies to a host.
+        """
+        domain = CookieStore.__normalize(domain.lstrip('.'))
+
+        return host == domain or host.endswith(f'.{domain}')
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __normalize(host: str) -> str:
+        """
+        Get the jar key of a host, without a leading www.
+        """
+        host = host.lower()
+
+        return host[4:] if host.startswith('www.') else host
+
+
+cookie_store_singleton = CookieStore(Config.cookie_store_path, session_ttl_sec=Config.cookie_session_ttl_sec)
@@ -0,0 +1,54 @@
+from importlib.util import find_spec
+from typing import Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from lib.logger import Logger
+
+
+class HtmlParser:
+    '''
+    HTML parser backend of the request handlers.
+
+    Uses the C based lxml parser when it is installed and falls back to Python's
+    html.parser otherwise. Callers which only need a few elements of a page pass a
+    SoupStrainer, then only the matching elements and their descendants are built
+    into the tree, which saves most of the parse time and memory of large pages.
+
+    Args:
+        backend (str): The preferred parser, 'lxml' or 'html.parser' (default: 'lxml').
+
+    Methods:
+        parse: Parse an HTML document, optionally only the elements matching a strainer.
+
+    Example Usage:
+        parser = HtmlParser()
+        soup = parser.parse(content, parse_only=SoupStrainer('a', href=True))
+    '''
+
+    def __init__(self, backend: str = 'lxml') -> None:
+        '''Initialize the HtmlParser with the preferred backend, if it is installed.'''
+        self.backend = backend if backend == 'html.parser' or find_spec(backend) is not None else 'html.parser'
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+    #
+    #
+    #
+
+    def parse(self, content: bytes, parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+        '''
+        Parse an HTML document.
+
+        Args:
+            content (bytes): The HTML document.
+            parse_only (Optional[SoupStrainer]): Strainer selecting the elements to build, the whole document if None.
+
+        Returns:
+            BeautifulSoup: A BeautifulSoup object representing the parsed HTML, None if parsing failed.
+
+        '''
+        try:
+            return BeautifulSoup(content, self.backend, parse_only=parse_only)
+
+        except Exception as err:
+            self.__log.error(err)
+            return None
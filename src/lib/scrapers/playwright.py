@@ -1,48 +1,50 @@
 from asyncio import create_task, as_completed
 from typing import Callable, Awaitable, Coroutine, Any, Iterable, Dict, Union
 from user_agent import generate_user_agent
-from playwright.async_api._generated import Page, Browser
-from playwright.async_api import async_playwright
+from playwright.async_api._generated import Page
 
 from playwright.sync_api import sync_playwright
 from functools import wraps
+from urllib.parse import urlsplit
 
 from .create_pw_headers import create_pw_headers
+from .browser_pool import BrowserPool, browser_pool_singleton
+from .cookie_store import cookie_store_singleton
 
 
 class Playwright:
     """
     Playwright utility class for web scraping with Playwright.
 
-    This class provides methods for setting up Playwright, creating contexts, pages, and scraping data.
+    This class provides methods for scraping data with the browsers of a long-lived BrowserPool, every job leases a
+    recycled context of the pool instead of launching a browser.
 
     Attributes:
-        browser (Browser): An instance of the Playwright browser.
+        pool (BrowserPool): The browser pool.
         queue (dict[str, Any]): A dictionary for managing queued tasks.
 
     Methods:
-        __init__: Initializes a Playwright instance with a browser.
+        __init__: Initializes a Playwright instance with a browser pool.
         use_sync_playwright: Decorator to use Playwright in a synchronous manner.
-        use_async_playwright: Decorator to use Playwright in an asynchronous manner.
-        create_context: Creates a new Playwright context with configurations.
-        new_page: Creates a new Playwright page in the current context.
+        use_async_playwright: Decorator to use a context of the shared browser pool in an asynchronous manner.
         scrape: Scrapes data using a provided job callback.
         create_tasks: Creates and runs asynchronous tasks for scraping multiple jobs concurrently.
-        get_cookie_async: Retrieves a cookie asynchronously from a given URL.
+        get_cookie_async: Retrieves the cookies of a URL's host from the cookie store, harvesting them when they expired.
+        harvest_cookies_async: Harvests the cookies a URL sets in a browser page.
 
     Example Usage:
-        playwright = Playwright(browser)
+        playwright = Playwright(browser_pool_singleton)
         data = await playwright.scrape(job_callback)
     """
 
-    def __init__(self, browser: Browser) -> None:
+    def __init__(self, pool: BrowserPool = browser_pool_singleton) -> None:
         '''
         Initialize a Scraper instance.
 
         Args:
-            browser: An instance of the Playwright browser.
+            pool: The browser pool, the process-wide pool by default.
         '''
-        self.__browser: Browser = browser
+        self.__pool: BrowserPool = pool
         self.__queue: dict = {}
 
     #
@@ -97,7 +99,7 @@ class Playwright:
         """
         Decorator to use Playwright in an asynchronous manner.
 
-        This decorator creates an asynchronous Playwright environment and launches a context manager for a Chromium browser to execute the decorated function asynchronously.
+        This decorator leases a browser context of the shared browser pool to execute the decorated function asynchronously, the context is returned to the pool afterwards.
 
         Args:
             func (Callable): The asynchronous function to be decorated.
@@ -113,20 +115,9 @@ class Playwright:
 
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            async with async_playwright() as pw:
-                headers: Dict[str, Any] = create_pw_headers()
-                user_agent = generate_user_agent()
-
-                browser = await pw.chromium.launch()
-                context = await browser.new_context(
-                    **headers,
-                    user_agent=user_agent,
-                )
-
+            async with browser_pool_singleton.context() as context:
                 result = await func(*args, **kwargs, context=context)
 
-                await browser.close()
-
             return result
 
         return wrapper
@@ -135,45 +126,6 @@ class Playwright:
     #
     #
 
-    async def create_context(self) -> None:
-        '''
-        Create a new Playwright context. And set it up with configurations
-
-        Raises:
-            PlaywrightError: If there is an error creating the context.
-        '''
-        headers: Dict[str, Any] = create_pw_headers()
-        user_agent = generate_user_agent()
-        self.context = await self.__browser.new_context(
-            **headers,
-            user_agent=user_agent,
-        )
-
-    #
-    #
-    #
-
-    async def new_page(self) -> Page:
-        '''
-        Create a new Playwright page in the current context.
-
-        Returns:
-            Page: A new Playwright Page object which represents a new tab in
-            the browser.
-
-        Raises:
-            PlaywrightError: If there is an error creating the page.
-        '''
-        page: Page = await self.context.new_page()
-        page.set_default_navigation_timeout(60000)
-        page.set_default_timeout(60000)
-
-        return page
-
-    #
-    #
-    #
-
     async def scrape(
         self,
         job_callback: Callable[[Callable[[], Awaitable[Page]]], Awaitable[str]],
@@ -181,15 +133,17 @@ class Playwright:
         '''
         Scrape data using a provided job_callback.
 
+        The job_callback is given a function opening pages in a context leased from the browser pool,
+        which is returned to the pool once the job is done.
+
         Returns:
             str: Scraping result returned by the job_callback.
 
         Raises:
             PlaywrightError: If there is an error during scraping.
         '''
-        await self.create_context()
-        data: str = await job_callback(self.new_page)
-        await self.context.close()
+        async with self.__pool.context() as context:
+            data: str = await job_callback(lambda: self.__pool.new_page(context))
 
         return data
 
@@ -220,11 +174,37 @@ class Playwright:
     #
     #
 
+    @staticmethod
+    async def get_cookie_async(url: str, cookies_accept_element: Union[str, None] = None) -> Union[str, None]:
+        """
+        Get the cookies of a URL's host asynchronously.
+
+        The cookies are served from the persistent cookie store, a browser page only harvests them again once the
+        host's cookies have expired.
+
+        Args:
+            url (str): The URL to visit and retrieve cookies from.
+            cookies_accept_element (Union[str, None], optional): Selector for the element to click for accepting cookies, if applicable (default: None).
+
+        Returns:
+            Union[str, None]: The Cookie header of the host, None if it sets no cookies.
+
+        Raises:
+            PlaywrightError: If there is an error during the cookie retrieval process.
+        """
+        host = urlsplit(url).hostname or ''
+
+        return await cookie_store_singleton.get_or_refresh(host, lambda: Playwright.harvest_cookies_async(url, cookies_accept_element))
+
+    #
+    #
+    #
+
     @staticmethod
     @use_async_playwright
-    async def get_cookie_async(url: str, cookies_accept_element: Union[str, None] = None, context={}) -> str:
+    async def harvest_cookies_async(url: str, cookies_accept_element: Union[str, None] = None, context={}) -> list[dict[str, Any]]:
         """
-        Get a cookie asynchronously from a given URL.
+        Harvest the cookies a URL sets in a browser page.
 
         Args:
             url (str): The URL to visit and retrieve cookies from.
@@ -232,7 +212,7 @@ class Playwright:
             context (dict, optional): Additional context parameters (default: {}).
 
         Returns:
-            str: The retrieved cookie value.
+            list[dict[str, Any]]: The cookies of the browser context.
 
         Raises:
             PlaywrightError: If there is an error during the cookie retrieval process.
@@ -244,6 +224,5 @@ class Playwright:
             await page.click(cookies_accept_element)
 
         cookies = await context.cookies()
-        cookie = cookies[3]['value']
 
-        return cookie
+        return cookies
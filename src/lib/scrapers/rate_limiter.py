@@ -0,0 +1,238 @@
+from time import monotonic
+from asyncio import Lock, sleep
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from lib.logger import Logger
+
+
+class TokenBucket:
+    """
+    Token bucket of a single host, refilled at an adaptive rate.
+
+    Args:
+        rate (float): The maximum request rate in requests per second, the bucket never refills faster.
+        capacity (float): The maximum number of tokens, i.e. the burst size.
+
+    Attributes:
+        rate (float): The current refill rate in requests per second.
+        max_rate (float): The configured maximum refill rate.
+        capacity (float): The maximum number of tokens.
+        tokens (float): The number of tokens currently available.
+        blocked_until (float): Monotonic time until which no request is allowed, set by Retry-After.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Initialize a full TokenBucket.
+        """
+        self.rate = rate
+        self.max_rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0.0
+
+        self.lock = Lock()
+
+        self.__updated = monotonic()
+
+    #
+    #
+    #
+
+    def refill(self) -> None:
+        """
+        Add the tokens accumulated since the last refill.
+        """
+        now = monotonic()
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+
+#
+#
+#
+
+
+class HostRateLimiter:
+    """
+    Shared rate limiter with an adaptive token bucket per host.
+
+    Every request waits for a token of its host's bucket. Buckets start at the host's configured rate, a 429 or 503
+    response halves the rate and honours the Retry-After header, every successful response adds back a fraction of
+    the configured rate (additive increase, multiplicative decrease). Each host thus converges on the highest rate it
+    accepts, without idle waits when it isn't busy.
+
+    Args:
+        default_rate (float): The maximum request rate per second of hosts without a configured rate (default: 2).
+        host_rates (Optional[dict[str, float]]): Maximum request rates per second by host name.
+        burst (float): The bucket capacity, i.e. requests allowed at once after an idle period (default: 2).
+        min_rate (float): The lowest rate a bucket backs off to (default: 0.02).
+        recovery_steps (int): The number of successful responses to recover from the minimum to the maximum rate (default: 20).
+
+    Methods:
+        acquire: Wait until a request to a host is allowed.
+        on_response: Adapt the rate of a host to a response status.
+
+    Example Usage:
+        limiter = HostRateLimiter(host_rates={'api.coingecko.com': 0.2})
+        await limiter.acquire('api.coingecko.com')
+        limiter.on_response('api.coingecko.com', 429, retry_after='60')
+    """
+
+    __throttle_statuses: tuple[int, ...] = (429, 503)
+
+    def __init__(
+        self,
+        default_rate: float = 2,
+        host_rates: Optional[dict[str, float]] = None,
+        burst: float = 2,
+        min_rate: float = 0.02,
+        recovery_steps: int = 20,
+    ) -> None:
+        """
+        Initialize the HostRateLimiter.
+        """
+        self.__default_rate = default_rate
+        self.__host_rates = {self.__normalize(host): rate for host, rate in (host_rates or {}).items()}
+        self.__burst = burst
+        self.__min_rate = min_rate
+        self.__recovery_steps = recovery_steps
+
+        self.__buckets: dict[str, TokenBucket] = {}
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+    #
+    #
+    #
+
+    async def acquire(self, host: str) -> None:
+        """
+        Wait until a request to a host is allowed and take a token of its bucket.
+
+        Requests to the same host are served in order, requests to other hosts don't wait for each other.
+
+        Args:
+            host (str): The host name of the request URL.
+        """
+        bucket = self.__get_bucket(host)
+
+        async with bucket.lock:
+            while True:
+                bucket.refill()
+
+                wait_sec = bucket.blocked_until - monotonic()
+
+                if wait_sec <= 0:
+                    if bucket.tokens >= 1:
+                        bucket.tokens -= 1
+                        return
+
+                    wait_sec = (1 - bucket.tokens) / bucket.rate
+
+                await sleep(wait_sec)
+
+    #
+    #
+    #
+
+    def on_response(self, host: str, status: int, retry_after: Optional[str] = None) -> None:
+        """
+        Adapt the rate of a host's bucket to a response status.
+
+        Args:
+            host (str): The host name of the request URL.
+            status (int): The HTTP status code of the response.
+            retry_after (Optional[str]): The Retry-After header of the response, in seconds or as an HTTP date.
+        """
+        bucket = self.__get_bucket(host)
+
+        if status in self.__throttle_statuses:
+            bucket.rate = max(bucket.rate / 2, self.__min_rate)
+            bucket.tokens = 0
+
+            delay_sec = self.__parse_retry_after(retry_after)
+
+            if delay_sec:
+                bucket.blocked_until = max(bucket.blocked_until, monotonic() + delay_sec)
+
+            self.__log.warn(f'{host} throttled ({status}), rate lowered to {bucket.rate:.3f}/s{f", retry after {delay_sec:.0f}s" if delay_sec else ""}')
+
+        elif status < 400 and bucket.rate < bucket.max_rate:
+            bucket.rate = min(bucket.rate + bucket.max_rate / self.__recovery_steps, bucket.max_rate)
+
+    #
+    #
+    #
+
+    def __get_bucket(self, host: str) -> TokenBucket:
+        """
+        Get the bucket of a host, creating it on first use.
+
+        Args:
+            host (str): The host name.
+
+        Returns:
+            TokenBucket: The bucket of the host.
+        """
+        host = self.__normalize(host)
+
+        bucket = self.__buckets.get(host)
+
+        if bucket is None:
+            rate = self.__host_rates.get(host, self.__default_rate)
+
+            bucket = TokenBucket(rate, capacity=max(min(self.__burst, rate * self.__burst), 1))
+            self.__buckets[host] = bucket
+
+        return bucket
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __normalize(host: str) -> str:
+        """
+        Normalize a host name, so www.reddit.com and reddit.com share a bucket.
+        """
+        host = host.lower()
+
+        return host[4:] if host.startswith('www.') else host
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+        """
+        Parse a Retry-After header value given in seconds or as an HTTP date.
+
+        Returns:
+            Optional[float]: The delay in seconds, None if missing or invalid.
+        """
+        if not retry_after:
+            return None
+
+        try:
+            return max(float(retry_after), 0)
+
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+
+        except (TypeError, ValueError):
+            return None
+
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
@@ -0,0 +1,114 @@
+from urllib.parse import urlsplit
+from typing import Optional
+from playwright.async_api import Route
+from playwright.async_api import Error as PlaywrightError
+
+
+class RequestBlocker:
+    """
+    Request interception of Playwright contexts, aborting the requests of resources a scrape never uses.
+
+    Requests are blocked by their resource type, i.e. images, fonts, media and stylesheets, and by their host, i.e.
+    third-party trackers and ad networks. A host is blocked when it is a denied domain or one of its subdomains.
+
+    Args:
+        resource_types (Optional[list[str]]): The Playwright resource types to block, e.g. 'image' or 'font'.
+        domains (Optional[list[str]]): The domains to block, including their subdomains.
+
+    Methods:
+        install: Route all requests of a context through the blocker.
+        blocks: Check whether a request is blocked.
+        stats: Get the counters of blocked and allowed requests.
+
+    Example Usage:
+        blocker = RequestBlocker(resource_types=['image', 'font'], domains=['doubleclick.net'])
+        await blocker.install(context)
+    """
+
+    def __init__(self, resource_types: Optional[list[str]] = None, domains: Optional[list[str]] = None) -> None:
+        """
+        Initialize the RequestBlocker.
+        """
+        self.__resource_types = frozenset(resource_types or [])
+        self.__domains = frozenset(domain.lower().lstrip('.') for domain in domains or [])
+
+        self.__stats = {'blocked': 0, 'allowed': 0}
+
+    #
+    #
+    #
+
+    async def install(self, context) -> None:
+        """
+        Route all requests of a context through the blocker.
+
+        Args:
+            context (BrowserContext): The Playwright context.
+        """
+        if self.__resource_types or self.__domains:
+            await context.route('**/*', self.__handle)
+
+    #
+    #
+    #
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        """
+        Check whether a request is blocked.
+
+        Args:
+            resource_type (str): The Playwright resource type of the request.
+            url (str): The request URL.
+
+        Returns:
+            bool: True if the resource type or a parent domain of the host is denied.
+        """
+        if resource_type in self.__resource_types:
+            return True
+
+        if not self.__domains:
+            return False
+
+        labels = (urlsplit(url).hostname or '').split('.')
+
+        return any('.'.join(labels[i:]) in self.__domains for i in range(len(labels) - 1))
+
+    #
+    #
+    #
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the counters of blocked and allowed requests.
+
+        Returns:
+            dict[str, int]: The counters.
+        """
+        return dict(self.__stats)
+
+    #
+    #
+    #
+
+    async def __handle(self, route: Route) -> None:
+        """
+        Abort a blocked request, continue all others.
+
+        Args:
+            route (Route): The intercepted request.
+        """
+        request = route.request
+
+        blocked = self.blocks(request.resource_type, request.url)
+
+        self.__stats['blocked' if blocked else 'allowed'] += 1
+
+        try:
+            if blocked:
+                await route.abort('blockedbyclient')
+            else:
+                await route.continue_()
+
+        # The page may be closed while its requests are still in flight.
+        except PlaywrightError:
+            pass
@@ -1,18 +1,33 @@
 import requests
 import json
+from asyncio import to_thread
+from urllib.parse import urlsplit
 from typing import Optional, Union, Callable, List
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from lib.logger import Logger
+from lib.scrapers.html_parser import HtmlParser
+from lib.scrapers.cookie_store import CookieStore
 
 
 class RequestsHandler:
     '''
     Handler for fetch and scrape requests using Requests library,
-    parses the respinse accordingly.
+    parses the respinse accordingly. With a cookie store every request
+    carries the unexpired cookies stored for its host.
     '''
 
-    def __init__(self, generate_headers: Callable, referers: List) -> None:
-        '''Initialize the RequestsHandler with default headers.'''
+    def __init__(
+        self,
+        generate_headers: Callable,
+        referers: List,
+        timeout: tuple[float, float] = (5, 15),
+        html_parser: str = 'lxml',
+        cookie_store: Optional[CookieStore] = None,
+    ) -> None:
+        '''Initialize the RequestsHandler with default headers, (connect, read) timeouts in seconds, the HTML parser backend and a cookie store.'''
+        self.__timeout = timeout
+        self.__cookie_store = cookie_store
+        self.__html_parser = HtmlParser(html_parser)
         self.__headers = generate_headers(referers)
         self.__referers = referers
         self.__generate_headers = generate_headers
@@ -50,7 +65,13 @@ class RequestsHandler:
 
         '''
         try:
-            response = requests.get(url, headers=self.__headers)
+            headers = self.__headers
+            cookie = self.__cookie_store.header(urlsplit(url).hostname or '') if self.__cookie_store else None
+
+            if cookie:
+                headers = {**headers, 'Cookie': cookie}
+
+            response = requests.get(url, headers=headers, timeout=self.__timeout)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as err:
@@ -62,12 +83,13 @@ class RequestsHandler:
     #
     #
 
-    def scrape_url(self, url: str) -> Optional[BeautifulSoup]:
+    def scrape_url(self, url: str, parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
         '''
         Scrape the HTML content of a URL.
 
         Args:
             url (str): The URL to scrape.
+            parse_only (Optional[SoupStrainer]): Strainer selecting the elements to parse, the whole page if None.
 
         Returns:
             BeautifulSoup: A BeautifulSoup object representing the parsed HTML.
@@ -76,7 +98,7 @@ class RequestsHandler:
 
         response = self.__get_response(url)
         if response:
-            return self.__parse_html(response)
+            return self.__html_parser.parse(response.content, parse_only)
 
         return None
 
@@ -105,24 +127,36 @@ class RequestsHandler:
     #
     #
 
-    def __parse_html(self, response) -> Optional[BeautifulSoup]:
+    async def scrape_url_async(self, url: str, parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
         '''
-        Parse the HTML content using BeautifulSoup.
+        Scrape the HTML content of a URL in a worker thread, without blocking the event loop.
 
         Args:
-            response (requests.Response): The response object to parse.
+            url (str): The URL to scrape.
+            parse_only (Optional[SoupStrainer]): Strainer selecting the elements to parse, the whole page if None.
 
         Returns:
             BeautifulSoup: A BeautifulSoup object representing the parsed HTML.
 
         '''
-        try:
-            soup: BeautifulSoup = BeautifulSoup(response.content, "html.parser")
-            return soup
+        return await to_thread(self.scrape_url, url, parse_only)
 
-        except Exception as err:
-            self.__log.error(err)
-            return None
+    #
+    #
+    #
+
+    async def fetch_json_async(self, url: str) -> Optional[list]:
+        '''
+        Fetch JSON data from a URL in a worker thread, without blocking the event loop.
+
+        Args:
+            url (str): The URL to fetch JSON data from.
+
+        Returns:
+            dict: A dictionary representing the parsed JSON data.
+
+        '''
+        return await to_thread(self.fetch_json, url)
 
     #
     #
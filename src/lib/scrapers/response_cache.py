@@ -0,0 +1,332 @@
+import os
+import re
+import json
+from time import time
+from hashlib import sha256
+from collections import OrderedDict
+from typing import Mapping, Optional
+
+from lib.logger import Logger
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache with per URL pattern TTLs, conditional revalidation and LRU eviction.
+
+    Each cached response is stored as a body file and a JSON meta file named by the hash of its URL. A response is
+    served from the cache while it is fresh, i.e. younger than the TTL of the first URL pattern it matches. A stale
+    response with an ETag or Last-Modified header is revalidated with a conditional GET, a 304 response refreshes
+    it without downloading the body again. URLs matching no pattern are never cached. When the cache grows beyond its
+    size limit the least recently used responses are evicted.
+
+    Args:
+        cache_dir (str): The directory of the cache files.
+        ttls (list[tuple[str, float]]): Regex URL patterns with their TTL in seconds, the first match applies.
+            A TTL of 0 stores the response for revalidation only.
+        max_bytes (int): The maximum total size of the cached bodies (default: 200 MB).
+
+    Methods:
+        lookup: Get a fresh cached body, or the conditional request headers of a stale one.
+        store: Cache a response body.
+        revalidate: Refresh a cached response after a 304 response and return its body.
+        stats: Get the hit, miss, revalidation and eviction counters.
+
+    Example Usage:
+        cache = ResponseCache('data/http_cache', ttls=[(r't\\.me/', 0)])
+        body, conditional_headers = cache.lookup(url)
+    """
+
+    def __init__(self, cache_dir: str, ttls: list[tuple[str, float]], max_bytes: int = 200 * 1024**2) -> None:
+        """
+        Initialize the ResponseCache and index the responses already on disk.
+        """
+        self.__cache_dir = cache_dir
+        self.__ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self.__max_bytes = max_bytes
+
+        self.__index: OrderedDict[str, int] = OrderedDict()
+        self.__size = 0
+
+        self.__stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.__load_index()
+
+    #
+    #
+    #
+
+    def lookup(self, url: str) -> tuple[Optional[bytes], dict[str, str]]:
+        """
+        Get the cached body of a URL if it is fresh, otherwise the conditional request headers to revalidate it.
+
+        Args:
+            url (str): The request URL.
+
+        Returns:
+            tuple[Optional[bytes], dict[str, str]]: The fresh body or None, and the If-None-Match and
+                If-Modified-Since headers of a stale response.
+        """
+        if self.__ttl_for(url) is None:
+            return None, {}
+
+        key = self.__key(url)
+        meta = self.__read_meta(key)
+
+        if meta is None or meta['url'] != url:
+            self.__stats['misses'] += 1
+            return None, {}
+
+        if meta['expires_at'] > time():
+            body = self.__read_body(key)
+
+            if body is not None:
+                self.__stats['hits'] += 1
+                self.__touch(key)
+                return body, {}
+
+        self.__stats['misses'] += 1
+
+        conditional_headers = {}
+
+        if meta.get('etag'):
+            conditional_headers['If-None-Match'] = meta['etag']
+
+        if meta.get('last_modified'):
+            conditional_headers['If-Modified-Since'] = meta['last_modified']
+
+        return None, conditional_headers
+
+    #
+    #
+    #
+
+    def store(self, url: str, body: bytes, headers: Mapping[str, str]) -> None:
+        """
+        Cache a response body, if its URL matches a TTL pattern.
+
+        Args:
+            url (str): The request URL.
+            body (bytes): The response body.
+            headers (Mapping[str, str]): The response headers.
+        """
+        ttl = self.__ttl_for(url)
+
+        if ttl is None:
+            return
+
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+
+        # Without validators a response which expires right away is of no use.
+        if ttl <= 0 and not etag and not last_modified:
+            return
+
+        if len(body) > self.__max_bytes:
+            return
+
+        key = self.__key(url)
+
+        meta = {'url': url, 'expires_at': time() + ttl, 'etag': etag, 'last_modified': last_modified, 'size': len(body)}
+
+        try:
+            self.__write_file(f'{key}.body', body)
+            self.__write_file(f'{key}.json', json.dumps(meta).encode())
+
+        except OSError as err:
+            self.__log.error(f'Failed to cache {url}: {err}')
+            return
+
+        self.__size += len(body) - self.__index.pop(key, 0)
+        self.__index[key] = len(body)
+
+        self.__stats['stored'] += 1
+
+        self.__evict()
+
+    #
+    #
+    #
+
+    def revalidate(self, url: str, headers: Mapping[str, str]) -> Optional[bytes]:
+        """
+        Refresh the cached response of a URL after the server answered a conditional GET with 304 Not Modified.
+
+        Args:
+            url (str): The request URL.
+            headers (Mapping[str, str]): The headers of the 304 response.
+
+        Returns:
+            Optional[bytes]: The cached body, None if it is no longer cached.
+        """
+        key = self.__key(url)
+
+        meta = self.__read_meta(key)
+        body = self.__read_body(key)
+
+        if meta is None or body is None:
+            return None
+
+        meta['expires_at'] = time() + (self.__ttl_for(url) or 0)
+        meta['etag'] = headers.get('ETag') or meta.get('etag')
+        meta['last_modified'] = headers.get('Last-Modified') or meta.get('last_modified')
+
+        try:
+            self.__write_file(f'{key}.json', json.dumps(meta).encode())
+
+        except OSError as err:
+            self.__log.error(f'Failed to refresh cached {url}: {err}')
+
+        self.__stats['revalidated'] += 1
+        self.__touch(key)
+
+        return body
+
+    #
+    #
+    #
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            dict[str, int]: Hits, misses, revalidated, stored and evicted response counts, and the cache size in bytes.
+        """
+        return {**self.__stats, 'size_bytes': self.__size}
+
+    #
+    #
+    #
+
+    def __ttl_for(self, url: str) -> Optional[float]:
+        """
+        Get the TTL of the first URL pattern a URL matches, None if it matches none.
+        """
+        for pattern, ttl in self.__ttls:
+            if pattern.search(url):
+                return ttl
+
+        return None
+
+    #
+    #
+    #
+
+    def __load_index(self) -> None:
+        """
+        Index the cached bodies on disk, ordered by their last access time.
+        """
+        entries = []
+
+        for file_name in os.listdir(self.__cache_dir):
+            if not file_name.endswith('.body'):
+                continue
+
+            stat = os.stat(os.path.join(self.__cache_dir, file_name))
+            entries.append((stat.st_mtime, file_name[: -len('.body')], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self.__index[key] = size
+            self.__size += size
+
+        self.__evict()
+
+    #
+    #
+    #
+
+    def __touch(self, key: str) -> None:
+        """
+        Mark a cached response as most recently used, the body's mtime persists the order across restarts.
+        """
+        if key in self.__index:
+            self.__index.move_to_end(key)
+
+        try:
+            os.utime(os.path.join(self.__cache_dir, f'{key}.body'))
+
+        except OSError:
+            pass
+
+    #
+    #
+    #
+
+    def __evict(self) -> None:
+        """
+        Delete the least recently used responses until the cache fits its size limit.
+        """
+        while self.__size > self.__max_bytes and self.__index:
+            key, size = self.__index.popitem(last=False)
+            self.__size -= size
+
+            for extension in ('body', 'json'):
+                try:
+                    os.remove(os.path.join(self.__cache_dir, f'{key}.{extension}'))
+
+                except OSError:
+                    pass
+
+            self.__stats['evicted'] += 1
+
+    #
+    #
+    #
+
+    def __read_meta(self, key: str) -> Optional[dict]:
+        """
+        Read the meta file of a cached response.
+        """
+        try:
+            with open(os.path.join(self.__cache_dir, f'{key}.json'), 'rb') as file:
+                return json.loads(file.read())
+
+        except (OSError, ValueError):
+            return None
+
+    #
+    #
+    #
+
+    def __read_body(self, key: str) -> Optional[bytes]:
+        """
+        Read the body file of a cached response.
+        """
+        try:
+            with open(os.path.join(self.__cache_dir, f'{key}.body'), 'rb') as file:
+                return file.read()
+
+        except OSError:
+            return None
+
+    #
+    #
+    #
+
+    def __write_file(self, file_name: str, data: bytes) -> None:
+        """
+        Write a cache file atomically, so a crash never leaves a truncated response behind.
+        """
+        path = os.path.join(self.__cache_dir, file_name)
+        temp_path = f'{path}.tmp'
+
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+
+        os.replace(temp_path, path)
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __key(url: str) -> str:
+        """
+        Get the cache file name of a URL.
+        """
+        return sha256(url.encode()).hexdigest()
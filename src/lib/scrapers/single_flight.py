@@ -0,0 +1,106 @@
+from time import monotonic
+from asyncio import Task, create_task, shield
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single call.
+
+    The first caller of a key starts the call, callers arriving while it is in flight await the same result instead
+    of starting their own. Successful results are also kept for a short time, so near-simultaneous callers share it
+    too. Failed calls, i.e. None results, are never kept.
+
+    The result object is shared between the callers, who must not modify it.
+
+    Args:
+        memo_ttl_sec (float): The time in seconds a successful result is reused after the call finished (default: 5).
+
+    Methods:
+        do: Run a call, or share the result of the call in flight for the same key.
+        stats: Get the counters of calls made and results shared.
+
+    Example Usage:
+        single_flight = SingleFlight(memo_ttl_sec=10)
+        soup = await single_flight.do(('html', url), lambda: scrape(url))
+    """
+
+    def __init__(self, memo_ttl_sec: float = 5) -> None:
+        """
+        Initialize the SingleFlight.
+        """
+        self.__memo_ttl_sec = memo_ttl_sec
+
+        self.__in_flight: dict[Hashable, Task] = {}
+        self.__memo: dict[Hashable, tuple[float, Any]] = {}
+
+        self.__stats = {'calls': 0, 'shared': 0, 'memoized': 0}
+
+    #
+    #
+    #
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a call, or share the result of the call in flight for the same key.
+
+        The call runs in its own task, so cancelling one caller doesn't cancel the call for the others.
+
+        Args:
+            key (Hashable): The key identifying the call, e.g. the request kind and URL.
+            call (Callable[[], Awaitable[Any]]): Coroutine function making the call.
+
+        Returns:
+            Any: The result of the call.
+        """
+        memo = self.__memo.get(key)
+
+        if memo and memo[0] > monotonic():
+            self.__stats['memoized'] += 1
+            return memo[1]
+
+        task = self.__in_flight.get(key)
+
+        if task is None:
+            task = create_task(call())
+            task.add_done_callback(lambda done: self.__finish(key, done))
+
+            self.__in_flight[key] = task
+            self.__stats['calls'] += 1
+
+        else:
+            self.__stats['shared'] += 1
+
+        return await shield(task)
+
+    #
+    #
+    #
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the counters of calls made, shared while in flight and served from the memo.
+
+        Returns:
+            dict[str, int]: The counters.
+        """
+        return dict(self.__stats)
+
+    #
+    #
+    #
+
+    def __finish(self, key: Hashable, task: Task) -> None:
+        """
+        Remove a finished call from the in-flight calls and memoize its result if it succeeded.
+        """
+        self.__in_flight.pop(key, None)
+
+        if self.__memo_ttl_sec <= 0 or task.cancelled() or task.exception() or task.result() is None:
+            return
+
+        now = monotonic()
+
+        # Drop the expired results, the memo only spans a few seconds of requests.
+        self.__memo = {memo_key: memo for memo_key, memo in self.__memo.items() if memo[0] > now}
+        self.__memo[key] = (now + self.__memo_ttl_sec, task.result())
@@ -0,0 +1,355 @@
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from typing import Callable, Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from playwright.async_api import Error as PlaywrightError
+
+from lib.logger import Logger
+from lib.base_classes.db_access_layer import DBAccessLayer
+from lib.scrapers.browser_pool import BrowserPool
+from lib.scrapers.html_parser import HtmlParser
+from lib.scrapers.rate_limiter import HostRateLimiter
+from lib.scrapers.circuit_breaker import CircuitBreaker
+from lib.link_quarantine import LinkQuarantine
+
+use_session = DBAccessLayer.use_session
+
+
+class TieredFetcher(DBAccessLayer):
+    """
+    Page fetcher escalating from plain HTTP to a pooled headless browser, learning the tier each domain needs.
+
+    A page is requested over plain HTTP first. When the page is empty, i.e. a JS app shell without the elements the
+    caller needs, or the host answered with a blocking status, it is rendered in a browser of the pool. Other HTTP
+    failures, i.e. quarantined or dead links and hosts with an open circuit, are not rendered. The tier which returned
+    the page is remembered per domain in the domain_fetch_strategies table, so domains known to need JS skip the HTTP
+    attempt and the others never pay for a browser. Browser domains fall back to HTTP when rendering fails, and are
+    probed with HTTP again once their strategy is older than the recheck time, in case the site no longer needs JS.
+
+    Renders honour the rate limit, circuit breaker and quarantine of the HTTP tier: quarantined links and hosts with
+    an open circuit aren't rendered, and render outcomes are reported to all three.
+
+    Args:
+        db (Database): An instance of the Database class.
+        scrape_page (Callable): Coroutine function scraping a URL over HTTP, with parse_only and stop_at arguments,
+            returning the parsed page and the outcome 'ok', 'blocked' or 'failed'.
+        pool (BrowserPool): The browser pool rendering pages.
+        html_parser (str): The HTML parser backend of rendered pages, 'lxml' or 'html.parser' (default: 'lxml').
+        min_text_chars (int): The minimum text length of a page parsed without strainer not to count as empty (default: 200).
+        recheck_sec (float): The age in seconds after which a browser domain is probed with HTTP again (default: 7 days).
+        rate_limiter (Optional[HostRateLimiter]): Shared per-host rate limiter.
+        circuit_breaker (Optional[CircuitBreaker]): Per-host circuit breaker.
+        quarantine (Optional[LinkQuarantine]): Quarantine of failing URLs.
+
+    Methods:
+        scrape_url: Scrape a page with the cheapest tier known to work for its domain.
+        stats: Get the counters of pages fetched per tier.
+        close: Log the counters, the browser pool is closed by its owner.
+    """
+
+    __http: str = 'http'
+    __browser: str = 'browser'
+
+    def __init__(
+        self,
+        db,
+        scrape_page: Callable,
+        pool: BrowserPool,
+        html_parser: str = 'lxml',
+        min_text_chars: int = 200,
+        recheck_sec: float = 7 * 24 * 3600,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        quarantine: Optional[LinkQuarantine] = None,
+    ) -> None:
+        """
+        Initialize the TieredFetcher.
+        """
+        super().__init__(db)
+
+        self.__scrape_page = scrape_page
+        self.__rate_limiter = rate_limiter
+        self.__circuit_breaker = circuit_breaker
+        self.__quarantine = quarantine
+        self.__pool = pool
+        self.__html_parser = HtmlParser(html_parser)
+        self.__min_text_chars = min_text_chars
+        self.__recheck_sec = recheck_sec
+
+        self.__strategies: Optional[dict[str, tuple[str, datetime]]] = None
+
+        self.__stats = {'http': 0, 'browser': 0, 'escalated': 0, 'skipped_http': 0, 'failed': 0}
+
+        self.__log = Logger(name=self.__class__.__name__)
+
+    #
+    #
+    #
+
+    async def scrape_url(self, url: str, parse_only: Optional[SoupStrainer] = None, stop_at: Optional[bytes] = None) -> Optional[BeautifulSoup]:
+        """
+        Scrape a page with the cheapest tier known to work for its domain.
+
+        Args:
+            url (str): The URL to scrape.
+            parse_only (Optional[SoupStrainer]): Strainer selecting the elements to parse, a page without any counts as empty.
+            stop_at (Optional[bytes]): Marker after which the rest of the page isn't needed, only used over HTTP.
+
+        Returns:
+            Optional[BeautifulSoup]: The parsed page, None if both tiers failed or returned an empty page.
+        """
+        domain = self.__domain(url)
+        tier = self.__known_tier(domain)
+
+        if tier == self.__browser:
+            self.__stats['skipped_http'] += 1
+
+            soup = await self.__render(url, parse_only)
+
+            if soup is not None:
+                self.__stats['browser'] += 1
+                return soup
+
+        soup, outcome = await self.__scrape_page(url, parse_only=parse_only, stop_at=stop_at)
+
+        if outcome == 'ok' and not self.__is_empty(soup, parse_only):
+            self.__stats['http'] += 1
+            self.__learn(domain, self.__http)
+            return soup
+
+        if tier != self.__browser and outcome in ('ok', 'blocked'):
+            self.__stats['escalated'] += 1
+
+            rendered = await self.__render(url, parse_only)
+
+            if rendered is not None:
+                self.__stats['browser'] += 1
+                self.__learn(domain, self.__browser)
+                return rendered
+
+        self.__stats['failed'] += 1
+
+        return soup if outcome == 'ok' else None
+
+    #
+    #
+    #
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the fetch counters.
+
+        Returns:
+            dict[str, int]: Pages fetched over HTTP and in a browser, HTTP attempts escalated and skipped, and failures.
+        """
+        return dict(self.__stats)
+
+    #
+    #
+    #
+
+    def close(self) -> None:
+        """
+        Log the fetch counters, the browser pool is closed by its owner.
+        """
+        self.__log.info(f'Tiered fetches: {self.__stats}')
+
+    #
+    #
+    #
+
+    async def __render(self, url: str, parse_only: Optional[SoupStrainer]) -> Optional[BeautifulSoup]:
+        """
+        Render a page in a browser of the pool.
+
+        Args:
+            url (str): The URL to render.
+            parse_only (Optional[SoupStrainer]): Strainer selecting the elements to parse.
+
+        Returns:
+            Optional[BeautifulSoup]: The parsed page, None if rendering failed, was skipped or the page is empty.
+        """
+        host = urlsplit(url).hostname or ''
+
+        if self.__circuit_breaker and not self.__circuit_breaker.allow(host):
+            return None
+
+        quarantine = self.__quarantine if self.__quarantine and self.__quarantine.applies_to(url) else None
+
+        quarantined = quarantine.is_quarantined(url) if quarantine else None
+
+        if quarantined:
+            return None
+
+        if self.__rate_limiter:
+            await self.__rate_limiter.acquire(host)
+
+        try:
+            async with self.__pool.page() as page:
+                response = await page.goto(url, wait_until='load')
+                status = response.status if response is not None else 200
+
+                if status < 400:
+                    content = await page.content()
+
+        except PlaywrightError as err:
+            error = str(err).splitlines()[0]
+
+            self.__log.error(f'Failed to render {url}: {error}')
+
+            if quarantine:
+                quarantine.report_failure(url, error='PlaywrightError')
+
+            return None
+
+        if self.__rate_limiter:
+            self.__rate_limiter.on_response(host, status)
+
+        if self.__circuit_breaker:
+            self.__circuit_breaker.record(host, success=status < 500)
+
+        if status >= 400:
+            # Throttling tells nothing about the link, it is left to the rate limiter like on the HTTP tier.
+            if quarantine and status not in (429, 503):
+                quarantine.report_failure(url, error=f'HTTP {status}', dead=status in (404, 410))
+
+            return None
+
+        soup = self.__html_parser.parse(content.encode('utf-8'), parse_only)
+
+        if self.__is_empty(soup, parse_only):
+            return None
+
+        if quarantined is not None:
+            quarantine.release(url)
+
+        return soup
+
+    #
+    #
+    #
+
+    def __is_empty(self, soup: Optional[BeautifulSoup], parse_only: Optional[SoupStrainer]) -> bool:
+        """
+        Check whether a page failed or holds nothing of use.
+
+        Args:
+            soup (Optional[BeautifulSoup]): The parsed page.
+            parse_only (Optional[SoupStrainer]): The strainer the page was parsed with.
+
+        Returns:
+            bool: True if there is no page, no element matched the strainer, or a page parsed without strainer has almost no text.
+        """
+        if soup is None:
+            return True
+
+        if parse_only is not None:
+            return soup.find() is None
+
+        return len(soup.get_text(strip=True)) < self.__min_text_chars
+
+    #
+    #
+    #
+
+    def __known_tier(self, domain: str) -> Optional[str]:
+        """
+        Get the tier remembered for a domain, None if it is unknown or a browser strategy is due for an HTTP probe.
+
+        Args:
+            domain (str): The domain.
+
+        Returns:
+            Optional[str]: 'http', 'browser' or None.
+        """
+        if self.__strategies is None:
+            self.__strategies = self.__load_strategies() or {}
+
+        strategy = self.__strategies.get(domain)
+
+        if strategy is None:
+            return None
+
+        tier, updated_at = strategy
+
+        if tier == self.__browser and datetime.now() - updated_at > timedelta(seconds=self.__recheck_sec):
+            return None
+
+        return tier
+
+    #
+    #
+    #
+
+    def __learn(self, domain: str, tier: str) -> None:
+        """
+        Remember the tier which returned a page of a domain, only written when it changed or a probe confirmed it.
+
+        Args:
+            domain (str): The domain.
+            tier (str): The tier which worked.
+        """
+        strategy = self.__strategies.get(domain)
+
+        if strategy is not None and strategy[0] == tier and self.__known_tier(domain) is not None:
+            return
+
+        now = datetime.now()
+
+        self.__strategies[domain] = (tier, now)
+        self.__save_strategy(domain, tier, now)
+
+        if strategy is not None and strategy[0] != tier:
+            self.__log.info(f'{domain} is now fetched over {tier}')
+
+    #
+    #
+    #
+
+    @use_session
+    def __load_strategies(self, session={}) -> dict[str, tuple[str, datetime]]:
+        """
+        Load the remembered tiers of all domains.
+
+        Args:
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            dict[str, tuple[str, datetime]]: The tier and its update time by domain.
+        """
+        table = self.models.DomainFetchStrategy
+
+        return {row.domain: (row.tier, row.updated_at) for row in session.query(table).all()}
+
+    #
+    #
+    #
+
+    @use_session
+    def __save_strategy(self, domain: str, tier: str, updated_at: datetime, session={}) -> None:
+        """
+        Save the tier of a domain.
+
+        Args:
+            domain (str): The domain.
+            tier (str): The tier.
+            updated_at (datetime): The update time.
+            session: The database session (provided by the session_decorator).
+        """
+        table = self.models.DomainFetchStrategy
+
+        session.merge(table(domain=domain, tier=tier, updated_at=updated_at))
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __domain(url: str) -> str:
+        """
+        Get the domain of a URL, without a leading www.
+        """
+        host = (urlsplit(url).hostname or '').lower()
+
+        return host[4:] if host.startswith('www.') else host
@@ -0,0 +1,321 @@
+import math
+from hashlib import md5
+from bisect import bisect
+from datetime import datetime, timedelta
+from asyncio import sleep
+from typing import NoReturn
+from sqlalchemy import or_
+from sqlalchemy.dialects.sqlite import insert
+
+from lib.base_classes.db_access_layer import DBAccessLayer
+from lib.logger import Logger
+
+use_session = DBAccessLayer.use_session
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys, i.e. coin IDs, onto a fixed number of shards.
+
+    Each shard is placed on the ring at several virtual points, a key belongs to the shard of the first point
+    clockwise from the key's hash. Changing the shard count only moves the keys between the neighbouring points.
+
+    Args:
+        shard_count (int): The number of shards.
+        virtual_nodes (int): The number of ring points per shard (default: 64).
+
+    Methods:
+        shard_for: Get the shard of a key.
+    """
+
+    def __init__(self, shard_count: int, virtual_nodes: int = 64) -> None:
+        """
+        Initialize the HashRing.
+        """
+        points = sorted((self.__hash(f'shard-{shard}-{node}'), shard) for shard in range(shard_count) for node in range(virtual_nodes))
+
+        self.__hashes = [point_hash for point_hash, _ in points]
+        self.__shards = [shard for _, shard in points]
+
+    #
+    #
+    #
+
+    def shard_for(self, key: str) -> int:
+        """
+        Get the shard of a key.
+
+        Args:
+            key (str): The key, i.e. a coin ID.
+
+        Returns:
+            int: The shard ID.
+        """
+        index = bisect(self.__hashes, self.__hash(key)) % len(self.__hashes)
+
+        return self.__shards[index]
+
+    #
+    #
+    #
+
+    @staticmethod
+    #
+    def __hash(key: str) -> int:
+        """
+        Stable 64 bit hash of a key, unlike hash() it is the same in every process.
+        """
+        return int(md5(key.encode()).hexdigest()[:16], 16)
+
+
+#
+#
+#
+
+
+class LocalShardLeases:
+    """
+    Single process stand-in for ShardLeaseManager, owns every shard.
+
+    Args:
+        shard_count (int): The number of shards.
+    """
+
+    def __init__(self, shard_count: int) -> None:
+        """
+        Initialize the LocalShardLeases.
+        """
+        self.ring = HashRing(shard_count)
+        self.owned_shards = frozenset(range(shard_count))
+
+    #
+    #
+    #
+
+    def shard_for(self, key: str) -> int:
+        """
+        Get the shard of a key.
+        """
+        return self.ring.shard_for(key)
+
+    #
+    #
+    #
+
+    def is_leader(self) -> bool:
+        """
+        The only process is always the leader.
+        """
+        return True
+
+    #
+    #
+    #
+
+    def heartbeat(self) -> frozenset[int]:
+        """
+        Nothing to renew, returns all shards.
+        """
+        return self.owned_shards
+
+    #
+    #
+    #
+
+    async def run(self) -> None:
+        """
+        Nothing to renew.
+        """
+
+    #
+    #
+    #
+
+    def release(self) -> None:
+        """
+        Nothing to release.
+        """
+
+
+#
+#
+#
+
+
+class ShardLeaseManager(DBAccessLayer):
+    """
+    Coordinates shard ownership between worker processes through the shard_leases table of the shared database.
+
+    Every worker heartbeats periodically. A heartbeat renews the leases of the worker's shards, releases the shards
+    above its fair share so newly started workers can pick them up, and claims free or expired shards up to its fair
+    share. The shards of a worker which stopped heartbeating are claimed by the others once their lease expires.
+
+    The owner of shard 0 is the leader, which runs the routines that are not split by shard.
+
+    Args:
+        db (Database): An instance of the Database class.
+        worker_id (str): The unique ID of the worker.
+        shard_count (int): The number of shards.
+        lease_sec (int): The lease duration in seconds, a worker heartbeats 3 times per lease (default: 60).
+
+    Methods:
+        shard_for: Get the shard of a key.
+        is_leader: Check if the worker owns shard 0.
+        heartbeat: Renew, release and claim shard leases.
+        run: Heartbeat loop.
+        release: Release all shards of the worker.
+
+    Example Usage:
+        shards = ShardLeaseManager(db, 'worker-1', shard_count=16)
+        shards.heartbeat()
+        await shards.run()
+    """
+
+    def __init__(self, db, worker_id: str, shard_count: int, lease_sec: int = 60) -> None:
+        """
+        Initialize the ShardLeaseManager.
+        """
+        super().__init__(db)
+
+        self.ring = HashRing(shard_count)
+        self.owned_shards: frozenset[int] = frozenset()
+
+        self.__worker_id = worker_id
+        self.__shard_count = shard_count
+        self.__lease_sec = lease_sec
+
+        self.__log = Logger(name=f'{self.__class__.__name__}:{worker_id}')
+
+    #
+    #
+    #
+
+    def shard_for(self, key: str) -> int:
+        """
+        Get the shard of a key.
+
+        Args:
+            key (str): The key, i.e. a coin ID.
+
+        Returns:
+            int: The shard ID.
+        """
+        return self.ring.shard_for(key)
+
+    #
+    #
+    #
+
+    def is_leader(self) -> bool:
+        """
+        Check if the worker owns shard 0.
+
+        Returns:
+            bool: True if the worker is the leader.
+        """
+        return 0 in self.owned_shards
+
+    #
+    #
+    #
+
+    def heartbeat(self) -> frozenset[int]:
+        """
+        Renew the leases of the worker's shards, release the shards above its fair share and claim free or expired shards.
+
+        Returns:
+            frozenset[int]: The shards owned by the worker, no shards if the leases couldn't be renewed.
+        """
+        owned_shards = self.__renew_leases() or frozenset()
+
+        if owned_shards != self.owned_shards:
+            self.__log.info(f'Owns shards: {sorted(owned_shards)}')
+
+        self.owned_shards = owned_shards
+
+        return owned_shards
+
+    #
+    #
+    #
+
+    @use_session
+    def __renew_leases(self, session={}) -> frozenset[int]:
+        """
+        Heartbeat transaction, logging is left to the caller since the log handler writes to the same database.
+
+        Args:
+            session: The database session (provided by the session_decorator).
+
+        Returns:
+            frozenset[int]: The shards owned by the worker.
+        """
+        leases = self.models.ShardLease
+        heartbeats = self.models.WorkerHeartbeat
+
+        worker_id = self.__worker_id
+
+        now = datetime.now()
+        lease_expires = now + timedelta(seconds=self.__lease_sec)
+
+        statement = insert(heartbeats).values(worker_id=worker_id, last_seen=now)
+        session.execute(statement.on_conflict_do_update(index_elements=['worker_id'], set_={'last_seen': now}))
+
+        live_workers = session.query(heartbeats).filter(heartbeats.last_seen > now - timedelta(seconds=self.__lease_sec)).count()
+        fair_share = math.ceil(self.__shard_count / max(live_workers, 1))
+
+        shard_rows = [{'shard_id': shard} for shard in range(self.__shard_count)]
+        session.execute(insert(leases).on_conflict_do_nothing(index_elements=['shard_id']), shard_rows)
+
+        owned = sorted(shard for (shard,) in session.query(leases.shard_id).filter(leases.owner == worker_id).all())
+
+        # Keep the lowest shards, so the leader keeps shard 0 while rebalancing.
+        excess = owned[fair_share:]
+
+        if excess:
+            session.query(leases).filter(leases.shard_id.in_(excess), leases.owner == worker_id).update({'owner': None, 'lease_expires': None}, synchronize_session=False)
+
+        session.query(leases).filter(leases.owner == worker_id).update({'lease_expires': lease_expires}, synchronize_session=False)
+
+        is_free = or_(leases.owner.is_(None), leases.lease_expires < now)
+
+        free = [shard for (shard,) in session.query(leases.shard_id).filter(is_free).order_by(leases.shard_id).all()]
+
+        for shard in free[: max(fair_share - len(owned) + len(excess), 0)]:
+            # Conditional update, so concurrent workers never claim the same shard.
+            session.query(leases).filter(leases.shard_id == shard, is_free).update({'owner': worker_id, 'lease_expires': lease_expires}, synchronize_session=False)
+
+        return frozenset(shard for (shard,) in session.query(leases.shard_id).filter(leases.owner == worker_id).all())
+
+    #
+    #
+    #
+
+    async def run(self) -> NoReturn:
+        """
+        Heartbeat loop, renews the worker's shard leases 3 times per lease duration.
+        """
+        while True:
+            await sleep(self.__lease_sec / 3)
+
+            self.heartbeat()
+
+    #
+    #
+    #
+
+    @use_session
+    def release(self, session={}) -> None:
+        """
+        Release all shards of the worker, so other workers can claim them right away.
+
+        Args:
+            session: The database session (provided by the session_decorator).
+        """
+        leases = self.models.ShardLease
+        heartbeats = self.models.WorkerHeartbeat
+
+        session.query(leases).filter(leases.owner == self.__worker_id).update({'owner': None, 'lease_expires': None}, synchronize_session=False)
+        session.query(heartbeats).filter(heartbeats.worker_id == self.__worker_id).delete(synchronize_session=False)
+
+        self.owned_shards = frozenset()
@@ -1,29 +1,144 @@
+import os
+import socket
+from typing import Optional
+from argparse import ArgumentParser
 from asyncio import run, gather
+from multiprocessing import get_context
 
 from db.db import db_singleton as db
 from lib.twitter_api import twitter_api_singleton as twitter_api
+from lib.routine_scheduler import RoutineScheduler
+from lib.sharding import LocalShardLeases, ShardLeaseManager
+from lib.base_classes.config import Config
 
 from coin_data_manager.coingecko.coingecko_coordinator import CoingeckoCoordinator
 from coin_data_manager.social_links.social_links_coordinator import SocialLinksCoordinator
 from coin_subscribers_monitor.subscribers_monitor_coordinator import SubscribersMonitorCoordinator
 
-from lib.scrapers.requests_handler import RequestsHandler
+from lib.scrapers.async_requests_handler import AsyncRequestsHandler
+from lib.scrapers.browser_pool import browser_pool_singleton
+from lib.scrapers.cookie_store import cookie_store_singleton
+from lib.scrapers.tiered_fetcher import TieredFetcher
+from lib.scrapers.rate_limiter import HostRateLimiter
+from lib.scrapers.response_cache import ResponseCache
+from lib.scrapers.circuit_breaker import CircuitBreaker
+from lib.link_quarantine import LinkQuarantine
+from lib.retry_policy import RetryPolicy
 from lib.scrapers.generate_requests_headers import generate_requests_headers
 from lib.scrapers.headers_config import referers
 
 
-async def main() -> None:
+async def main(worker_id: Optional[str] = None) -> None:
     #
-    req = RequestsHandler(generate_requests_headers, referers)
+    if worker_id:
+        shards = ShardLeaseManager(db, worker_id, shard_count=Config.shard_count, lease_sec=Config.shard_lease_sec)
+    else:
+        shards = LocalShardLeases(shard_count=Config.shard_count)
+
+    shards.heartbeat()
+
+    rate_limiter = HostRateLimiter(default_rate=Config.default_host_rate, host_rates=Config.host_rates)
+
+    cache = ResponseCache(Config.http_cache_dir, ttls=Config.http_cache_ttls, max_bytes=Config.http_cache_max_bytes)
+
+    circuit_breaker = CircuitBreaker(Config.circuit_failure_threshold, Config.circuit_cooldown_sec, Config.circuit_max_cooldown_sec)
+
+    quarantine = LinkQuarantine(
+        db,
+        threshold=Config.quarantine_threshold,
+        recheck_sec=Config.quarantine_recheck_sec,
+        max_recheck_sec=Config.quarantine_max_recheck_sec,
+        exclude_patterns=Config.quarantine_exclude_patterns,
+    )
+
+    retry_policy = RetryPolicy(
+        max_attempts=Config.http_retry_max_attempts,
+        base_delay_sec=Config.http_retry_base_delay_sec,
+        max_delay_sec=Config.http_retry_max_delay_sec,
+        deadline_sec=Config.http_retry_deadline_sec,
+    )
+
+    req = AsyncRequestsHandler(
+        generate_requests_headers,
+        referers,
+        max_connections=Config.http_max_connections,
+        max_keepalive_connections=Config.http_max_keepalive_connections,
+        keepalive_expiry_sec=Config.http_keepalive_expiry_sec,
+        connect_timeout_sec=Config.http_connect_timeout_sec,
+        read_timeout_sec=Config.http_read_timeout_sec,
+        deadline_sec=Config.http_request_deadline_sec,
+        http2=Config.http2,
+        rate_limiter=rate_limiter,
+        cache=cache,
+        coalesce_ttl_sec=Config.http_coalesce_ttl_sec,
+        circuit_breaker=circuit_breaker,
+        quarantine=quarantine,
+        retry_policy=retry_policy,
+        html_parser=Config.html_parser,
+        max_body_bytes=Config.http_max_body_bytes,
+        content_types=Config.http_content_types,
+        cookie_store=cookie_store_singleton,
+    )
+
+    fetcher = TieredFetcher(
+        db,
+        req.scrape_page,
+        browser_pool_singleton,
+        html_parser=Config.html_parser,
+        recheck_sec=Config.fetch_strategy_recheck_sec,
+        rate_limiter=rate_limiter,
+        circuit_breaker=circuit_breaker,
+        quarantine=quarantine,
+    )
 
     coingecko = CoingeckoCoordinator(db, req.fetch_json, req.scrape_url)
-    social_links = SocialLinksCoordinator(db, req.scrape_url)
-    subscribers_monitor = SubscribersMonitorCoordinator(db, twitter_api, req.scrape_url, req.fetch_json)
+    social_links = SocialLinksCoordinator(db, req.scrape_url, fetcher.scrape_url, shards)
+    subscribers_monitor = SubscribersMonitorCoordinator(db, twitter_api, req.fetch_bytes, req.fetch_json, shards, quarantine)
+
+    scheduler = RoutineScheduler(
+        [coingecko, social_links, subscribers_monitor],
+        jitter_sec=Config.scheduler_jitter_sec,
+        is_leader=shards.is_leader,
+        leader_poll_sec=Config.shard_lease_sec,
+    )
+
+    try:
+        await gather(scheduler.run(), shards.run())
 
-    tasks = [coingecko.run_service(), social_links.run_service(), subscribers_monitor.run_service()]
+    finally:
+        shards.release()
+        fetcher.close()
+        await req.close()
+        await browser_pool_singleton.close()
 
-    await gather(*tasks)
+
+def run_worker(worker_id: str) -> None:
+    #
+    run(main(worker_id))
 
 
 if __name__ == "__main__":
-    run(main())
+    parser = ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes splitting the coins by shard')
+    parser.add_argument('--worker-id', default=None, help='run a single worker of a multi-node setup with this unique ID')
+
+    args = parser.parse_args()
+
+    if args.worker_id:
+        run_worker(args.worker_id)
+
+    elif args.workers > 1:
+        context = get_context('spawn')
+
+        host = socket.gethostname()
+
+        workers = [context.Process(target=run_worker, args=(f'{host}-{os.getpid()}-{index}',)) for index in range(args.workers)]
+
+        for worker in workers:
+            worker.start()
+
+        for worker in workers:
+            worker.join()
+
+    else:
+        run(main())
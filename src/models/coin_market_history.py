@@ -0,0 +1,34 @@
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Index
+
+from models.base import Base
+
+
+class CoinMarketSnapshot(Base):
+    __tablename__ = 'coin_market_snapshots'
+    __table_args__ = (Index('ix_coin_market_snapshots_coin_id_ts', 'coin_id', 'ts'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    coin_id: Mapped[str] = mapped_column(String(length=50))
+    ts: Mapped[int] = mapped_column()
+    price: Mapped[Optional[float]] = mapped_column()
+    market_cap: Mapped[Optional[float]] = mapped_column()
+    total_volume: Mapped[Optional[float]] = mapped_column()
+    market_cap_rank: Mapped[Optional[int]] = mapped_column()
+
+
+class CoinMarketRollup(Base):
+    __tablename__ = 'coin_market_rollups'
+    __table_args__ = (Index('ix_coin_market_rollups_bucket_ts', 'bucket', 'ts'),)
+
+    coin_id: Mapped[str] = mapped_column(String(length=50), primary_key=True)
+    bucket: Mapped[str] = mapped_column(String(length=8), primary_key=True)
+    ts: Mapped[int] = mapped_column(primary_key=True)
+    open: Mapped[Optional[float]] = mapped_column()
+    high: Mapped[Optional[float]] = mapped_column()
+    low: Mapped[Optional[float]] = mapped_column()
+    close: Mapped[Optional[float]] = mapped_column()
+    volume: Mapped[Optional[float]] = mapped_column()
+    market_cap: Mapped[Optional[float]] = mapped_column()
+    samples: Mapped[int] = mapped_column()
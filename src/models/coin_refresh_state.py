@@ -0,0 +1,14 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime
+
+from models.base import Base
+
+
+class CoinRefreshState(Base):
+    __tablename__ = 'coin_refresh_state'
+
+    coin_id: Mapped[str] = mapped_column(String(length=50), primary_key=True)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime)
+    market_cap_rank: Mapped[Optional[int]] = mapped_column()
@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime
+
+from models.base import Base
+
+
+class DomainFetchStrategy(Base):
+    __tablename__ = 'domain_fetch_strategies'
+
+    domain: Mapped[str] = mapped_column(String(length=255), primary_key=True)
+    tier: Mapped[str] = mapped_column(String(length=16))
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
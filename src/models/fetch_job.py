@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from models.base import Base
+
+
+class FetchJob(Base):
+    __tablename__ = 'fetch_jobs'
+    __table_args__ = (
+        UniqueConstraint('queue', 'job_key'),
+        Index('ix_fetch_jobs_queue_status_run_at', 'queue', 'status', 'run_at'),
+        Index('ix_fetch_jobs_queue_shard', 'queue', 'shard'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    queue: Mapped[str] = mapped_column(String(length=50))
+    job_key: Mapped[str] = mapped_column()
+    payload: Mapped[str] = mapped_column()
+    shard: Mapped[int] = mapped_column(default=0)
+    status: Mapped[str] = mapped_column(String(length=20), default='pending')
+    attempts: Mapped[int] = mapped_column(default=0)
+    run_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    leased_by: Mapped[Optional[str]] = mapped_column(String(length=100))
+    leased_until: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_error: Mapped[Optional[str]] = mapped_column()
+    created: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    updated: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
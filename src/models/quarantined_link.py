@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, Index
+
+from models.base import Base
+
+
+class QuarantinedLink(Base):
+    __tablename__ = 'quarantined_links'
+    __table_args__ = (Index('ix_quarantined_links_recheck_at', 'recheck_at'),)
+
+    url: Mapped[str] = mapped_column(String(length=500), primary_key=True)
+    failures: Mapped[int] = mapped_column(default=0)
+    first_failed: Mapped[datetime] = mapped_column(DateTime)
+    last_failed: Mapped[datetime] = mapped_column(DateTime)
+    recheck_at: Mapped[datetime] = mapped_column(DateTime)
+    last_error: Mapped[Optional[str]] = mapped_column()
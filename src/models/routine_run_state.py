@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime
+
+from models.base import Base
+
+
+class RoutineRunState(Base):
+    __tablename__ = 'routine_run_state'
+
+    routine_name: Mapped[str] = mapped_column(String(length=50), primary_key=True)
+    last_start: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_success: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    duration_sec: Mapped[Optional[float]] = mapped_column()
@@ -0,0 +1,12 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String
+
+from models.base import Base
+
+
+class RowFingerprint(Base):
+    __tablename__ = 'row_fingerprints'
+
+    table_name: Mapped[str] = mapped_column(String(length=64), primary_key=True)
+    row_key: Mapped[str] = mapped_column(String(length=100), primary_key=True)
+    hash: Mapped[int] = mapped_column()
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime
+
+from models.base import Base
+
+
+class ShardLease(Base):
+    __tablename__ = 'shard_leases'
+
+    shard_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    owner: Mapped[Optional[str]] = mapped_column(String(length=100))
+    lease_expires: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class WorkerHeartbeat(Base):
+    __tablename__ = 'worker_heartbeats'
+
+    worker_id: Mapped[str] = mapped_column(String(length=100), primary_key=True)
+    last_seen: Mapped[datetime] = mapped_column(DateTime)